@@ -11,9 +11,20 @@ python manage.py collectstatic --no-input
 echo "Running migrations..."
 python manage.py migrate
 
+echo "Clearing expired sessions..."
+python manage.py clearsessions
+
+echo "Building spelling suggestion index..."
+python manage.py build_spelling_index
+
 echo "Setting up initial data..."
 python manage.py setup_initial_data
 
+echo "Rebuilding recommendations..."
+python manage.py build_recommendations
+python manage.py build_related_content
+python manage.py build_cohort_percentiles
+
 echo "Creating admin user..."
 python manage.py create_admin
 
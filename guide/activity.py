@@ -0,0 +1,48 @@
+"""Rebuilding the DailyActivity rollup from the raw rows.
+
+DailyActivity is kept current by the write paths (UserProgress.toggle,
+SpellingMistake.bulk_record, the spelling and whiteboard views). This
+recounts it from scratch, for when rows were changed behind those paths'
+back or written with bulk_create. The raw rows keep no history of
+repeated spelling entries, so a rebuild counts each spelling mistake
+once, on the day it was first logged.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def rebuild_activity(activity_model, progress_model, mistake_model, whiteboard_model, user_ids=None, batch_size=1000):
+    """Recount DailyActivity for user_ids (default: every user); returns the rows written"""
+    sources = [
+        ('completions', progress_model.objects.filter(is_completed=True, completed_at__isnull=False),
+         'user', 'completed_at'),
+        ('favorites', progress_model.objects.filter(is_favorited=True, favorited_at__isnull=False),
+         'user', 'favorited_at'),
+        ('spelling_entries', mistake_model.objects.all(), 'user', 'created_at'),
+        ('whiteboard_saves', whiteboard_model.objects.filter(created_by__isnull=False), 'created_by', 'created_at'),
+    ]
+    days = defaultdict(dict)
+    for field, rows, user_field, time_field in sources:
+        if user_ids is not None:
+            rows = rows.filter(**{f'{user_field}__in': user_ids})
+        counts = (
+            rows.annotate(day=TruncDate(time_field, tzinfo=timezone.get_current_timezone()))
+            .values_list(user_field, 'day').annotate(count=Count('id')).order_by()
+        )
+        for user_id, day, count in counts.iterator():
+            days[user_id, day][field] = count
+
+    existing = activity_model.objects.all()
+    if user_ids is not None:
+        existing = existing.filter(user__in=user_ids)
+    with transaction.atomic():
+        existing.delete()
+        activity_model.objects.bulk_create(
+            (activity_model(user_id=user_id, date=day, **counts) for (user_id, day), counts in days.items()),
+            batch_size=batch_size,
+        )
+    return len(days)
@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import Section, Content, Tag, ContentTag, UserProgress, SimpleUser, WhiteboardImage, SpellingMistake
+from .models import (
+    Section, Content, Tag, ContentTag, UserProgress, SimpleUser, WhiteboardImage, SpellingMistake, SearchLog,
+    DailySearchSummary, DailyActivity,
+)
 
 @admin.register(Section)
 class SectionAdmin(admin.ModelAdmin):
@@ -10,11 +13,11 @@ class SectionAdmin(admin.ModelAdmin):
 
 @admin.register(Content)
 class ContentAdmin(admin.ModelAdmin):
-    list_display = ['title', 'section', 'content_type', 'is_active', 'order', 'created_at']
+    list_display = ['title', 'section', 'content_type', 'is_active', 'order', 'completion_count', 'created_at']
     list_filter = ['section', 'content_type', 'is_active', 'created_at']
     search_fields = ['title', 'description', 'text_content']
     list_editable = ['is_active', 'order']
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = ['created_at', 'updated_at', 'completion_count', 'favorite_count', 'recent_completion_count']
     
     fieldsets = (
         ('Basic Information', {
@@ -24,6 +27,10 @@ class ContentAdmin(admin.ModelAdmin):
             'fields': ('youtube_url', 'text_content', 'external_url'),
             'description': 'Fill in the appropriate field based on the content type selected above.'
         }),
+        ('Popularity', {
+            'fields': ('completion_count', 'favorite_count', 'recent_completion_count'),
+            'classes': ('collapse',)
+        }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at'),
             'classes': ('collapse',)
@@ -67,7 +74,7 @@ class WhiteboardImageAdmin(admin.ModelAdmin):
 
 @admin.register(SpellingMistake)
 class SpellingMistakeAdmin(admin.ModelAdmin):
-    list_display = ['incorrect_word', 'correct_word', 'user', 'frequency', 'is_reviewed', 'updated_at']
+    list_display = ['incorrect_word', 'correct_word', 'user', 'frequency', 'is_reviewed', 'due_at', 'updated_at']
     list_filter = ['is_reviewed', 'frequency', 'created_at', 'user']
     search_fields = ['incorrect_word', 'correct_word', 'context', 'notes', 'user__name']
     list_editable = ['is_reviewed']
@@ -81,8 +88,34 @@ class SpellingMistakeAdmin(admin.ModelAdmin):
             'fields': ('context', 'notes'),
             'classes': ('collapse',)
         }),
+        ('Review Schedule', {
+            'fields': ('ease_factor', 'interval_days', 'repetitions', 'due_at'),
+            'classes': ('collapse',)
+        }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at'),
             'classes': ('collapse',)
         }),
     )
+
+@admin.register(SearchLog)
+class SearchLogAdmin(admin.ModelAdmin):
+    list_display = ['query', 'scope', 'result_count', 'close_matches', 'duration_ms', 'searched_at']
+    list_filter = ['scope', 'close_matches', 'section', 'searched_at']
+    search_fields = ['query']
+    date_hierarchy = 'searched_at'
+
+@admin.register(DailySearchSummary)
+class DailySearchSummaryAdmin(admin.ModelAdmin):
+    list_display = ['date', 'query', 'searches', 'zero_results', 'close_matches', 'average_results', 'average_duration_ms']
+    list_filter = ['date']
+    search_fields = ['query']
+    date_hierarchy = 'date'
+
+@admin.register(DailyActivity)
+class DailyActivityAdmin(admin.ModelAdmin):
+    list_display = ['user', 'date', 'completions', 'favorites', 'spelling_entries', 'whiteboard_saves']
+    list_filter = ['date']
+    search_fields = ['user__name']
+    date_hierarchy = 'date'
+    list_select_related = ['user']
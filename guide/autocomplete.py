@@ -0,0 +1,301 @@
+"""As-you-type suggestions over content titles and tag names.
+
+The index is built in memory from the database:
+
+* every distinct word of the titles and tag names is kept in a sorted
+  vocabulary, so all words starting with a prefix are one contiguous
+  range of word ids found with two bisects (a flattened prefix trie);
+* each word has a posting list of the entries (titles or tags) using it;
+* each word is also listed under its trigrams, so a misspelt word
+  ("writen") finds vocabulary words sharing most of its trigrams, which
+  are then checked with the edit distance used by the spelling tools.
+
+Entries are numbered in display order (tags first, then shorter titles),
+so sorting candidates by (score, entry id) ranks them without looking
+at the labels again.
+
+The index is built when the WSGI/ASGI app is imported (see warmup.py), so
+with preload_app every gunicorn worker starts with the master's copy. A
+worker rebuilds its own copy when a cheap signature query shows that
+content or tags changed, at most every AUTOCOMPLETE_REFRESH_SECONDS.
+"""
+import bisect
+import heapq
+import logging
+import re
+import threading
+import time
+from array import array
+from collections import defaultdict
+from itertools import accumulate, chain, islice
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.models import Count, Max
+
+from .models import Content, Tag
+from .spelling import edit_distance
+
+logger = logging.getLogger('guide.autocomplete')
+
+WORD = re.compile(r'[a-z0-9]+')
+MIN_FUZZY_LENGTH = 4
+# Prefixes up to this length can match thousands of words, so their entry
+# lists are built ahead of time; longer ones are merged per query
+CACHED_PREFIX_LENGTH = 3
+# Entries checked one by one before the remaining candidates of every
+# query word are intersected as sets instead
+QUICK_SCAN = 200
+# Matching entries scored per query, best displayed first; a query matching
+# more entries than this returns the best of those scored
+MAX_CANDIDATES = 2000
+EXACT, PREFIX, FUZZY = 3, 2, 1
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def tokenize(text):
+    return WORD.findall((text or '').casefold())
+
+
+def trigrams(word):
+    padded = f'  {word} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def max_typos(word):
+    return 1 if len(word) < 8 else 2
+
+
+class AutocompleteIndex:
+    """Prefix and typo-tolerant lookup over a fixed list of entries.
+
+    entries is a list of dicts with at least 'type' and 'label'; they are
+    returned as they are, best match first.
+    """
+
+    def __init__(self, entries):
+        # Display order: tags before titles, then shorter labels first
+        self.entries = sorted(entries, key=lambda entry: (entry['type'] != 'tag', len(entry['label']), entry['label']))
+        entry_words = [sorted(set(tokenize(entry['label']))) for entry in self.entries]
+        self.words = sorted({word for words in entry_words for word in words})
+        word_ids = {word: word_id for word_id, word in enumerate(self.words)}
+
+        postings = [array('I') for _ in self.words]
+        self.entry_words = []
+        for entry_id, words in enumerate(entry_words):
+            ids = array('I', sorted(word_ids[word] for word in words))
+            self.entry_words.append(ids)
+            for word_id in ids:
+                postings[word_id].append(entry_id)
+        self.postings = postings
+        # Entries using any word in a word id range, without walking it
+        self.posting_offsets = [0, *accumulate(len(posting) for posting in postings)]
+
+        by_prefix = defaultdict(set)
+        for word_id, word in enumerate(self.words):
+            for length in range(1, min(len(word), CACHED_PREFIX_LENGTH) + 1):
+                by_prefix[word[:length]].update(postings[word_id])
+        self.prefix_postings = {prefix: array('I', sorted(ids)) for prefix, ids in by_prefix.items()}
+
+        by_trigram = defaultdict(lambda: array('I'))
+        for word_id, word in enumerate(self.words):
+            # A mistyped number is a different number, not a typo
+            if len(word) >= MIN_FUZZY_LENGTH - 1 and not word.isdigit():
+                for gram in trigrams(word):
+                    by_trigram[gram].append(word_id)
+        self.trigrams = dict(by_trigram)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def prefix_range(self, prefix):
+        start = bisect.bisect_left(self.words, prefix)
+        return start, bisect.bisect_left(self.words, prefix + '\uffff', start)
+
+    def fuzzy_matches(self, term):
+        """Word ids within max_typos of term, or of its start when it is still being typed"""
+        grams = trigrams(term)
+        allowed = max_typos(term)
+        # Each typo changes at most three trigrams
+        needed = max(1, len(grams) - 3 * allowed)
+        shared = defaultdict(int)
+        for gram in grams:
+            for word_id in self.trigrams.get(gram, ()):
+                shared[word_id] += 1
+        matches = set()
+        for word_id, count in shared.items():
+            if count < needed:
+                continue
+            word = self.words[word_id]
+            if (edit_distance(term, word, allowed) <= allowed
+                    or edit_distance(term, word[:len(term)], allowed) <= allowed):
+                matches.add(word_id)
+        return matches
+
+    def resolve(self, term):
+        """(exact word id or None, prefix id range, fuzzy word ids) for one query word"""
+        start, stop = self.prefix_range(term)
+        exact = start if start < stop and self.words[start] == term else None
+        fuzzy = set()
+        if start == stop and len(term) >= MIN_FUZZY_LENGTH:
+            fuzzy = self.fuzzy_matches(term)
+        return exact, (start, stop), fuzzy
+
+    def candidate_count(self, match):
+        _, (start, stop), fuzzy = match
+        return (self.posting_offsets[stop] - self.posting_offsets[start]
+                + sum(len(self.postings[word_id]) for word_id in fuzzy))
+
+    def matched_words(self, match):
+        _, (start, stop), fuzzy = match
+        return [*range(start, stop), *fuzzy]
+
+    def candidates(self, term, match):
+        """Entry ids with a word matching term, in display order"""
+        if len(term) <= CACHED_PREFIX_LENGTH and term in self.prefix_postings:
+            return self.prefix_postings[term]
+        word_ids = self.matched_words(match)
+        if len(word_ids) == 1:
+            return self.postings[word_ids[0]]
+        # Merged lazily: the scan usually stops long before the end
+        return unique(heapq.merge(*(self.postings[word_id] for word_id in word_ids)))
+
+    def candidate_set(self, term, match):
+        if len(term) <= CACHED_PREFIX_LENGTH and term in self.prefix_postings:
+            return set(self.prefix_postings[term])
+        return set().union(*(self.postings[word_id] for word_id in self.matched_words(match)))
+
+    def matching_after(self, terms, after):
+        """Entries after the given one matching every term, in display order"""
+        entry_ids = self.candidate_set(*terms[0])
+        for term, match in terms[1:]:
+            entry_ids &= self.candidate_set(term, match)
+        yield from sorted(entry_id for entry_id in entry_ids if entry_id > after)
+
+    def match_quality(self, match, entry_id):
+        exact, (start, stop), fuzzy = match
+        best = 0
+        for word_id in self.entry_words[entry_id]:
+            if word_id == exact:
+                return EXACT
+            if start <= word_id < stop:
+                best = PREFIX
+            elif best < FUZZY and word_id in fuzzy:
+                best = FUZZY
+        return best
+
+    def score(self, matches, entry_id):
+        """Sum of the match qualities of every query word, or 0 if one does not match"""
+        total = 0
+        for match in matches:
+            quality = self.match_quality(match, entry_id)
+            if not quality:
+                return 0
+            total += quality
+        return total
+
+    def search(self, query, limit=8):
+        """Entries with a word matching every word of query (whole, as a prefix or with typos), best first"""
+        words = list(dict.fromkeys(tokenize(query)))
+        if not words or not self.entries:
+            return []
+        terms = [(word, self.resolve(word)) for word in words]
+        if any(not self.candidate_count(match) for _, match in terms):
+            return []
+        matches = [match for _, match in terms]
+        # The best score any entry could get; once limit entries reach it,
+        # entries later in display order cannot rank above them
+        best_possible = sum(
+            EXACT if exact is not None else PREFIX if start < stop else FUZZY
+            for exact, (start, stop), _ in matches
+        )
+
+        # Check the entries of the most selective word one by one; most
+        # queries are answered from the first few. If not, intersecting the
+        # candidate sets is cheaper than checking the rest word by word.
+        terms.sort(key=lambda term: self.candidate_count(term[1]))
+        head = list(islice(self.candidates(*terms[0]), QUICK_SCAN))
+        tail = self.matching_after(terms, head[-1]) if len(head) == QUICK_SCAN else ()
+        found = []
+        best_found = 0
+        for entry_id in islice(chain(head, tail), MAX_CANDIDATES):
+            score = self.score(matches, entry_id)
+            if score:
+                found.append((-score, entry_id))
+                best_found += score == best_possible
+                if best_found == limit:
+                    break
+        return [self.entries[entry_id] for _, entry_id in heapq.nsmallest(limit, found)]
+
+
+def unique(sorted_ids):
+    previous = None
+    for entry_id in sorted_ids:
+        if entry_id != previous:
+            previous = entry_id
+            yield entry_id
+
+
+def load_entries():
+    entries = [
+        {'type': 'tag', 'label': name, 'tag': name}
+        for name in Tag.objects.values_list('name', flat=True)
+    ]
+    entries.extend(
+        {'type': 'content', 'label': title, 'id': content_id, 'section': section}
+        for content_id, title, section in Content.objects.filter(is_active=True)
+        .values_list('id', 'title', 'section__name').iterator(chunk_size=5000)
+    )
+    return entries
+
+
+def data_signature():
+    """Changes whenever an active title or a tag is added, removed or edited"""
+    contents = Content.objects.filter(is_active=True).aggregate(count=Count('id'), updated=Max('updated_at'))
+    tags = Tag.objects.aggregate(count=Count('id'), updated=Max('updated_at'))
+    return contents['count'], contents['updated'], tags['count'], tags['updated']
+
+
+def build_index():
+    signature = data_signature()
+    return AutocompleteIndex(load_entries()), signature
+
+
+def get_autocomplete_index():
+    """The process-wide index, rebuilt when the content or tags changed.
+
+    Changes are looked for at most every AUTOCOMPLETE_REFRESH_SECONDS.
+    While one thread rebuilds, the others keep answering from the old index.
+    """
+    global _index
+    current = _index
+    now = time.monotonic()
+    if current is not None and now - current['checked_at'] < settings.AUTOCOMPLETE_REFRESH_SECONDS:
+        return current['index']
+    if not _index_lock.acquire(blocking=current is None):
+        return current['index']
+    try:
+        if _index is not current:
+            return _index['index']
+        signature = data_signature()
+        if current is not None and signature == current['signature']:
+            current['checked_at'] = now
+            return current['index']
+        start = time.perf_counter()
+        index = AutocompleteIndex(load_entries())
+        logger.info('Built autocomplete index of %s entries in %.0f ms',
+                    len(index), (time.perf_counter() - start) * 1000)
+        _index = {'index': index, 'signature': signature, 'checked_at': now}
+        return index
+    finally:
+        _index_lock.release()
+
+
+def warm_autocomplete():
+    try:
+        get_autocomplete_index()
+    except DatabaseError:
+        # No tables yet (e.g. before the first migrate); built on first use instead
+        logger.warning('Could not build the autocomplete index during warmup', exc_info=True)
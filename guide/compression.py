@@ -0,0 +1,81 @@
+"""On-the-fly gzip/Brotli compression for dynamic responses.
+
+Static files are compressed ahead of time by collectstatic and served by
+WhiteNoise; this module covers the HTML and JSON rendered per request.
+"""
+import re
+
+from django.utils.text import compress_sequence, compress_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Heal-the-BREACH padding added to gzip output, as Django's GZipMiddleware does
+GZIP_MAX_RANDOM_BYTES = 100
+
+COMPRESSIBLE_CONTENT_TYPE = re.compile(
+    r'^\s*(text/|application/(json|javascript|xml|xhtml\+xml)|image/svg\+xml)', re.IGNORECASE
+)
+QUALITY_PARAM = re.compile(r'q\s*=\s*([0-9.]+)')
+
+
+def supported_encodings():
+    """Encodings this process can produce, most preferred first"""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def negotiate_encoding(accept_encoding):
+    """Pick the best supported encoding from an Accept-Encoding header, or None"""
+    qualities = {}
+    for part in accept_encoding.split(','):
+        coding, _, params = part.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        match = QUALITY_PARAM.search(params)
+        try:
+            qualities[coding] = float(match.group(1)) if match else 1.0
+        except ValueError:
+            qualities[coding] = 0.0
+
+    best = None
+    for encoding in supported_encodings():
+        quality = qualities.get(encoding, qualities.get('*', 0.0))
+        if quality > 0 and (best is None or quality > best[1]):
+            best = (encoding, quality)
+    return best[0] if best else None
+
+
+def compress(data, encoding, brotli_quality=5):
+    if encoding == 'br':
+        return brotli.compress(data, quality=brotli_quality)
+    return compress_string(data, max_random_bytes=GZIP_MAX_RANDOM_BYTES)
+
+
+def compress_chunks(chunks, encoding, brotli_quality=5):
+    """Compress an iterable of byte chunks, flushing after each so bytes keep flowing"""
+    if encoding != 'br':
+        yield from compress_sequence(chunks, max_random_bytes=GZIP_MAX_RANDOM_BYTES)
+        return
+    compressor = brotli.Compressor(quality=brotli_quality)
+    for chunk in chunks:
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def acompress_chunks(chunks, encoding, brotli_quality=5):
+    """compress_chunks for async streaming responses"""
+    if encoding != 'br':
+        async for chunk in chunks:
+            yield compress_string(chunk, max_random_bytes=GZIP_MAX_RANDOM_BYTES)
+        return
+    compressor = brotli.Compressor(quality=brotli_quality)
+    async for chunk in chunks:
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
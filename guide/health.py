@@ -0,0 +1,135 @@
+"""Readiness checks for the load balancer.
+
+Each check returns (ok, detail). Checks that touch the database run on a
+worker thread so a locked SQLite file cannot hang the request past
+HEALTH_CHECK_TIMEOUT. Results are cached in-process for a few seconds and
+computed by one thread at a time, so a burst of probes costs one round of
+checks.
+"""
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.db import connection, connections
+from django.db.migrations.executor import MigrationExecutor
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='health-check')
+_result_lock = threading.Lock()
+_cached_result = None
+_cached_at = 0.0
+
+
+def _with_own_connection(check):
+    """Run a DB check on the executor thread and close its connection afterwards"""
+    def run():
+        try:
+            return check()
+        finally:
+            connections.close_all()
+    return run
+
+
+def check_database():
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+    return True, connection.vendor
+
+
+def check_migrations():
+    executor = MigrationExecutor(connection)
+    plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+    if plan:
+        pending = ', '.join(f'{migration.app_label}.{migration.name}' for migration, _ in plan)
+        return False, f'unapplied migrations: {pending}'
+    return True, 'up to date'
+
+
+def check_cache(alias=DEFAULT_CACHE_ALIAS):
+    cache = caches[alias]
+    key = f'health-check:{uuid.uuid4().hex}'
+    cache.set(key, 'ok', 10)
+    value = cache.get(key)
+    cache.delete(key)
+    if value != 'ok':
+        return False, 'cache did not return the value just written'
+    return True, 'reachable'
+
+
+def check_session_cache():
+    # Only consulted by the cached_db session backend
+    if not settings.SESSION_ENGINE.endswith('cached_db'):
+        return True, 'not used'
+    return check_cache(settings.SESSION_CACHE_ALIAS)
+
+
+def storage_path():
+    """Directory holding the SQLite file (whiteboard images live in the DB)"""
+    database = settings.DATABASES['default']
+    if database['ENGINE'].endswith('sqlite3'):
+        return Path(database['NAME']).resolve().parent
+    return Path(settings.BASE_DIR)
+
+
+def check_disk_space():
+    usage = shutil.disk_usage(storage_path())
+    free_mb = usage.free / 1024 / 1024
+    detail = f'{free_mb:.0f} MB free'
+    return free_mb >= settings.HEALTH_MIN_FREE_DISK_MB, detail
+
+
+READINESS_CHECKS = [
+    ('database', check_database, True),
+    ('migrations', check_migrations, True),
+    ('cache', check_cache, False),
+    ('session_cache', check_session_cache, False),
+    ('disk', check_disk_space, False),
+]
+
+
+def _run_check(check, uses_database):
+    start = time.perf_counter()
+    try:
+        if uses_database:
+            future = _executor.submit(_with_own_connection(check))
+            ok, detail = future.result(timeout=settings.HEALTH_CHECK_TIMEOUT)
+        else:
+            ok, detail = check()
+    except FutureTimeoutError:
+        ok, detail = False, f'timed out after {settings.HEALTH_CHECK_TIMEOUT}s'
+    except Exception as e:
+        ok, detail = False, str(e)
+    return {
+        'ok': ok,
+        'detail': detail,
+        'latency_ms': round((time.perf_counter() - start) * 1000, 2),
+    }
+
+
+def run_readiness_checks():
+    """Run (or reuse recently cached) readiness checks"""
+    global _cached_result, _cached_at
+    with _result_lock:
+        age = time.monotonic() - _cached_at
+        if _cached_result is not None and age < settings.HEALTH_CHECK_CACHE_SECONDS:
+            return dict(_cached_result, cached=True, age_seconds=round(age, 2))
+
+        checks = {name: _run_check(check, uses_database) for name, check, uses_database in READINESS_CHECKS}
+        _cached_result = {
+            'status': 'ok' if all(result['ok'] for result in checks.values()) else 'unavailable',
+            'checks': checks,
+        }
+        _cached_at = time.monotonic()
+        return dict(_cached_result, cached=False, age_seconds=0)
+
+
+def clear_cached_result():
+    global _cached_result, _cached_at
+    with _result_lock:
+        _cached_result = None
+        _cached_at = 0.0
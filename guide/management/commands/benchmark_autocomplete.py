@@ -0,0 +1,48 @@
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from guide.autocomplete import build_index
+from guide.management.commands.benchmark_views import percentile
+
+SAMPLE_QUERIES = [
+    'summarise writen text', 'repeat sentence', 'describe image', 'write from dictation', 'read aloud',
+    'fill in the blanks', 'reorder paragraphs', 'retell lecture', 'essay', 'highlight incorect words',
+    'multiple choice', 'answer short question', 'listening', 'templates', 'vocabulary',
+]
+
+
+class Command(BaseCommand):
+    help = 'Measure building the autocomplete index and answering every keystroke of sample queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20, help='Passes over the sample queries')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        index, _ = build_index()
+        build_time = time.perf_counter() - start
+        # Built again for the memory figure: tracing slows the build down
+        del index
+        tracemalloc.start()
+        index, _ = build_index()
+        index_memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        # What the navbar sends while a query is typed, one letter at a time
+        keystrokes = [query[:length] for query in SAMPLE_QUERIES for length in range(2, len(query) + 1)]
+        timings = []
+        for _ in range(options['iterations']):
+            for query in keystrokes:
+                start = time.perf_counter()
+                index.search(query)
+                timings.append((time.perf_counter() - start) * 1000)
+
+        self.stdout.write(f"Entries (titles + tags): {len(index)}")
+        self.stdout.write(f"Distinct words:          {len(index.words)}")
+        self.stdout.write(f"Build time:              {build_time * 1000:.0f} ms")
+        self.stdout.write(f"Index memory:            {index_memory / 1024 / 1024:.1f} MB")
+        self.stdout.write(f"Lookups/second:          {len(timings) / (sum(timings) / 1000):.0f}")
+        self.stdout.write(f"p50 latency:             {percentile(timings, 50):.3f} ms")
+        self.stdout.write(f"p95 latency:             {percentile(timings, 95):.3f} ms")
+        self.stdout.write(f"Max latency:             {max(timings):.3f} ms")
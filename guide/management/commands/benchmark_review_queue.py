@@ -0,0 +1,58 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from guide.management.commands.benchmark_views import percentile
+from guide.models import SimpleUser, UserProgress
+
+
+class Command(BaseCommand):
+    help = ('Measure the "due for review today" query for a sample of users over the existing progress rows '
+            '(e.g. generate_synthetic_data --contents 0 --users 20000 --progress-per-user 50 for a million)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200, help='Users sampled')
+        parser.add_argument('--iterations', type=int, default=5, help='Queries per sampled user')
+        parser.add_argument('--limit', type=int, default=10, help='Items per review batch')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed for the user sample')
+
+    def handle(self, *args, **options):
+        user_ids = list(SimpleUser.objects.values_list('id', flat=True))
+        if not user_ids:
+            raise CommandError('No users found. Run generate_synthetic_data first.')
+        users = [
+            SimpleUser(id=user_id)
+            for user_id in random.Random(options['seed']).sample(user_ids, min(options['users'], len(user_ids)))
+        ]
+
+        plan = UserProgress.due_for_review(users[0], limit=options['limit']).explain()
+        query_timings = []
+        call_timings = []
+        batch_sizes = []
+        with connection.cursor() as cursor:
+            for _ in range(options['iterations']):
+                for user in users:
+                    queryset = UserProgress.due_for_review(user, limit=options['limit'])
+                    # The SQL alone, then the same query through the ORM as the endpoint runs it
+                    sql, params = queryset.query.sql_with_params()
+                    start = time.perf_counter()
+                    cursor.execute(sql, params)
+                    batch_sizes.append(len(cursor.fetchall()))
+                    query_timings.append((time.perf_counter() - start) * 1000)
+                    start = time.perf_counter()
+                    list(queryset)
+                    call_timings.append((time.perf_counter() - start) * 1000)
+
+        self.stdout.write(f"Progress rows:        {UserProgress.objects.count()}")
+        self.stdout.write(f"Scheduled for review: {UserProgress.objects.filter(next_review_at__isnull=False).count()}")
+        self.stdout.write(f"Users sampled:        {len(users)} x {options['iterations']}")
+        self.stdout.write(f"Average batch:        {sum(batch_sizes) / len(batch_sizes):.1f} of {options['limit']}")
+        self.stdout.write(f"Query plan:\n  {plan.replace(chr(10), chr(10) + '  ')}")
+        self.stdout.write(f"{'':22}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+        for name, timings in [('SQL query', query_timings), ('due_for_review()', call_timings)]:
+            self.stdout.write(
+                f"{name:22}{percentile(timings, 50):>10.3f}{percentile(timings, 95):>10.3f}{max(timings):>10.3f}"
+            )
+        if 'progress_review_due_idx' not in plan:
+            self.stdout.write(self.style.WARNING('The due queue is not using progress_review_due_idx'))
@@ -0,0 +1,190 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+import urllib.request
+from http.cookiejar import CookieJar
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from django.utils import timezone
+from guide.management.commands.benchmark_views import current_commit, percentile
+from guide.models import Content, SimpleUser, UserProgress
+
+PROFILES = {
+    'wsgi': ['pte_guide.wsgi:application'],
+    'asgi': ['pte_guide.asgi:application', '-k', 'uvicorn.workers.UvicornWorker'],
+}
+
+
+def collect_static_files():
+    """The servers run with DEBUG=False, which needs the hashed static manifest"""
+    call_command('collectstatic', interactive=False, verbosity=0)
+
+
+class Command(BaseCommand):
+    help = 'Compare requests/second of the WSGI and ASGI deployment profiles under concurrent load'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', nargs='+', choices=PROFILES, default=list(PROFILES),
+                            help='Server profiles to benchmark')
+        parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes')
+        parser.add_argument('--concurrency', type=int, default=32, help='Concurrent client threads')
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds of load per profile')
+        parser.add_argument('--port', type=int, default=8765, help='Local port to bind the server to')
+        parser.add_argument('--user', default='synthetic-user-00000', help='SimpleUser name to log in as')
+        parser.add_argument('--pin', default='1234', help='PIN for --user')
+        parser.add_argument('--output', default='server_benchmark.json', help='Where to write the results')
+
+    def handle(self, *args, **options):
+        user = SimpleUser.objects.filter(name=options['user']).first()
+        if user is None:
+            raise CommandError(f"User {options['user']} not found. Run generate_synthetic_data first.")
+        content = Content.objects.filter(is_active=True).order_by('id').first()
+        if content is None:
+            raise CommandError('No content found. Run generate_synthetic_data first.')
+
+        # Remember the toggled row so the benchmark leaves the data as it found it
+        original_progress = UserProgress.objects.filter(user=user, content=content).first()
+        original_state = (original_progress.is_favorited, original_progress.favorited_at) if original_progress else None
+
+        collect_static_files()
+        results = {}
+        try:
+            for profile in options['profiles']:
+                self.stdout.write(f"Benchmarking {profile} for {options['duration']}s "
+                                  f"({options['workers']} workers, {options['concurrency']} clients)...")
+                results[profile] = self.run_profile(profile, user, content, options)
+        finally:
+            if original_state is None:
+                UserProgress.objects.filter(user=user, content=content).delete()
+            else:
+                UserProgress.objects.filter(user=user, content=content).update(
+                    is_favorited=original_state[0], favorited_at=original_state[1]
+                )
+            Content.reconcile_counters(Content.objects.filter(id=content.id))
+
+        report = {
+            'generated_at': timezone.now().isoformat(),
+            'commit': current_commit(),
+            'endpoint': reverse('toggle_progress'),
+            'workers': options['workers'],
+            'concurrency': options['concurrency'],
+            'duration_seconds': options['duration'],
+            'profiles': results,
+        }
+        Path(options['output']).write_text(json.dumps(report, indent=2) + '\n')
+        self.print_table(results)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def run_profile(self, profile, user, content, options):
+        base_url = f"http://127.0.0.1:{options['port']}"
+        command = [
+            sys.executable, '-m', 'gunicorn', *PROFILES[profile],
+            '--bind', f"127.0.0.1:{options['port']}",
+            '--workers', str(options['workers']),
+            '--log-level', 'warning',
+        ]
+        server = subprocess.Popen(command, cwd=settings.BASE_DIR, env=dict(os.environ, DEBUG='False'))
+        try:
+            self.wait_until_live(base_url, server)
+            cookie_header = self.login(base_url, user, options['pin'])
+            return self.drive_load(base_url, cookie_header, content, options)
+        finally:
+            server.terminate()
+            try:
+                server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+
+    def wait_until_live(self, base_url, server, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f'Server exited with code {server.returncode} during startup')
+            try:
+                with urllib.request.urlopen(base_url + reverse('liveness_check'), timeout=1):
+                    return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError(f'Server did not become live within {timeout}s')
+
+    def login(self, base_url, user, pin):
+        """Log in through the real login form and return the session Cookie header"""
+        jar = CookieJar()
+        opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(jar))
+        login_url = base_url + reverse('user_login')
+        opener.open(login_url).read()
+        csrf_token = next((cookie.value for cookie in jar if cookie.name == 'csrftoken'), '')
+        body = urllib.parse.urlencode({
+            'name': user.name, 'pin': pin, 'action': 'login', 'csrfmiddlewaretoken': csrf_token,
+        }).encode()
+        opener.open(urllib.request.Request(login_url, data=body, headers={'Referer': login_url})).read()
+        if not any(cookie.name == settings.SESSION_COOKIE_NAME for cookie in jar):
+            raise CommandError(f"Could not log in as {user.name} with the given PIN")
+        return '; '.join(f'{cookie.name}={cookie.value}' for cookie in jar)
+
+    def drive_load(self, base_url, cookie_header, content, options):
+        url = base_url + reverse('toggle_progress')
+        body = json.dumps({'content_id': content.id, 'action': 'favorite'}).encode()
+        headers = {'Content-Type': 'application/json', 'Cookie': cookie_header}
+        deadline = time.monotonic() + options['duration']
+        timings = []
+        errors = []
+        lock = threading.Lock()
+
+        def client():
+            local_timings = []
+            local_errors = 0
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                try:
+                    with urllib.request.urlopen(urllib.request.Request(url, data=body, headers=headers),
+                                                timeout=30) as response:
+                        ok = json.loads(response.read()).get('success')
+                except (OSError, ValueError):
+                    ok = False
+                if ok:
+                    local_timings.append((time.perf_counter() - start) * 1000)
+                else:
+                    local_errors += 1
+            with lock:
+                timings.extend(local_timings)
+                errors.append(local_errors)
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=client) for _ in range(options['concurrency'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        if not timings:
+            raise CommandError(f'No successful requests against {url}')
+        return {
+            'requests': len(timings),
+            'errors': sum(errors),
+            'requests_per_second': round(len(timings) / elapsed, 1),
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p95_ms': round(percentile(timings, 95), 3),
+            'p99_ms': round(percentile(timings, 99), 3),
+            'mean_ms': round(statistics.mean(timings), 3),
+        }
+
+    def print_table(self, results):
+        header = f"{'profile':<8} {'req/s':>10} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'errors':>8}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for profile, result in results.items():
+            self.stdout.write(
+                f"{profile:<8} {result['requests_per_second']:>10.1f} {result['p50_ms']:>10.2f} "
+                f"{result['p95_ms']:>10.2f} {result['p99_ms']:>10.2f} {result['errors']:>8}"
+            )
@@ -0,0 +1,61 @@
+import resource
+import time
+
+from django.core.management.base import BaseCommand
+from guide.suggester import get_suggester
+
+SAMPLE_MISSPELLINGS = [
+    'recieve', 'definately', 'seperate', 'goverment', 'enviroment', 'becuase',
+    'occured', 'accomodate', 'rythm', 'wich', 'untill', 'beleive', 'tommorow',
+    'neccessary', 'acheive', 'arguement', 'begining', 'calender', 'existance',
+    'grammer', 'independant', 'knowlege', 'occassion', 'publically', 'wierd',
+]
+
+
+def read_memory_status():
+    """Resident memory split into shared file pages and private anonymous pages (Linux only)"""
+    status = {}
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key in ('VmRSS', 'RssAnon', 'RssFile'):
+                    status[key] = int(value.split()[0])
+    except OSError:
+        pass
+    return status
+
+
+class Command(BaseCommand):
+    help = 'Measure spelling suggestions per second and worker memory footprint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20, help='Passes over the sample words')
+
+    def handle(self, *args, **options):
+        memory_before = read_memory_status()
+
+        start = time.perf_counter()
+        suggester = get_suggester()
+        load_time = time.perf_counter() - start
+
+        lookups = 0
+        start = time.perf_counter()
+        for _ in range(options['iterations']):
+            for word in SAMPLE_MISSPELLINGS:
+                suggester.suggest(word)
+                lookups += 1
+        elapsed = time.perf_counter() - start
+
+        memory_after = read_memory_status()
+
+        self.stdout.write(f"Words in dictionary:   {len(suggester.words)}")
+        self.stdout.write(f"Index size (mmapped):  {suggester.index_size / 1024 / 1024:.1f} MB")
+        self.stdout.write(f"Load time:             {load_time * 1000:.1f} ms")
+        self.stdout.write(f"Suggestions/second:    {lookups / elapsed:.0f}")
+        self.stdout.write(f"Mean latency:          {elapsed / lookups * 1000:.3f} ms")
+        if memory_after:
+            for key in ('VmRSS', 'RssAnon', 'RssFile'):
+                delta = memory_after.get(key, 0) - memory_before.get(key, 0)
+                self.stdout.write(f"{key + ':':<22} {memory_after.get(key, 0) / 1024:.1f} MB (+{delta / 1024:.1f} MB)")
+        self.stdout.write(f"Peak RSS:              {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MB")
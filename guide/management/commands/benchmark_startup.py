@@ -0,0 +1,184 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from django.utils import timezone
+from guide.management.commands.benchmark_servers import collect_static_files
+from guide.management.commands.benchmark_views import current_commit
+
+VARIANTS = {
+    'preload': {'GUNICORN_PRELOAD': 'true'},
+    'no-preload': {'GUNICORN_PRELOAD': 'false'},
+}
+MEMORY_FIELDS = ('Rss', 'Pss', 'Private_Clean', 'Private_Dirty')
+
+
+def child_pids(parent_pid):
+    """PIDs whose parent is parent_pid, read from /proc (Linux only)"""
+    children = []
+    for entry in Path('/proc').iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / 'stat').read_text()
+        except OSError:
+            continue
+        # The command name may contain spaces, so split after its closing paren
+        fields = stat.rsplit(')', 1)[1].split()
+        if int(fields[1]) == parent_pid:
+            children.append(int(entry.name))
+    return sorted(children)
+
+
+def memory_usage(pid):
+    """Rss/Pss/Private kB of a process from /proc/<pid>/smaps_rollup, or None"""
+    try:
+        lines = Path(f'/proc/{pid}/smaps_rollup').read_text().splitlines()
+    except OSError:
+        return None
+    values = {}
+    for line in lines:
+        name, _, rest = line.partition(':')
+        if name in MEMORY_FIELDS:
+            values[name] = int(rest.split()[0])
+    return {
+        'rss_kb': values.get('Rss', 0),
+        'pss_kb': values.get('Pss', 0),
+        'private_kb': values.get('Private_Clean', 0) + values.get('Private_Dirty', 0),
+    }
+
+
+class Command(BaseCommand):
+    help = 'Measure gunicorn startup-to-first-request time and per-worker memory with and without preload_app'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--variants', nargs='+', choices=VARIANTS, default=list(VARIANTS),
+                            help='gunicorn.conf.py variants to compare')
+        parser.add_argument('--workers', type=int, default=4, help='gunicorn worker processes')
+        parser.add_argument('--repeat', type=int, default=3, help='Server starts per variant')
+        parser.add_argument('--port', type=int, default=8766, help='Local port to bind the server to')
+        parser.add_argument('--output', default='startup_benchmark.json', help='Where to write the results')
+
+    def handle(self, *args, **options):
+        if not Path('/proc/self/smaps_rollup').exists():
+            self.stdout.write(self.style.WARNING('/proc/<pid>/smaps_rollup is unavailable; memory will not be reported'))
+
+        collect_static_files()
+        results = {}
+        for variant in options['variants']:
+            self.stdout.write(f"Starting {variant} {options['repeat']} times with {options['workers']} workers...")
+            runs = [self.run_once(variant, options) for _ in range(options['repeat'])]
+            results[variant] = self.summarize(runs)
+
+        report = {
+            'generated_at': timezone.now().isoformat(),
+            'commit': current_commit(),
+            'workers': options['workers'],
+            'repeat': options['repeat'],
+            'variants': results,
+        }
+        Path(options['output']).write_text(json.dumps(report, indent=2) + '\n')
+        self.print_table(results)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def run_once(self, variant, options):
+        base_url = f"http://127.0.0.1:{options['port']}"
+        command = [
+            sys.executable, '-m', 'gunicorn', 'pte_guide.wsgi:application',
+            '--config', str(Path(settings.BASE_DIR) / 'gunicorn.conf.py'),
+            '--bind', f"127.0.0.1:{options['port']}",
+            '--workers', str(options['workers']),
+            '--log-level', 'warning',
+        ]
+        env = dict(os.environ, DEBUG='False', **VARIANTS[variant])
+        start = time.perf_counter()
+        server = subprocess.Popen(command, cwd=settings.BASE_DIR, env=env)
+        try:
+            first_response = self.wait_for(base_url + reverse('liveness_check'), server) - start
+            first_page = self.wait_for(base_url + reverse('home'), server) - start
+            self.warm_workers(base_url + reverse('home'), options['workers'])
+            workers = self.settled_memory(server)
+            master = memory_usage(server.pid)
+        finally:
+            server.terminate()
+            try:
+                server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+        return {
+            'first_response_ms': first_response * 1000,
+            'first_page_ms': first_page * 1000,
+            'master': master,
+            'workers': workers,
+        }
+
+    def wait_for(self, url, server, timeout=60):
+        """Poll url until it answers, returning the perf_counter time of the first response"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f'Server exited with code {server.returncode} during startup')
+            try:
+                with urllib.request.urlopen(url, timeout=5) as response:
+                    response.read()
+                    return time.perf_counter()
+            except OSError:
+                time.sleep(0.01)
+        raise CommandError(f'{url} did not answer within {timeout}s')
+
+    def warm_workers(self, url, count):
+        """Send concurrent requests so the load spreads over every worker"""
+        def fetch(_):
+            with urllib.request.urlopen(url, timeout=30) as response:
+                response.read()
+        with ThreadPoolExecutor(max_workers=count) as executor:
+            list(executor.map(fetch, range(count * 4)))
+
+    def settled_memory(self, server, timeout=10):
+        """Sample worker memory until two consecutive readings agree within 1%"""
+        previous = None
+        deadline = time.monotonic() + timeout
+        while True:
+            usage = [memory_usage(pid) for pid in child_pids(server.pid)]
+            usage = [item for item in usage if item]
+            total = sum(item['rss_kb'] for item in usage)
+            if previous is not None and (abs(total - previous) <= total * 0.01 or time.monotonic() > deadline):
+                return usage
+            previous = total
+            time.sleep(0.25)
+
+    def summarize(self, runs):
+        workers = [usage for run in runs for usage in run['workers']]
+        masters = [run['master'] for run in runs if run['master']]
+        summary = {
+            'first_response_ms': round(statistics.median(run['first_response_ms'] for run in runs), 1),
+            'first_page_ms': round(statistics.median(run['first_page_ms'] for run in runs), 1),
+        }
+        if workers:
+            for key in ('rss_kb', 'pss_kb', 'private_kb'):
+                summary[f'worker_{key}'] = round(statistics.mean(usage[key] for usage in workers))
+        if masters:
+            summary['master_rss_kb'] = round(statistics.mean(usage['rss_kb'] for usage in masters))
+        return summary
+
+    def print_table(self, results):
+        header = (f"{'variant':<12} {'first resp ms':>14} {'first page ms':>14} "
+                  f"{'worker RSS MB':>14} {'worker PSS MB':>14} {'private MB':>11}")
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for variant, result in results.items():
+            memory = [result.get(f'worker_{key}') for key in ('rss_kb', 'pss_kb', 'private_kb')]
+            memory = [f'{value / 1024:.1f}' if value is not None else '-' for value in memory]
+            self.stdout.write(
+                f"{variant:<12} {result['first_response_ms']:>14.1f} {result['first_page_ms']:>14.1f} "
+                f"{memory[0]:>14} {memory[1]:>14} {memory[2]:>11}"
+            )
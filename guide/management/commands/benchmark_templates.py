@@ -0,0 +1,113 @@
+import json
+import statistics
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.sessions.backends.base import SessionBase
+from django.core.management.base import BaseCommand, CommandError
+from django.template.backends.django import DjangoTemplates
+from django.test import RequestFactory
+from django.urls import reverse
+from django.utils import timezone
+from guide.management.commands.benchmark_views import current_commit, percentile
+from guide.models import Section, Tag
+
+TEMPLATE_NAME = 'guide/section_detail.html'
+
+
+def template_backend(cached):
+    """A DjangoTemplates backend configured like settings.TEMPLATES, with or without the cached loader"""
+    options = dict(settings.TEMPLATES[0]['OPTIONS'])
+    options['loaders'] = (
+        [('django.template.loaders.cached.Loader', settings.TEMPLATE_LOADERS)] if cached
+        else settings.TEMPLATE_LOADERS
+    )
+    return DjangoTemplates({'NAME': 'benchmark', 'DIRS': [], 'APP_DIRS': False, 'OPTIONS': options})
+
+
+class Command(BaseCommand):
+    help = f'Benchmark rendering {TEMPLATE_NAME} with and without the cached template loader'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=500, help='Content items to render')
+        parser.add_argument('--iterations', type=int, default=20, help='Timed renders per profile')
+        parser.add_argument('--output', default='template_benchmark.json', help='Where to write the results')
+
+    def handle(self, *args, **options):
+        section = Section.objects.filter(contents__is_active=True).order_by('name').first()
+        if section is None:
+            raise CommandError('No content found. Run generate_synthetic_data first.')
+        contents = list(
+            section.contents.filter(is_active=True).prefetch_related('content_tags__tag')
+            .order_by('order', 'created_at')[:options['items']]
+        )
+        if len(contents) < options['items']:
+            self.stdout.write(self.style.WARNING(
+                f"Only {len(contents)} items in {section.name}; run generate_synthetic_data for more"))
+
+        request = RequestFactory().get(reverse('section_detail', args=[section.name]))
+        request.session = SessionBase()
+        context = {
+            'section': section,
+            'contents': contents,
+            'is_edit_mode': False,
+            'available_tags': list(Tag.objects.filter(tagged_content__content__section=section).distinct()),
+            'user_progress': {},
+            'current_user': None,
+            'filters': {},
+        }
+
+        profiles = {
+            'uncached': template_backend(cached=False),
+            'cached': template_backend(cached=True),
+        }
+        # A warmed worker has already compiled the template once
+        profiles['cached'].get_template(TEMPLATE_NAME)
+
+        results = {}
+        for name, backend in profiles.items():
+            results[name] = self.measure(backend, context, request, options['iterations'])
+        results['compile_only'] = self.measure_compile(profiles['uncached'], options['iterations'])
+
+        report = {
+            'generated_at': timezone.now().isoformat(),
+            'commit': current_commit(),
+            'template': TEMPLATE_NAME,
+            'items': len(contents),
+            'iterations': options['iterations'],
+            'profiles': results,
+        }
+        Path(options['output']).write_text(json.dumps(report, indent=2) + '\n')
+
+        self.stdout.write(f"{TEMPLATE_NAME} with {len(contents)} items")
+        header = f"{'profile':<14} {'p50 ms':>10} {'p95 ms':>10} {'mean ms':>10}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for name, result in results.items():
+            self.stdout.write(f"{name:<14} {result['p50_ms']:>10.2f} {result['p95_ms']:>10.2f} {result['mean_ms']:>10.2f}")
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def measure(self, backend, context, request, iterations):
+        """Time get_template + render, as a view does on every request"""
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            backend.get_template(TEMPLATE_NAME).render(context, request)
+            timings.append((time.perf_counter() - start) * 1000)
+        return self.summarize(timings)
+
+    def measure_compile(self, backend, iterations):
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            backend.get_template(TEMPLATE_NAME)
+            timings.append((time.perf_counter() - start) * 1000)
+        return self.summarize(timings)
+
+    def summarize(self, timings):
+        return {
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p95_ms': round(percentile(timings, 95), 3),
+            'mean_ms': round(statistics.mean(timings), 3),
+        }
@@ -0,0 +1,173 @@
+import json
+import statistics
+import subprocess
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from guide.models import Content, Section, SimpleUser, UserProgress
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+def is_write(sql):
+    return sql.lstrip().upper().startswith(WRITE_STATEMENTS)
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the hot views through the test client and write a JSON baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20, help='Timed requests per view')
+        parser.add_argument('--warmup', type=int, default=2, help='Untimed requests per view')
+        parser.add_argument('--user', default='synthetic-user-00000', help='SimpleUser name to log in as')
+        parser.add_argument('--pin', default='1234', help='PIN for --user')
+        parser.add_argument('--output', default='benchmark_results.json', help='Where to write the results')
+        parser.add_argument('--compare', help='Previous results file to diff against')
+
+    def handle(self, *args, **options):
+        user = SimpleUser.objects.filter(name=options['user']).first()
+        if user is None:
+            raise CommandError(f"User {options['user']} not found. Run generate_synthetic_data first.")
+
+        section = (
+            Section.objects.filter(contents__isnull=False).order_by('name').first()
+            or Section.objects.first()
+        )
+        content = Content.objects.filter(is_active=True).order_by('id').first()
+        if section is None or content is None:
+            raise CommandError('No sections or content found. Run generate_synthetic_data first.')
+        search_term = content.title.split()[-2] if len(content.title.split()) > 1 else content.title
+
+        client = Client(SERVER_NAME='localhost')
+        client.post(reverse('user_login'), {'name': user.name, 'pin': options['pin'], 'action': 'login'})
+        if client.session.get('user_id') != user.id:
+            raise CommandError(f"Could not log in as {user.name} with the given PIN")
+
+        toggle_body = json.dumps({'content_id': content.id, 'action': 'favorite'})
+        scenarios = {
+            'home': lambda: client.get(reverse('home')),
+            'home_search': lambda: client.get(reverse('home'), {'search': search_term}),
+            'section_detail': lambda: client.get(reverse('section_detail', args=[section.name])),
+            'search_content': lambda: client.get(reverse('search_content'), {'q': search_term}),
+            'progress_view': lambda: client.get(reverse('progress')),
+            'favorites_view': lambda: client.get(reverse('favorites')),
+            'toggle_progress': lambda: client.post(
+                reverse('toggle_progress'), toggle_body, content_type='application/json'
+            ),
+            'whiteboard_gallery': lambda: client.get(reverse('whiteboard_gallery')),
+        }
+
+        # Remember the toggled row so the benchmark leaves the data as it found it
+        original_progress = UserProgress.objects.filter(user=user, content=content).first()
+        original_state = (original_progress.is_favorited, original_progress.favorited_at) if original_progress else None
+
+        results = {}
+        try:
+            for name, run in scenarios.items():
+                results[name] = self.measure(name, run, options['warmup'], options['iterations'])
+        finally:
+            if original_state is None:
+                UserProgress.objects.filter(user=user, content=content).delete()
+            else:
+                UserProgress.objects.filter(user=user, content=content).update(
+                    is_favorited=original_state[0], favorited_at=original_state[1]
+                )
+            Content.reconcile_counters(Content.objects.filter(id=content.id))
+
+        report = {
+            'generated_at': timezone.now().isoformat(),
+            'commit': current_commit(),
+            'database': connection.vendor,
+            'iterations': options['iterations'],
+            'dataset': {
+                'contents': Content.objects.count(),
+                'users': SimpleUser.objects.count(),
+                'progress_rows': UserProgress.objects.count(),
+            },
+            'views': results,
+        }
+        Path(options['output']).write_text(json.dumps(report, indent=2) + '\n')
+
+        baseline = None
+        if options['compare']:
+            baseline = json.loads(Path(options['compare']).read_text())
+        self.print_table(results, baseline)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def measure(self, name, run, warmup, iterations):
+        for _ in range(warmup):
+            run()
+
+        timings = []
+        query_counts = []
+        write_counts = []
+        session_counts = []
+        response_bytes = 0
+        status_code = None
+        for _ in range(iterations):
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                response = run()
+                # Streamed pages render their lists while being consumed
+                body = response.content if not response.streaming else b''.join(response.streaming_content)
+                timings.append((time.perf_counter() - start) * 1000)
+            query_counts.append(len(queries.captured_queries))
+            write_counts.append(sum(1 for query in queries.captured_queries if is_write(query['sql'])))
+            session_counts.append(sum(1 for query in queries.captured_queries if 'django_session' in query['sql']))
+            status_code = response.status_code
+            response_bytes = len(body)
+
+        return {
+            'status': status_code,
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p95_ms': round(percentile(timings, 95), 3),
+            'mean_ms': round(statistics.mean(timings), 3),
+            'queries': max(query_counts),
+            'writes': round(statistics.mean(write_counts), 2),
+            'session_queries': round(statistics.mean(session_counts), 2),
+            'bytes': response_bytes,
+        }
+
+    def print_table(self, results, baseline=None):
+        header = f"{'view':<20} {'p50 ms':>10} {'p95 ms':>10} {'queries':>8} {'writes':>7} {'session':>8} {'bytes':>10}"
+        if baseline:
+            header += f" {'Δp50':>9} {'Δp95':>9} {'Δqueries':>9}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for name, result in results.items():
+            line = (f"{name:<20} {result['p50_ms']:>10.2f} {result['p95_ms']:>10.2f} "
+                    f"{result['queries']:>8} {result['writes']:>7} {result['session_queries']:>8} {result['bytes'] if result['bytes'] is not None else '-':>10}")
+            previous = baseline['views'].get(name) if baseline else None
+            if previous:
+                line += (f" {self.percent_change(previous['p50_ms'], result['p50_ms']):>9}"
+                         f" {self.percent_change(previous['p95_ms'], result['p95_ms']):>9}"
+                         f" {result['queries'] - previous['queries']:>+9}")
+            self.stdout.write(line)
+
+    def percent_change(self, before, after):
+        if not before:
+            return '-'
+        return f'{(after - before) / before * 100:+.0f}%'
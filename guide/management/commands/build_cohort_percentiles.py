@@ -0,0 +1,16 @@
+import time
+
+from django.core.management.base import BaseCommand
+from guide.cohorts import build_completion_distributions
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-section completion distributions behind "ahead of N% of learners" (run periodically)'
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        sections, learners = build_completion_distributions()
+        self.stdout.write(self.style.SUCCESS(
+            f'Stored completion distributions of {learners} learners for {sections} sections '
+            f'in {time.perf_counter() - start:.1f}s'
+        ))
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+from guide.recommendations import build_completion_neighbors
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the "completed together" neighbour lists used for "next up" recommendations (run periodically)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=20, help='Neighbours kept per content item')
+        parser.add_argument('--min-support', type=int, default=2,
+                            help='Minimum number of users who completed both items')
+        parser.add_argument('--block-size', type=int, default=1000,
+                            help='Items per block of the co-completion product (bounds memory)')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        items, rows = build_completion_neighbors(
+            top_k=options['top_k'], min_support=options['min_support'], block_size=options['block_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Stored {rows} neighbours for {items} content items in {time.perf_counter() - start:.1f}s'
+        ))
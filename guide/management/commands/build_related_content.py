@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+from guide.related_content import build_text_neighbors
+
+
+class Command(BaseCommand):
+    help = ('Rebuild the TF-IDF "related content" lists shown on content cards. '
+            'Only items changed since the last run are recomputed unless --full is given.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-n', type=int, default=10, help='Related items kept per content item')
+        parser.add_argument('--min-score', type=float, default=0.05, help='Minimum cosine similarity')
+        parser.add_argument('--block-size', type=int, default=256,
+                            help='Items compared against the whole catalogue at once (bounds memory)')
+        parser.add_argument('--full', action='store_true', help='Recompute every item')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        mode, items, rows = build_text_neighbors(
+            top_n=options['top_n'], min_score=options['min_score'],
+            block_size=options['block_size'], full=options['full'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'{mode.capitalize()} rebuild: {rows} related links for {items} content items '
+            f'in {time.perf_counter() - start:.1f}s'
+        ))
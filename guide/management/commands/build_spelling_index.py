@@ -0,0 +1,12 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from guide.suggester import build_index, load_word_list
+
+class Command(BaseCommand):
+    help = 'Build the memory-mapped delete index used by the spelling suggester'
+
+    def handle(self, *args, **options):
+        words = load_word_list()
+        size = build_index(settings.SPELLING_INDEX_PATH, words)
+        self.stdout.write(f"Indexed {len(words)} words into {settings.SPELLING_INDEX_PATH} ({size / 1024 / 1024:.1f} MB)")
+        self.stdout.write(self.style.SUCCESS('Spelling index build complete!'))
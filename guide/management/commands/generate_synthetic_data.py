@@ -0,0 +1,225 @@
+import random
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from guide.activity import rebuild_activity
+from guide.markup import render_markdown
+from guide.models import (
+    Section, Content, DailyActivity, Tag, ContentTag, UserProgress, SimpleUser, WhiteboardImage, SpellingMistake
+)
+from guide.spelling import fold_word
+
+SYNTHETIC_PREFIX = 'synthetic'
+SYNTHETIC_PIN = '1234'
+BATCH_SIZE = 1000
+REVIEW_INTERVALS = [1, 6, 15, 38, 95]
+
+TASK_WORDS = [
+    'read aloud', 'repeat sentence', 'describe image', 'retell lecture', 'answer short question',
+    'summarize written text', 'essay', 'multiple choice', 'reorder paragraphs', 'fill in the blanks',
+    'summarize spoken text', 'highlight correct summary', 'select missing word', 'write from dictation',
+]
+FILLER_WORDS = (
+    'practice template strategy vocabulary grammar fluency pronunciation structure argument '
+    'example timing keyword paraphrase cohesion academic lecture passage response score tip '
+    'mistake review collocation sentence paragraph introduction conclusion evidence'
+).split()
+SPELLING_PAIRS = [
+    ('recieve', 'receive'), ('definately', 'definitely'), ('seperate', 'separate'),
+    ('goverment', 'government'), ('enviroment', 'environment'), ('occured', 'occurred'),
+    ('accomodate', 'accommodate'), ('rythm', 'rhythm'), ('untill', 'until'), ('wich', 'which'),
+    ('beleive', 'believe'), ('tommorow', 'tomorrow'), ('neccessary', 'necessary'),
+    ('acheive', 'achieve'), ('arguement', 'argument'), ('begining', 'beginning'),
+    ('calender', 'calendar'), ('existance', 'existence'), ('grammer', 'grammar'),
+    ('independant', 'independent'), ('knowlege', 'knowledge'), ('occassion', 'occasion'),
+    ('publically', 'publicly'), ('wierd', 'weird'), ('thier', 'their'), ('becuase', 'because'),
+]
+# 1x1 transparent PNG
+TINY_PNG = 'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mNkYAAAAAYAAjCB0C8AAAAASUVORK5CYII='
+
+
+class Command(BaseCommand):
+    help = 'Generate a large synthetic dataset for benchmarking the hot views'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sections', type=int, default=len(Section.SECTION_CHOICES),
+                            help='Number of sections to fill (at most one per section choice)')
+        parser.add_argument('--contents', type=int, default=20000, help='Content rows to create')
+        parser.add_argument('--tags', type=int, default=40, help='Tags to create')
+        parser.add_argument('--users', type=int, default=2000, help='SimpleUsers to create')
+        parser.add_argument('--progress-per-user', type=int, default=40, help='UserProgress rows per user')
+        parser.add_argument('--mistakes-per-user', type=int, default=15, help='SpellingMistake rows per user')
+        parser.add_argument('--whiteboards', type=int, default=200, help='Whiteboards to create')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed for reproducible data')
+        parser.add_argument('--clear', action='store_true', help='Delete previously generated synthetic data first')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+
+        if options['clear']:
+            self.clear()
+
+        with transaction.atomic():
+            sections = self.create_sections(options['sections'])
+            tags = self.create_tags(options['tags'])
+            content_ids = self.create_contents(rng, sections, tags, options['contents'])
+            user_ids = self.create_users(options['users'])
+            self.create_progress(rng, user_ids, content_ids, options['progress_per_user'])
+            self.create_mistakes(rng, user_ids, options['mistakes_per_user'])
+            self.create_whiteboards(rng, user_ids, options['whiteboards'])
+            # bulk_create bypasses the write paths that keep the rollup current
+            rebuild_activity(DailyActivity, UserProgress, SpellingMistake, WhiteboardImage, user_ids=user_ids)
+
+        self.stdout.write(f"Synthetic users log in with PIN {SYNTHETIC_PIN} (e.g. {SYNTHETIC_PREFIX}-user-00001)")
+        self.stdout.write(self.style.SUCCESS('Synthetic data generation complete!'))
+
+    def clear(self):
+        users = SimpleUser.objects.filter(name__startswith=f'{SYNTHETIC_PREFIX}-')
+        contents = Content.objects.filter(title__startswith=f'[{SYNTHETIC_PREFIX}]')
+        tags = Tag.objects.filter(name__startswith=f'{SYNTHETIC_PREFIX}-')
+        self.stdout.write(f"Deleting {users.count()} users, {contents.count()} contents and {tags.count()} tags")
+        # Cascades remove progress, spelling mistakes, whiteboards and content tags
+        users.delete()
+        contents.delete()
+        tags.delete()
+
+    def create_sections(self, count):
+        sections = []
+        for name, title in Section.SECTION_CHOICES[:count]:
+            section, _ = Section.objects.get_or_create(name=name, defaults={'title': title})
+            sections.append(section)
+        self.stdout.write(f"Using {len(sections)} sections")
+        return sections
+
+    def create_tags(self, count):
+        existing = set(Tag.objects.filter(name__startswith=f'{SYNTHETIC_PREFIX}-').values_list('name', flat=True))
+        Tag.objects.bulk_create([
+            Tag(name=f'{SYNTHETIC_PREFIX}-tag-{i:03d}', color=f'#{(i * 2654435761) % 0xFFFFFF:06x}')
+            for i in range(count)
+            if f'{SYNTHETIC_PREFIX}-tag-{i:03d}' not in existing
+        ])
+        tags = list(Tag.objects.filter(name__startswith=f'{SYNTHETIC_PREFIX}-'))
+        self.stdout.write(f"Using {len(tags)} tags")
+        return tags
+
+    def create_contents(self, rng, sections, tags, count):
+        start = Content.objects.filter(title__startswith=f'[{SYNTHETIC_PREFIX}]').count()
+        contents = []
+        for i in range(start, start + count):
+            task = rng.choice(TASK_WORDS)
+            content_type = rng.choice(['video', 'note', 'note', 'text'])
+            body = ''
+            if content_type != 'video':
+                body = '\n\n'.join(
+                    ' '.join(rng.choice(FILLER_WORDS + [task]) for _ in range(rng.randint(40, 120))).capitalize() + '.'
+                    for _ in range(rng.randint(2, 8))
+                )
+            contents.append(Content(
+                section=rng.choice(sections),
+                title=f'[{SYNTHETIC_PREFIX}] {task.title()} practice {i:05d}',
+                content_type=content_type,
+                description=f'{task.capitalize()} {rng.choice(FILLER_WORDS)} {rng.choice(FILLER_WORDS)}',
+                youtube_url=f'https://www.youtube.com/watch?v=synthetic{i:05d}' if content_type == 'video' else '',
+                text_content=body,
+                text_html=render_markdown(body),  # bulk_create skips Content.save()
+                order=i,
+            ))
+        for batch_start in range(0, len(contents), BATCH_SIZE):
+            Content.objects.bulk_create(contents[batch_start:batch_start + BATCH_SIZE])
+
+        content_ids = list(
+            Content.objects.filter(title__startswith=f'[{SYNTHETIC_PREFIX}]').order_by('id').values_list('id', flat=True)
+        )
+        new_ids = content_ids[start:]
+        content_tags = [
+            ContentTag(content_id=content_id, tag=tag)
+            for content_id in new_ids
+            for tag in rng.sample(tags, k=min(len(tags), rng.randint(0, 3)))
+        ]
+        ContentTag.objects.bulk_create(content_tags, batch_size=BATCH_SIZE)
+        self.stdout.write(f"Created {len(new_ids)} contents with {len(content_tags)} tag links")
+        return content_ids
+
+    def create_users(self, count):
+        existing = SimpleUser.objects.filter(name__startswith=f'{SYNTHETIC_PREFIX}-user-').count()
+        users = []
+        for i in range(existing, existing + count):
+            user = SimpleUser(name=f'{SYNTHETIC_PREFIX}-user-{i:05d}')
+            user.set_pin(SYNTHETIC_PIN)
+            users.append(user)
+        SimpleUser.objects.bulk_create(users, batch_size=BATCH_SIZE)
+        user_ids = list(
+            SimpleUser.objects.filter(name__startswith=f'{SYNTHETIC_PREFIX}-user-')
+            .order_by('id').values_list('id', flat=True)[existing:]
+        )
+        self.stdout.write(f"Created {len(user_ids)} users")
+        return user_ids
+
+    def create_progress(self, rng, user_ids, content_ids, per_user):
+        now = timezone.now()
+        total = 0
+        batch = []
+        for user_id in user_ids:
+            for content_id in rng.sample(content_ids, k=min(per_user, len(content_ids))):
+                is_completed = rng.random() < 0.8
+                is_favorited = rng.random() < 0.2
+                completed_at = now - timedelta(minutes=rng.randint(0, 60 * 24 * 90)) if is_completed else None
+                # Completed items somewhere along their review schedule
+                repetitions = rng.randint(0, len(REVIEW_INTERVALS) - 1) if is_completed else 0
+                interval_days = REVIEW_INTERVALS[repetitions] if is_completed else 0
+                batch.append(UserProgress(
+                    user_id=user_id,
+                    content_id=content_id,
+                    is_completed=is_completed,
+                    is_favorited=is_favorited,
+                    completed_at=completed_at,
+                    favorited_at=now - timedelta(minutes=rng.randint(0, 60 * 24 * 90)) if is_favorited else None,
+                    repetitions=repetitions,
+                    interval_days=interval_days,
+                    next_review_at=completed_at + timedelta(days=interval_days) if is_completed else None,
+                ))
+            if len(batch) >= BATCH_SIZE:
+                UserProgress.objects.bulk_create(batch, ignore_conflicts=True)
+                total += len(batch)
+                batch = []
+        UserProgress.objects.bulk_create(batch, ignore_conflicts=True)
+        total += len(batch)
+        # bulk_create bypasses UserProgress.toggle, so count from the rows
+        Content.reconcile_counters()
+        self.stdout.write(f"Created {total} progress rows")
+
+    def create_mistakes(self, rng, user_ids, per_user):
+        now = timezone.now()
+        total = 0
+        batch = []
+        for user_id in user_ids:
+            for incorrect_word, correct_word in rng.sample(SPELLING_PAIRS, k=min(per_user, len(SPELLING_PAIRS))):
+                batch.append(SpellingMistake(
+                    user_id=user_id,
+                    incorrect_word=incorrect_word,
+                    correct_word=correct_word,
+                    incorrect_normalized=fold_word(incorrect_word),
+                    correct_normalized=fold_word(correct_word),
+                    frequency=rng.randint(1, 8),
+                    due_at=now + timedelta(days=rng.randint(-10, 30)),
+                ))
+            if len(batch) >= BATCH_SIZE:
+                SpellingMistake.objects.bulk_create(batch, ignore_conflicts=True)
+                total += len(batch)
+                batch = []
+        SpellingMistake.objects.bulk_create(batch, ignore_conflicts=True)
+        total += len(batch)
+        self.stdout.write(f"Created {total} spelling mistakes")
+
+    def create_whiteboards(self, rng, user_ids, count):
+        WhiteboardImage.objects.bulk_create([
+            WhiteboardImage(
+                title=f'{SYNTHETIC_PREFIX} whiteboard {i}',
+                image_data=TINY_PNG,
+                created_by_id=rng.choice(user_ids) if user_ids else None,
+            )
+            for i in range(count)
+        ], batch_size=BATCH_SIZE)
+        self.stdout.write(f"Created {count} whiteboards")
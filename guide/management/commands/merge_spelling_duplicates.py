@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from guide.models import SpellingMistake
+from guide.spelling import merge_case_duplicates
+
+class Command(BaseCommand):
+    help = 'Merge spelling mistakes that only differ by case, summing their frequencies'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report what would be merged without changing anything',
+        )
+
+    def handle(self, *args, **options):
+        merged_groups, deleted_rows = merge_case_duplicates(SpellingMistake, dry_run=options['dry_run'])
+
+        if options['dry_run']:
+            self.stdout.write(f"Would merge {merged_groups} groups, removing {deleted_rows} duplicate rows")
+        else:
+            self.stdout.write(f"Merged {merged_groups} groups, removed {deleted_rows} duplicate rows")
+
+        self.stdout.write(self.style.SUCCESS('Spelling mistake dedup complete!'))
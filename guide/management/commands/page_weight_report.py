@@ -0,0 +1,210 @@
+import gzip
+import json
+import re
+import urllib.request
+from html.parser import HTMLParser
+from pathlib import Path
+from urllib.parse import urljoin, urlparse
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+from guide.management.commands.benchmark_views import current_commit
+from guide.models import Section, SimpleUser
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+CSS_URL = re.compile(r'url\(\s*[\'"]?([^\'")]+?)[\'"]?\s*\)')
+
+
+def compressed_size(data):
+    """Bytes on the wire with the best encoding a browser would negotiate"""
+    if brotli is not None:
+        return len(brotli.compress(data))
+    return len(gzip.compress(data, compresslevel=9))
+
+
+class AssetCollector(HTMLParser):
+    """Collect stylesheet/script URLs and inline <style>/<script> bytes"""
+
+    def __init__(self):
+        super().__init__()
+        self.assets = []
+        self.inline_bytes = 0
+        self._inline_tag = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'link' and 'stylesheet' in (attrs.get('rel') or '').split() and attrs.get('href'):
+            self.assets.append(attrs['href'])
+        elif tag == 'script' and attrs.get('src'):
+            self.assets.append(attrs['src'])
+        elif tag in ('style', 'script'):
+            self._inline_tag = tag
+
+    def handle_endtag(self, tag):
+        if tag == self._inline_tag:
+            self._inline_tag = None
+
+    def handle_data(self, data):
+        if self._inline_tag:
+            self.inline_bytes += len(data.encode('utf-8'))
+
+
+class Command(BaseCommand):
+    help = ('Report the bytes each page costs: HTML, inline CSS/JS and linked stylesheets, scripts and fonts. '
+            '"wire" is a first visit; "repeat" is a later visit with static assets in the browser cache.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', default='synthetic-user-00000', help='SimpleUser name to log in as')
+        parser.add_argument('--pin', default='1234', help='PIN for --user')
+        parser.add_argument('--offline', action='store_true', help='Do not download third-party (CDN) assets')
+        parser.add_argument('--output', default='page_weight.json', help='Where to write the results')
+        parser.add_argument('--compare', help='Previous results file to diff against')
+
+    def handle(self, *args, **options):
+        self.offline = options['offline']
+        self.asset_cache = {}
+
+        client = Client(SERVER_NAME='localhost')
+        user = SimpleUser.objects.filter(name=options['user']).first()
+        if user is not None:
+            client.post(reverse('user_login'), {'name': user.name, 'pin': options['pin'], 'action': 'login'})
+        section = Section.objects.filter(contents__isnull=False).order_by('name').first() or Section.objects.first()
+        if section is None:
+            raise CommandError('No sections found. Run setup_initial_data or generate_synthetic_data first.')
+
+        pages = {
+            'home': reverse('home'),
+            'section_detail': reverse('section_detail', args=[section.name]),
+            'search': reverse('search_content') + '?q=practice',
+            'login': reverse('user_login'),
+            'whiteboard': reverse('whiteboard'),
+            'whiteboard_gallery': reverse('whiteboard_gallery'),
+        }
+        if user is not None:
+            pages.update({
+                'progress': reverse('progress'),
+                'favorites': reverse('favorites'),
+                'spelling_mistakes': reverse('spelling_mistakes'),
+            })
+
+        results = {name: self.measure_page(client, url) for name, url in pages.items()}
+        report = {
+            'generated_at': timezone.now().isoformat(),
+            'commit': current_commit(),
+            'encoding': 'br' if brotli is not None else 'gzip',
+            'pages': results,
+        }
+        Path(options['output']).write_text(json.dumps(report, indent=2) + '\n')
+
+        baseline = None
+        if options['compare']:
+            baseline = json.loads(Path(options['compare']).read_text())
+        self.print_table(results, baseline)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def measure_page(self, client, url):
+        response = client.get(url)
+        html = response.content if not response.streaming else b''.join(response.streaming_content)
+        collector = AssetCollector()
+        collector.feed(html.decode('utf-8', errors='replace'))
+
+        assets = {}
+        for asset_url in collector.assets:
+            assets[asset_url] = self.fetch(asset_url)
+            if asset_url.endswith('.css') and assets[asset_url]['body'] is not None:
+                for font_url in self.font_urls(asset_url, assets[asset_url]['body']):
+                    assets.setdefault(font_url, self.fetch(font_url))
+
+        known = [asset for asset in assets.values() if asset['body'] is not None]
+        html_compressed = compressed_size(html)
+        asset_compressed = sum(asset['compressed'] for asset in known)
+        return {
+            'status': response.status_code,
+            'html_bytes': len(html),
+            'html_compressed': html_compressed,
+            'inline_bytes': collector.inline_bytes,
+            'requests': len(assets),
+            'third_party_requests': sum(1 for asset in assets.values() if asset['third_party']),
+            'unmeasured_assets': sorted(url for url, asset in assets.items() if asset['body'] is None),
+            'asset_bytes': sum(len(asset['body']) for asset in known),
+            'asset_compressed': asset_compressed,
+            'total_compressed': html_compressed + asset_compressed,
+        }
+
+    def font_urls(self, css_url, body):
+        """woff2 fonts referenced by a stylesheet (what a modern browser downloads)"""
+        base = css_url.rsplit('/', 1)[0] + '/'
+        urls = []
+        for reference in CSS_URL.findall(body.decode('utf-8', errors='replace')):
+            reference = reference.split('#')[0].split('?')[0]
+            if reference.endswith('.woff2'):
+                urls.append(reference if urlparse(reference).scheme else urljoin(base, reference))
+        return urls
+
+    def fetch(self, url):
+        if url in self.asset_cache:
+            return self.asset_cache[url]
+        third_party = bool(urlparse(url).netloc)
+        body = None
+        if third_party:
+            if not self.offline:
+                try:
+                    with urllib.request.urlopen(url, timeout=10) as response:
+                        body = response.read()
+                except OSError as e:
+                    self.stderr.write(f'Could not download {url}: {e}')
+        else:
+            path = self.find_static(url)
+            if path is not None:
+                body = path.read_bytes()
+        asset = {
+            'third_party': third_party,
+            'body': body,
+            'compressed': compressed_size(body) if body is not None else None,
+        }
+        self.asset_cache[url] = asset
+        return asset
+
+    def find_static(self, url):
+        path = urlparse(url).path
+        static_url = '/' + settings.STATIC_URL.lstrip('/')
+        if not path.startswith(static_url):
+            return None
+        name = path[len(static_url):]
+        if settings.STATIC_ROOT and (Path(settings.STATIC_ROOT) / name).is_file():
+            return Path(settings.STATIC_ROOT) / name
+        found = finders.find(name)
+        return Path(found) if found else None
+
+    def print_table(self, results, baseline=None):
+        header = (f"{'page':<20} {'html KB':>9} {'inline KB':>10} {'requests':>9} {'3rd party':>10} "
+                  f"{'wire KB':>9} {'repeat KB':>10}")
+        if baseline:
+            header += f" {'Δwire':>8} {'Δrepeat':>8} {'Δrequests':>10}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        for name, result in results.items():
+            line = (f"{name:<20} {result['html_bytes'] / 1024:>9.1f} {result['inline_bytes'] / 1024:>10.1f} "
+                    f"{result['requests']:>9} {result['third_party_requests']:>10} "
+                    f"{result['total_compressed'] / 1024:>9.1f} {result['html_compressed'] / 1024:>10.1f}")
+            previous = baseline['pages'].get(name) if baseline else None
+            if previous:
+                line += (f" {self.percent_change(previous['total_compressed'], result['total_compressed']):>8}"
+                         f" {self.percent_change(previous['html_compressed'], result['html_compressed']):>8}"
+                         f" {result['requests'] - previous['requests']:>+10}")
+            self.stdout.write(line)
+            if result['unmeasured_assets']:
+                self.stdout.write(f"    not measured: {', '.join(result['unmeasured_assets'])}")
+
+    def percent_change(self, before, after):
+        if not before:
+            return '-'
+        return f'{(after - before) / before * 100:+.0f}%'
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from guide.activity import rebuild_activity
+from guide.models import DailyActivity, SimpleUser, SpellingMistake, UserProgress, WhiteboardImage
+
+
+class Command(BaseCommand):
+    help = ('Recount the DailyActivity rollup from progress, spelling and whiteboard rows '
+            '(only needed after changing those rows outside the app, e.g. in the admin)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', action='append', default=[], help='Only rebuild this user (repeatable)')
+
+    def handle(self, *args, **options):
+        user_ids = None
+        if options['user']:
+            user_ids = list(SimpleUser.objects.filter(name__in=options['user']).values_list('id', flat=True))
+            if not user_ids:
+                raise CommandError(f"No users named {', '.join(options['user'])}")
+        start = time.perf_counter()
+        rows = rebuild_activity(DailyActivity, UserProgress, SpellingMistake, WhiteboardImage, user_ids=user_ids)
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {rows} daily activity rows in {time.perf_counter() - start:.1f}s'
+        ))
@@ -0,0 +1,16 @@
+import time
+
+from django.core.management.base import BaseCommand
+from guide.models import Content
+
+
+class Command(BaseCommand):
+    help = ('Recount the completion, favorite and trending counters of every content item from UserProgress '
+            '(run hourly so the trending sort forgets completions older than the window)')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        corrected = Content.reconcile_counters()
+        self.stdout.write(self.style.SUCCESS(
+            f'Corrected the counters of {corrected} content items in {time.perf_counter() - start:.1f}s'
+        ))
@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+from guide.markup import MARKUP_VERSION, render_all
+from guide.models import Content
+
+
+class Command(BaseCommand):
+    help = 'Re-render the sanitized HTML of every content body (run after changing guide/markup.py)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows per bulk update')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        updated = render_all(Content, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendered {updated} content bodies in {time.perf_counter() - start:.1f}s (markup version {MARKUP_VERSION})'
+        ))
@@ -0,0 +1,57 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from guide.models import DailySearchSummary, SearchLog
+
+
+class Command(BaseCommand):
+    help = ('Aggregate search logs into one DailySearchSummary row per day and query, '
+            'report the top and zero-result queries, and delete old raw logs. Safe to re-run. '
+            'Searches still buffered in the web workers are not included, so run it at least '
+            'SEARCH_LOG_FLUSH_SECONDS after midnight.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Last day to roll up, YYYY-MM-DD (default: yesterday)')
+        parser.add_argument('--days', type=int, default=1, help='Days to roll up, ending with --date')
+        parser.add_argument('--keep-days', type=int, default=90,
+                            help='Delete raw search logs older than this many days (0 keeps them all)')
+        parser.add_argument('--top', type=int, default=10, help='Queries to list in the report')
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        if options['date']:
+            try:
+                last_day = date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError(f"Invalid --date {options['date']!r}; expected YYYY-MM-DD")
+        else:
+            last_day = today - timedelta(days=1)
+
+        days = [last_day - timedelta(days=offset) for offset in reversed(range(options['days']))]
+        for day in days:
+            summaries = DailySearchSummary.rollup(day)
+            self.stdout.write(f'{day}: {summaries} distinct queries')
+
+        summaries = DailySearchSummary.objects.filter(date__in=days)
+        self.report('Most searched', summaries.order_by('-searches', 'query'), options['top'])
+        self.report('Most often without results', summaries.filter(zero_results__gt=0).order_by('-zero_results', 'query'),
+                    options['top'])
+
+        if options['keep_days'] > 0:
+            cutoff = timezone.now() - timedelta(days=options['keep_days'])
+            deleted, _ = SearchLog.objects.filter(searched_at__lt=cutoff).delete()
+            self.stdout.write(f'Deleted {deleted} search logs older than {options["keep_days"]} days')
+        self.stdout.write(self.style.SUCCESS('Search log rollup complete!'))
+
+    def report(self, title, summaries, top):
+        rows = list(summaries[:top])
+        if not rows:
+            return
+        self.stdout.write(f'\n{title}:')
+        self.stdout.write(f"{'query':<40} {'searches':>9} {'no results':>11} {'close':>6} {'avg ms':>8}")
+        for row in rows:
+            self.stdout.write(
+                f'{row.query[:40] or "(filters only)":<40} {row.searches:>9} {row.zero_results:>11} '
+                f'{row.close_matches:>6} {row.average_duration_ms:>8.1f}'
+            )
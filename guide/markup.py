@@ -0,0 +1,65 @@
+"""Markdown rendering and HTML sanitizing for content bodies.
+
+Content.text_content is written by editors as Markdown (plain text and
+inline HTML keep working). It is rendered once, when the content is saved,
+into Content.text_html, so pages never run Markdown or the sanitizer per
+request.
+"""
+import markdown
+import nh3
+
+# Part of every body URL; bump it when render_markdown's output changes
+MARKUP_VERSION = 1
+
+MARKDOWN_EXTENSIONS = ['extra', 'sane_lists', 'nl2br']
+
+ALLOWED_TAGS = {
+    'a', 'abbr', 'b', 'blockquote', 'br', 'code', 'dd', 'del', 'div', 'dl', 'dt', 'em',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'i', 'img', 'ins', 'kbd', 'li', 'mark',
+    'ol', 'p', 'pre', 's', 'small', 'span', 'strong', 'sub', 'sup', 'table', 'tbody',
+    'td', 'tfoot', 'th', 'thead', 'tr', 'u', 'ul',
+}
+ALLOWED_ATTRIBUTES = {
+    'a': {'href', 'title'},
+    'abbr': {'title'},
+    'img': {'src', 'alt', 'title', 'width', 'height'},
+    'td': {'colspan', 'rowspan', 'align'},
+    'th': {'colspan', 'rowspan', 'align'},
+    'ol': {'start'},
+}
+ALLOWED_URL_SCHEMES = {'http', 'https', 'mailto'}
+
+
+def render_markdown(text):
+    """Render Markdown to HTML that is safe to mark_safe in a template"""
+    if not text:
+        return ''
+    html = markdown.markdown(text, extensions=MARKDOWN_EXTENSIONS, output_format='html')
+    return nh3.clean(
+        html,
+        tags=ALLOWED_TAGS,
+        attributes=ALLOWED_ATTRIBUTES,
+        url_schemes=ALLOWED_URL_SCHEMES,
+        link_rel='noopener noreferrer',
+    )
+
+
+def render_all(content_model, batch_size=500):
+    """Re-render text_html for every row; returns the number of rows updated.
+
+    Bump MARKUP_VERSION when the output changes, so browsers holding bodies
+    under the old immutable URLs fetch them again.
+    """
+    updated = 0
+    pending = []
+    for content in content_model.objects.only('id', 'text_content').iterator(chunk_size=batch_size):
+        content.text_html = render_markdown(content.text_content)
+        pending.append(content)
+        if len(pending) >= batch_size:
+            content_model.objects.bulk_update(pending, ['text_html'])
+            updated += len(pending)
+            pending = []
+    if pending:
+        content_model.objects.bulk_update(pending, ['text_html'])
+        updated += len(pending)
+    return updated
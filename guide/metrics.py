@@ -0,0 +1,194 @@
+"""In-process request metrics rendered in the Prometheus text format.
+
+Each worker process keeps its own counters and histograms; scrape every
+worker (or aggregate at the collector) to get totals across a deployment.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+current_request_metrics = ContextVar('current_request_metrics', default=None)
+
+
+def _format_labels(label_names, label_values, extra=None):
+    pairs = list(zip(label_names, label_values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = (
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in pairs
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+class Counter:
+    def __init__(self, name, documentation, label_names=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values):
+        return self._values.get(label_values, 0)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(self.label_names, label_values)} {_format_value(value)}')
+        return lines
+
+
+class Gauge(Counter):
+    def set(self, *label_values, value):
+        with self._lock:
+            self._values[label_values] = value
+
+    def render(self):
+        lines = super().render()
+        lines[1] = f'# TYPE {self.name} gauge'
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, buckets, label_names=()):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.label_names = tuple(label_names)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = {
+                    'counts': [0] * (len(self.buckets) + 1),
+                    'sum': 0.0,
+                    'count': 0,
+                }
+            series['counts'][bisect_left(self.buckets, value)] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for label_values, series in sorted(self._series.items()):
+                running = 0
+                for bound, count in zip(self.buckets + (float('inf'),), series['counts']):
+                    running += count
+                    labels = _format_labels(self.label_names, label_values, ('le', _format_value(bound)))
+                    lines.append(f'{self.name}_bucket{labels} {running}')
+                labels = _format_labels(self.label_names, label_values)
+                lines.append(f'{self.name}_sum{labels} {_format_value(series["sum"])}')
+                lines.append(f'{self.name}_count{labels} {series["count"]}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+requests_total = registry.register(Counter(
+    'pte_requests_total', 'Requests handled by guide views.', ('view', 'status')))
+request_duration = registry.register(Histogram(
+    'pte_request_duration_seconds', 'Wall time spent handling the request.', DURATION_BUCKETS, ('view',)))
+request_db_queries = registry.register(Histogram(
+    'pte_request_db_queries', 'Database queries executed per request.', QUERY_COUNT_BUCKETS, ('view',)))
+request_db_duration = registry.register(Histogram(
+    'pte_request_db_duration_seconds', 'Time spent in database queries per request.', DURATION_BUCKETS, ('view',)))
+request_template_duration = registry.register(Histogram(
+    'pte_request_template_duration_seconds', 'Time spent rendering templates per request.', DURATION_BUCKETS, ('view',)))
+response_size = registry.register(Histogram(
+    'pte_response_size_bytes', 'Size of the response body.', SIZE_BUCKETS, ('view',)))
+search_cache_requests = registry.register(Counter(
+    'pte_search_cache_requests_total', 'Search result cache lookups.', ('scope', 'result')))
+search_cache_evictions = registry.register(Counter(
+    'pte_search_cache_evictions_total', 'Search result cache entries dropped before being replaced.', ('reason',)))
+search_cache_entries = registry.register(Gauge(
+    'pte_search_cache_entries', 'Searches held in the result cache.'))
+search_cache_ids = registry.register(Gauge(
+    'pte_search_cache_ids', 'Content ids held in the result cache across all searches.'))
+search_log_rows = registry.register(Counter(
+    'pte_search_log_rows_total', 'Buffered search log rows written to the database or dropped.', ('result',)))
+
+
+class RequestMetrics:
+    """Per-request accumulator for database and template timings"""
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+
+    def record_query(self, execute, sql, params, many, context):
+        """connection.execute_wrapper hook that times every query"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.db_queries += 1
+
+
+_template_instrumentation_lock = threading.Lock()
+_template_instrumented = False
+
+
+def instrument_template_rendering():
+    """Time top-level Django template renders for the current request"""
+    global _template_instrumented
+    with _template_instrumentation_lock:
+        if _template_instrumented:
+            return
+        from django.template.backends.django import Template
+
+        original_render = Template.render
+
+        def timed_render(self, context=None, request=None):
+            request_metrics = current_request_metrics.get()
+            if request_metrics is None:
+                return original_render(self, context, request)
+            start = time.perf_counter()
+            try:
+                return original_render(self, context, request)
+            finally:
+                request_metrics.template_time += time.perf_counter() - start
+
+        Template.render = timed_render
+        _template_instrumented = True
@@ -0,0 +1,281 @@
+import abc
+import time
+from contextlib import asynccontextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.utils.cache import patch_vary_headers
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from . import compression, metrics
+from .query_patterns import QueryPatternDetector, RepeatedQueryError, logger as query_pattern_logger
+
+
+@asynccontextmanager
+async def async_execute_wrapper(wrapper):
+    """connection.execute_wrapper for async middleware.
+
+    Connections are per thread and async ORM calls run on the
+    thread-sensitive sync_to_async thread, so the wrapper has to be
+    installed there rather than on the event loop's connection.
+    """
+    await sync_to_async(lambda: connection.execute_wrappers.append(wrapper))()
+    try:
+        yield
+    finally:
+        await sync_to_async(lambda: connection.execute_wrappers.remove(wrapper))()
+
+
+def wrap_streaming_content(response, wrapper, on_close, request_metrics=None):
+    """Keep an execute wrapper installed while a streaming response is consumed.
+
+    Streamed pages render part of their content after the middleware has
+    returned, so the wrapper is installed again around the iteration and
+    on_close() runs once the last chunk has been produced. request_metrics,
+    if given, is made current so streamed template renders are timed too.
+    """
+    content = response.streaming_content
+    if response.is_async:
+        async def stream():
+            token = metrics.current_request_metrics.set(request_metrics) if request_metrics else None
+            try:
+                async with async_execute_wrapper(wrapper):
+                    async for chunk in content:
+                        yield chunk
+            finally:
+                if token is not None:
+                    metrics.current_request_metrics.reset(token)
+            on_close()
+    else:
+        def stream():
+            token = metrics.current_request_metrics.set(request_metrics) if request_metrics else None
+            try:
+                with connection.execute_wrapper(wrapper):
+                    yield from content
+            finally:
+                if token is not None:
+                    metrics.current_request_metrics.reset(token)
+            on_close()
+    response.streaming_content = stream()
+    return response
+
+
+class HybridMiddleware(abc.ABC):
+    """Base for middleware that runs natively in both WSGI and ASGI stacks.
+
+    A sync-only middleware forces Django to push the whole request through
+    a thread under ASGI, so everything in our stack supports both modes.
+    Subclasses implement handle() for WSGI and ahandle() for ASGI.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(self.get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.ahandle(request)
+        return self.handle(request)
+
+    @abc.abstractmethod
+    def handle(self, request):
+        """Process the request when get_response is synchronous"""
+
+    @abc.abstractmethod
+    async def ahandle(self, request):
+        """Process the request when get_response is a coroutine function"""
+
+
+class StaticFilesMiddleware(HybridMiddleware, WhiteNoiseMiddleware):
+    """WhiteNoise static file serving that also runs natively under ASGI"""
+
+    def __init__(self, get_response):
+        WhiteNoiseMiddleware.__init__(self, get_response)
+        HybridMiddleware.__init__(self, get_response)
+
+    def find_static_file(self, request):
+        if self.autorefresh:
+            return self.find_file(request.path_info)
+        return self.files.get(request.path_info)
+
+    def handle(self, request):
+        static_file = self.find_static_file(request)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return self.get_response(request)
+
+    async def ahandle(self, request):
+        static_file = self.find_static_file(request)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
+
+
+class CompressionMiddleware(HybridMiddleware):
+    """Compress HTML/JSON responses with Brotli or gzip.
+
+    Responses smaller than RESPONSE_COMPRESSION_MIN_SIZE are left alone.
+    With RESPONSE_COMPRESSION_SKIP_CSRF on, responses that rendered a CSRF
+    token are never compressed, so the token cannot be recovered through
+    compressed-size side channels (BREACH). Regular pages therefore carry no
+    token; forms that need one fetch it from the csrf_token view.
+    """
+
+    def handle(self, request):
+        return self.compress(request, self.get_response(request))
+
+    async def ahandle(self, request):
+        return self.compress(request, await self.get_response(request))
+
+    def compress(self, request, response):
+        if not settings.RESPONSE_COMPRESSION or response.has_header('Content-Encoding'):
+            return response
+        if not compression.COMPRESSIBLE_CONTENT_TYPE.match(response.get('Content-Type', '')):
+            return response
+        if not response.streaming and len(response.content) < settings.RESPONSE_COMPRESSION_MIN_SIZE:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if settings.RESPONSE_COMPRESSION_SKIP_CSRF and self.renders_csrf_token(request, response):
+            return response
+        encoding = compression.negotiate_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        quality = settings.RESPONSE_COMPRESSION_BROTLI_QUALITY
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = compression.acompress_chunks(response.streaming_content, encoding, quality)
+            else:
+                response.streaming_content = compression.compress_chunks(response.streaming_content, encoding, quality)
+            del response.headers['Content-Length']
+        else:
+            compressed = compression.compress(response.content, encoding, quality)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    def renders_csrf_token(self, request, response):
+        # get_token() flags the request and CsrfViewMiddleware answers by
+        # (re)setting the cookie, clearing the flag as it does so.
+        return settings.CSRF_COOKIE_NAME in response.cookies or request.META.get('CSRF_COOKIE_NEEDS_UPDATE', False)
+
+
+class PerformanceMiddleware(HybridMiddleware):
+    """Record latency, DB and template cost for every guide view.
+
+    Observations go into the in-process histograms in guide.metrics (served
+    by the metrics view) and a Server-Timing header is added to the
+    response so the numbers also show up in the browser dev tools.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        metrics.instrument_template_rendering()
+
+    def handle(self, request):
+        request_metrics = metrics.RequestMetrics()
+        token = metrics.current_request_metrics.set(request_metrics)
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(request_metrics.record_query):
+                response = self.get_response(request)
+        finally:
+            metrics.current_request_metrics.reset(token)
+        return self.finish(request, response, request_metrics, start)
+
+    async def ahandle(self, request):
+        request_metrics = metrics.RequestMetrics()
+        token = metrics.current_request_metrics.set(request_metrics)
+        start = time.perf_counter()
+        try:
+            async with async_execute_wrapper(request_metrics.record_query):
+                response = await self.get_response(request)
+        finally:
+            metrics.current_request_metrics.reset(token)
+        return self.finish(request, response, request_metrics, start)
+
+    def finish(self, request, response, request_metrics, start):
+        view_name = getattr(request, '_metrics_view_name', None)
+        if view_name:
+            # For a streamed page the header can only cover the work done before the first byte
+            duration = time.perf_counter() - start
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={request_metrics.db_time * 1000:.1f};desc="{request_metrics.db_queries} queries"',
+                f'tpl;dur={request_metrics.template_time * 1000:.1f}',
+                f'total;dur={duration * 1000:.1f}',
+            ])
+            if response.streaming:
+                return wrap_streaming_content(
+                    response, request_metrics.record_query,
+                    lambda: self.record(view_name, response, request_metrics, time.perf_counter() - start),
+                    request_metrics,
+                )
+            self.record(view_name, response, request_metrics, duration)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if getattr(view_func, '__module__', None) == 'guide.views':
+            request._metrics_view_name = view_func.__name__
+
+    def record(self, view_name, response, request_metrics, duration):
+        metrics.requests_total.inc(view_name, str(response.status_code))
+        metrics.request_duration.observe(duration, view_name)
+        metrics.request_db_queries.observe(request_metrics.db_queries, view_name)
+        metrics.request_db_duration.observe(request_metrics.db_time, view_name)
+        metrics.request_template_duration.observe(request_metrics.template_time, view_name)
+        if not response.streaming:
+            metrics.response_size.observe(len(response.content), view_name)
+
+
+class QueryPatternMiddleware(HybridMiddleware):
+    """Flag requests that run the same SQL statement over and over.
+
+    QUERY_PATTERN_DETECTION selects the mode: 'off', 'log' (warn with the
+    template and code line responsible) or 'fail' (raise RepeatedQueryError,
+    used by the test suite so new N+1 patterns break the build).
+    """
+
+    def handle(self, request):
+        if settings.QUERY_PATTERN_DETECTION not in ('log', 'fail'):
+            return self.get_response(request)
+
+        detector = QueryPatternDetector(settings.QUERY_PATTERN_THRESHOLD)
+        with connection.execute_wrapper(detector):
+            response = self.get_response(request)
+        return self.finish(request, response, detector)
+
+    async def ahandle(self, request):
+        if settings.QUERY_PATTERN_DETECTION not in ('log', 'fail'):
+            return await self.get_response(request)
+
+        detector = QueryPatternDetector(settings.QUERY_PATTERN_THRESHOLD)
+        async with async_execute_wrapper(detector):
+            response = await self.get_response(request)
+        return self.finish(request, response, detector)
+
+    def finish(self, request, response, detector):
+        if response.streaming:
+            # Streamed item lists run their queries while the response is sent
+            return wrap_streaming_content(response, detector, lambda: self.check(request, detector))
+        self.check(request, detector)
+        return response
+
+    def check(self, request, detector):
+        if detector.repeated():
+            report = detector.report(f'{request.method} {request.path}')
+            if settings.QUERY_PATTERN_DETECTION == 'fail':
+                raise RepeatedQueryError(report)
+            query_pattern_logger.warning(report)
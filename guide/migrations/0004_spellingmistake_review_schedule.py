@@ -0,0 +1,38 @@
+# Generated by Django 5.1.3 on 2026-10-19 17:16
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guide', '0003_spellingmistake'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='spellingmistake',
+            name='due_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='When this mistake is next due for review'),
+        ),
+        migrations.AddField(
+            model_name='spellingmistake',
+            name='ease_factor',
+            field=models.FloatField(default=2.5, help_text='SM-2 ease factor (minimum 1.3)'),
+        ),
+        migrations.AddField(
+            model_name='spellingmistake',
+            name='interval_days',
+            field=models.PositiveIntegerField(default=0, help_text='Days until the next review'),
+        ),
+        migrations.AddField(
+            model_name='spellingmistake',
+            name='repetitions',
+            field=models.PositiveIntegerField(default=0, help_text='Consecutive successful reviews'),
+        ),
+        migrations.AddIndex(
+            model_name='spellingmistake',
+            index=models.Index(fields=['user', 'due_at'], name='spelling_user_due_idx'),
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.1.3 on 2026-10-19 17:18
+
+from django.db import migrations, models
+
+# Frozen copy of the folding rules at the time of this migration
+WORD_STRIP_CHARS = ' \t\r\n.,;:!?"\'()[]{}<>'
+
+
+def fold_word(word):
+    return (word or '').strip(WORD_STRIP_CHARS).casefold()
+
+
+def merge_duplicates(apps, schema_editor):
+    """Fill the normalized columns and merge rows that only differ by case or punctuation.
+
+    The oldest row in each group survives with the summed frequency.
+    """
+    SpellingMistake = apps.get_model('guide', 'SpellingMistake')
+    groups = {}
+    for mistake in SpellingMistake.objects.order_by('id'):
+        key = (mistake.user_id, fold_word(mistake.incorrect_word), fold_word(mistake.correct_word))
+        groups.setdefault(key, []).append(mistake)
+
+    survivors = []
+    duplicate_ids = []
+    for (_, incorrect_normalized, correct_normalized), mistakes in groups.items():
+        survivor = mistakes[0]
+        survivor.incorrect_normalized = incorrect_normalized
+        survivor.correct_normalized = correct_normalized
+        if len(mistakes) > 1:
+            duplicates = mistakes[1:]
+            survivor.frequency = sum(m.frequency for m in mistakes)
+            survivor.is_reviewed = all(m.is_reviewed for m in mistakes)
+            survivor.due_at = min(m.due_at for m in mistakes)
+            for duplicate in duplicates:
+                survivor.context = duplicate.context or survivor.context
+                survivor.notes = duplicate.notes or survivor.notes
+            duplicate_ids.extend(m.id for m in duplicates)
+        survivors.append(survivor)
+
+    SpellingMistake.objects.filter(id__in=duplicate_ids).delete()
+    SpellingMistake.objects.bulk_update(
+        survivors,
+        ['incorrect_normalized', 'correct_normalized', 'frequency', 'is_reviewed', 'due_at', 'context', 'notes'],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guide', '0004_spellingmistake_review_schedule'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='spellingmistake',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='spellingmistake',
+            name='correct_normalized',
+            field=models.CharField(default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='spellingmistake',
+            name='incorrect_normalized',
+            field=models.CharField(default='', editable=False, max_length=100),
+        ),
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='spellingmistake',
+            constraint=models.UniqueConstraint(fields=('user', 'incorrect_normalized', 'correct_normalized'), name='spelling_user_normalized_uniq'),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.1.3 on 2026-10-19 17:53
+
+from django.db import migrations, models
+
+import markdown
+import nh3
+
+# Frozen copy of the MARKUP_VERSION 1 rendering rules, so later changes to
+# guide.markup do not change what this backfill produced
+MARKDOWN_EXTENSIONS = ['extra', 'sane_lists', 'nl2br']
+ALLOWED_TAGS = {
+    'a', 'abbr', 'b', 'blockquote', 'br', 'code', 'dd', 'del', 'div', 'dl', 'dt', 'em',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'i', 'img', 'ins', 'kbd', 'li', 'mark',
+    'ol', 'p', 'pre', 's', 'small', 'span', 'strong', 'sub', 'sup', 'table', 'tbody',
+    'td', 'tfoot', 'th', 'thead', 'tr', 'u', 'ul',
+}
+ALLOWED_ATTRIBUTES = {
+    'a': {'href', 'title'},
+    'abbr': {'title'},
+    'img': {'src', 'alt', 'title', 'width', 'height'},
+    'td': {'colspan', 'rowspan', 'align'},
+    'th': {'colspan', 'rowspan', 'align'},
+    'ol': {'start'},
+}
+ALLOWED_URL_SCHEMES = {'http', 'https', 'mailto'}
+
+
+def render_markdown(text):
+    if not text:
+        return ''
+    html = markdown.markdown(text, extensions=MARKDOWN_EXTENSIONS, output_format='html')
+    return nh3.clean(
+        html,
+        tags=ALLOWED_TAGS,
+        attributes=ALLOWED_ATTRIBUTES,
+        url_schemes=ALLOWED_URL_SCHEMES,
+        link_rel='noopener noreferrer',
+    )
+
+
+def render_bodies(apps, schema_editor):
+    Content = apps.get_model('guide', 'Content')
+    pending = []
+    for content in Content.objects.only('id', 'text_content').iterator(chunk_size=500):
+        content.text_html = render_markdown(content.text_content)
+        pending.append(content)
+        if len(pending) >= 500:
+            Content.objects.bulk_update(pending, ['text_html'])
+            pending = []
+    Content.objects.bulk_update(pending, ['text_html'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guide', '0005_spellingmistake_normalized_words'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='content',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.RunPython(render_bodies, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.3 on 2026-10-19 18:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guide', '0006_content_text_html'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentNeighbor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('completion', 'Completed together')], max_length=10)),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('content', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='neighbors', to='guide.content')),
+                ('neighbor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbor_of', to='guide.content')),
+            ],
+            options={
+                'ordering': ['kind', 'content', 'rank'],
+                'constraints': [models.UniqueConstraint(fields=('content', 'kind', 'rank'), name='content_neighbor_rank_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.3 on 2026-10-19 18:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guide', '0007_contentneighbor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NeighborBuild',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('completion', 'Completed together'), ('text', 'Similar text')], max_length=10, unique=True)),
+                ('built_at', models.DateTimeField()),
+                ('items', models.PositiveIntegerField(default=0)),
+                ('rows', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='contentneighbor',
+            name='kind',
+            field=models.CharField(choices=[('completion', 'Completed together'), ('text', 'Similar text')], max_length=10),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.1.3 on 2026-10-19 18:26
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guide', '0008_neighborbuild'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySearchSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('query', models.CharField(blank=True, max_length=200)),
+                ('searches', models.PositiveIntegerField()),
+                ('zero_results', models.PositiveIntegerField(help_text='Searches that found nothing, not even close matches')),
+                ('close_matches', models.PositiveIntegerField(help_text='Searches answered with typo-tolerant title matches')),
+                ('average_results', models.FloatField()),
+                ('average_duration_ms', models.FloatField()),
+                ('max_duration_ms', models.FloatField()),
+            ],
+            options={
+                'ordering': ['-date', '-searches', 'query'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'query'), name='daily_search_summary_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SearchLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('query', models.CharField(blank=True, help_text='Normalized query', max_length=200)),
+                ('scope', models.CharField(choices=[('home', 'Home page'), ('search', 'Search page')], max_length=10)),
+                ('section', models.CharField(blank=True, max_length=20)),
+                ('content_type', models.CharField(blank=True, max_length=10)),
+                ('tag', models.CharField(blank=True, max_length=50)),
+                ('result_count', models.PositiveIntegerField()),
+                ('close_matches', models.BooleanField(default=False, help_text='Results are typo-tolerant title matches')),
+                ('duration_ms', models.FloatField(help_text='Time spent finding and loading the results')),
+                ('searched_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['searched_at'], name='search_log_time_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.1.3 on 2026-10-19 18:29
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+def count_progress(apps, schema_editor):
+    Content = apps.get_model('guide', 'Content')
+    UserProgress = apps.get_model('guide', 'UserProgress')
+
+    def progress_count(**filters):
+        counts = (
+            UserProgress.objects.filter(content=OuterRef('pk'), **filters)
+            .order_by().values('content').annotate(count=Count('id')).values('count')
+        )
+        return Coalesce(Subquery(counts), Value(0))
+
+    Content.objects.update(
+        completion_count=progress_count(is_completed=True),
+        favorite_count=progress_count(is_favorited=True),
+        recent_completion_count=progress_count(
+            is_completed=True, completed_at__gte=timezone.now() - timedelta(days=7),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guide', '0009_searchlog_dailysearchsummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='content',
+            name='completion_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='content',
+            name='favorite_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='content',
+            name='recent_completion_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Completions in the last TRENDING_DAYS days'),
+        ),
+        migrations.AddIndex(
+            model_name='content',
+            index=models.Index(fields=['section', '-completion_count', '-favorite_count', 'order'], condition=models.Q(is_active=True), name='content_popular_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='content',
+            index=models.Index(fields=['section', '-recent_completion_count', '-completion_count', 'order'], condition=models.Q(is_active=True), name='content_trending_idx'),
+        ),
+        migrations.RunPython(count_progress, migrations.RunPython.noop),
+    ]
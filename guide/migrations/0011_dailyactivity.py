@@ -0,0 +1,67 @@
+# Generated by Django 5.1.3 on 2026-10-19 18:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from collections import defaultdict
+
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def backfill_activity(apps, schema_editor):
+    """Count each user's completions, favorites, spelling entries and whiteboard saves per day"""
+    DailyActivity = apps.get_model('guide', 'DailyActivity')
+    UserProgress = apps.get_model('guide', 'UserProgress')
+    SpellingMistake = apps.get_model('guide', 'SpellingMistake')
+    WhiteboardImage = apps.get_model('guide', 'WhiteboardImage')
+    sources = [
+        ('completions', UserProgress.objects.filter(is_completed=True, completed_at__isnull=False),
+         'user', 'completed_at'),
+        ('favorites', UserProgress.objects.filter(is_favorited=True, favorited_at__isnull=False),
+         'user', 'favorited_at'),
+        ('spelling_entries', SpellingMistake.objects.all(), 'user', 'created_at'),
+        ('whiteboard_saves', WhiteboardImage.objects.filter(created_by__isnull=False), 'created_by', 'created_at'),
+    ]
+    days = defaultdict(dict)
+    for field, rows, user_field, time_field in sources:
+        counts = (
+            rows.annotate(day=TruncDate(time_field, tzinfo=timezone.get_current_timezone()))
+            .values_list(user_field, 'day').annotate(count=Count('id')).order_by()
+        )
+        for user_id, day, count in counts.iterator():
+            days[user_id, day][field] = count
+
+    DailyActivity.objects.bulk_create(
+        (DailyActivity(user_id=user_id, date=day, **counts) for (user_id, day), counts in days.items()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guide', '0010_content_popularity_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('completions', models.PositiveIntegerField(default=0)),
+                ('favorites', models.PositiveIntegerField(default=0)),
+                ('spelling_entries', models.PositiveIntegerField(default=0)),
+                ('whiteboard_saves', models.PositiveIntegerField(default=0)),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='daily_activity', to='guide.simpleuser')),
+            ],
+            options={
+                'verbose_name_plural': 'daily activity',
+                'ordering': ['user', 'date'],
+                'constraints': [models.UniqueConstraint(fields=('user', 'date'), name='daily_activity_user_date_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_activity, migrations.RunPython.noop),
+    ]
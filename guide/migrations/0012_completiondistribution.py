@@ -0,0 +1,28 @@
+# Generated by Django 5.1.3 on 2026-10-19 18:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guide', '0011_dailyactivity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompletionDistribution',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('learners', models.PositiveIntegerField()),
+                ('max_completions', models.PositiveIntegerField()),
+                ('median', models.FloatField()),
+                ('p75', models.FloatField()),
+                ('p90', models.FloatField()),
+                ('fewer_than', models.BinaryField()),
+                ('built_at', models.DateTimeField()),
+                ('section', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='completion_distribution', to='guide.section')),
+            ],
+        ),
+    ]
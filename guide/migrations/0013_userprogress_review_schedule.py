@@ -0,0 +1,49 @@
+# Generated by Django 5.1.3 on 2026-10-19 18:39
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def schedule_completed(apps, schema_editor):
+    # Items completed before reviews existed come up a day after completion
+    UserProgress = apps.get_model('guide', 'UserProgress')
+    UserProgress.objects.filter(is_completed=True, completed_at__isnull=False).update(
+        next_review_at=F('completed_at') + timedelta(days=1),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('guide', '0012_completiondistribution'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprogress',
+            name='ease_factor',
+            field=models.FloatField(default=2.5, help_text='SM-2 ease factor (minimum 1.3)'),
+        ),
+        migrations.AddField(
+            model_name='userprogress',
+            name='interval_days',
+            field=models.PositiveIntegerField(default=0, help_text='Days until the next review'),
+        ),
+        migrations.AddField(
+            model_name='userprogress',
+            name='next_review_at',
+            field=models.DateTimeField(blank=True, help_text='When this completed item is next due for review', null=True),
+        ),
+        migrations.AddField(
+            model_name='userprogress',
+            name='repetitions',
+            field=models.PositiveIntegerField(default=0, help_text='Consecutive successful reviews'),
+        ),
+        migrations.AddIndex(
+            model_name='userprogress',
+            index=models.Index(condition=models.Q(('next_review_at__isnull', False)), fields=['user', 'next_review_at'], name='progress_review_due_idx'),
+        ),
+        migrations.RunPython(schedule_completed, migrations.RunPython.noop),
+    ]
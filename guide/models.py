@@ -1,7 +1,41 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
 from django.urls import reverse
 from django.contrib.auth.models import User
+from django.utils import timezone
+from datetime import datetime, timedelta
 import hashlib
+import struct
+
+from .markup import MARKUP_VERSION, render_markdown
+from .spelling import fold_word
+
+MIN_EASE_FACTOR = 1.3
+
+
+def sm2_review(repetitions, interval_days, ease_factor, quality):
+    """Apply an SM-2 review graded 0 (forgot) to 5 (perfect recall).
+    
+    Returns the new (repetitions, interval_days, ease_factor).
+    """
+    quality = max(0, min(5, int(quality)))
+    if quality < 3:
+        repetitions = 0
+        interval_days = 1
+    else:
+        if repetitions == 0:
+            interval_days = 1
+        elif repetitions == 1:
+            interval_days = 6
+        else:
+            interval_days = round(interval_days * ease_factor)
+        repetitions += 1
+    
+    penalty = 5 - quality
+    ease_factor = max(MIN_EASE_FACTOR, ease_factor + 0.1 - penalty * (0.08 + penalty * 0.02))
+    return repetitions, interval_days, ease_factor
+
 
 class SimpleUser(models.Model):
     name = models.CharField(max_length=50, help_text="Your display name")
@@ -70,8 +104,10 @@ class Content(models.Model):
     # For YouTube videos
     youtube_url = models.TextField(blank=True, default='', help_text="YouTube video URL")
     
-    # For notes and text content
+    # For notes and text content: Markdown source, and the sanitized HTML
+    # rendered from it on save
     text_content = models.TextField(blank=True)
+    text_html = models.TextField(blank=True, editable=False)
     
     # Common fields
     order = models.PositiveIntegerField(default=0, help_text="Order of display within section")
@@ -79,12 +115,82 @@ class Content(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Denormalized from UserProgress for the popular and trending sorts:
+    # moved by UserProgress.toggle, corrected by reconcile_counters
+    completion_count = models.PositiveIntegerField(default=0, editable=False)
+    favorite_count = models.PositiveIntegerField(default=0, editable=False)
+    recent_completion_count = models.PositiveIntegerField(
+        default=0, editable=False, help_text="Completions in the last TRENDING_DAYS days"
+    )
+    
+    TRENDING_DAYS = 7
+    
     class Meta:
         ordering = ['order', 'created_at']
+        indexes = [
+            models.Index(fields=['section', '-completion_count', '-favorite_count', 'order'],
+                         condition=models.Q(is_active=True), name='content_popular_idx'),
+            models.Index(fields=['section', '-recent_completion_count', '-completion_count', 'order'],
+                         condition=models.Q(is_active=True), name='content_trending_idx'),
+        ]
     
     def __str__(self):
         return f"{self.section.title} - {self.title}"
     
+    @classmethod
+    def trending_since(cls):
+        return timezone.now() - timedelta(days=cls.TRENDING_DAYS)
+    
+    @classmethod
+    def reconcile_counters(cls, contents=None):
+        """Recount the popularity counters of contents (default: all) from UserProgress.
+        
+        Counters drift when progress rows are changed outside toggle (admin,
+        deleted users) and recent completions age out of the trending
+        window. Only rows whose counters differ are updated, each with a
+        single UPDATE so toggles running meanwhile are not lost. Returns the
+        number of rows corrected.
+        """
+        def progress_count(**filters):
+            counts = (
+                UserProgress.objects.filter(content=OuterRef('pk'), **filters)
+                .order_by().values('content').annotate(count=models.Count('id')).values('count')
+            )
+            return Coalesce(Subquery(counts), Value(0))
+        
+        contents = cls.objects.all() if contents is None else contents
+        counts = {
+            'completion_count': progress_count(is_completed=True),
+            'favorite_count': progress_count(is_favorited=True),
+            'recent_completion_count': progress_count(is_completed=True, completed_at__gte=cls.trending_since()),
+        }
+        drifted = contents.alias(**{f'actual_{name}': count for name, count in counts.items()}).filter(
+            ~Q(completion_count=F('actual_completion_count'))
+            | ~Q(favorite_count=F('actual_favorite_count'))
+            | ~Q(recent_completion_count=F('actual_recent_completion_count'))
+        )
+        ids = list(drifted.values_list('id', flat=True))
+        for start in range(0, len(ids), 500):
+            cls.objects.filter(id__in=ids[start:start + 500]).update(**counts)
+        return len(ids)
+    
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'text_content' in update_fields:
+            self.text_html = render_markdown(self.text_content)
+            if update_fields is not None:
+                # updated_at feeds body_version, the cache-busting part of the body URL
+                kwargs['update_fields'] = {*update_fields, 'text_html', 'updated_at'}
+        super().save(*args, **kwargs)
+    
+    @property
+    def body_version(self):
+        """Changes whenever the rendered body may have changed (for cache-busting URLs)"""
+        return f"{MARKUP_VERSION}-{self.updated_at:%Y%m%d%H%M%S%f}"
+    
+    def get_body_url(self):
+        return f"{reverse('content_body', args=[self.id])}?v={self.body_version}"
+    
     def get_youtube_embed_url(self):
         """Convert YouTube URL to embed format"""
         if self.youtube_url and 'youtube.com/watch?v=' in self.youtube_url:
@@ -128,6 +234,7 @@ class Tag(models.Model):
     color = models.CharField(max_length=7, default='#007bff', help_text="Hex color code")
     description = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['name']
@@ -154,14 +261,186 @@ class UserProgress(models.Model):
     completed_at = models.DateTimeField(null=True, blank=True)
     favorited_at = models.DateTimeField(null=True, blank=True)
     notes = models.TextField(blank=True, help_text="User's personal notes")
+    
+    # SM-2 review schedule, started when the item is completed
+    next_review_at = models.DateTimeField(null=True, blank=True, help_text="When this completed item is next due for review")
+    interval_days = models.PositiveIntegerField(default=0, help_text="Days until the next review")
+    ease_factor = models.FloatField(default=2.5, help_text="SM-2 ease factor (minimum 1.3)")
+    repetitions = models.PositiveIntegerField(default=0, help_text="Consecutive successful reviews")
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    FIRST_REVIEW_DAYS = 1
+    
     class Meta:
         unique_together = ['user', 'content']
+        indexes = [
+            # The due queue: one user's scheduled items in review order
+            models.Index(fields=['user', 'next_review_at'], condition=Q(next_review_at__isnull=False),
+                         name='progress_review_due_idx'),
+        ]
+    
+    # action: (flag, when it was set, Content counter, DailyActivity counter)
+    TOGGLES = {
+        'complete': ('is_completed', 'completed_at', 'completion_count', 'completions'),
+        'favorite': ('is_favorited', 'favorited_at', 'favorite_count', 'favorites'),
+    }
     
     def __str__(self):
         return f"{self.user.name} - {self.content.title}"
+    
+    @classmethod
+    def toggle(cls, user, content, action):
+        """Flip user's completion or favorite flag on content and move its counter; returns the progress.
+        
+        The flip only applies if the row still holds the state it was read
+        with, and the counter moves in the same transaction with an F()
+        update, so concurrent toggles (double clicks, several workers)
+        leave the counts exact.
+        """
+        progress, _ = cls.objects.get_or_create(user=user, content=content)
+        if action not in cls.TOGGLES:
+            return progress
+        flag, stamp, counter, activity = cls.TOGGLES[action]
+        while True:
+            was_set, set_at = getattr(progress, flag), getattr(progress, stamp)
+            now = timezone.now()
+            step = -1 if was_set else 1
+            changes = {counter: Greatest(F(counter) + step, Value(0))}
+            if action == 'complete' and (not was_set or (set_at is not None and set_at >= Content.trending_since())):
+                changes['recent_completion_count'] = Greatest(F('recent_completion_count') + step, Value(0))
+            updates = {flag: not was_set, stamp: None if was_set else now, 'updated_at': now}
+            if action == 'complete':
+                # Completing starts the review schedule, un-completing drops it
+                updates.update(
+                    next_review_at=None if was_set else now + timedelta(days=cls.FIRST_REVIEW_DAYS),
+                    interval_days=0,
+                    repetitions=0,
+                    ease_factor=cls._meta.get_field('ease_factor').default,
+                )
+            with transaction.atomic():
+                flipped = cls.objects.filter(pk=progress.pk, **{flag: was_set, stamp: set_at}).update(**updates)
+                if flipped:
+                    Content.objects.filter(pk=content.pk).update(**changes)
+                    if not was_set:
+                        DailyActivity.record(user, timezone.localdate(now), **{activity: 1})
+                    elif set_at is not None:
+                        DailyActivity.record(user, timezone.localdate(set_at), **{activity: -1})
+            if flipped:
+                for field, value in updates.items():
+                    setattr(progress, field, value)
+                return progress
+            # Another request toggled it first; flip from the state it left
+            progress.refresh_from_db(fields=[flag, stamp])
+    
+    @classmethod
+    def due_for_review(cls, user, limit=10, now=None):
+        """Completed active items of user due for review by the end of today, longest overdue first"""
+        today = timezone.localdate(now)
+        end_of_today = timezone.make_aware(datetime.combine(today + timedelta(days=1), datetime.min.time()))
+        return (
+            cls.objects.filter(user=user, next_review_at__lt=end_of_today, is_completed=True, content__is_active=True)
+            .select_related('content__section')
+            .only('content__title', 'content__section__name', 'content__section__title',
+                  'repetitions', 'interval_days', 'next_review_at')
+            .order_by('next_review_at')[:limit]
+        )
+    
+    def schedule_review(self, quality, now=None):
+        """Apply an SM-2 review graded 0 (forgot) to 5 (perfect recall) and set the next review date"""
+        now = now or timezone.now()
+        self.repetitions, self.interval_days, self.ease_factor = sm2_review(
+            self.repetitions, self.interval_days, self.ease_factor, quality
+        )
+        self.next_review_at = now + timedelta(days=self.interval_days)
+
+class ContentNeighbor(models.Model):
+    """Precomputed top-K similar items for a content item, rebuilt by a batch job"""
+    KIND_CHOICES = [
+        ('completion', 'Completed together'),
+        ('text', 'Similar text'),
+    ]
+    
+    # Indexed through the unique (content, kind, rank) constraint
+    content = models.ForeignKey(Content, on_delete=models.CASCADE, related_name='neighbors', db_index=False)
+    neighbor = models.ForeignKey(Content, on_delete=models.CASCADE, related_name='neighbor_of')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+    
+    class Meta:
+        ordering = ['kind', 'content', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['content', 'kind', 'rank'], name='content_neighbor_rank_uniq'),
+        ]
+    
+    def __str__(self):
+        return f"{self.content_id} -> {self.neighbor_id} ({self.kind} #{self.rank})"
+    
+    @classmethod
+    def next_up(cls, user, section=None, limit=5):
+        """Unfinished content that is most often completed alongside what user completed.
+
+        One query: the scores of all "completed together" neighbours of the
+        user's completed items are summed per candidate item.
+        """
+        completed = UserProgress.objects.filter(user=user, is_completed=True).values('content_id')
+        candidates = Content.objects.filter(
+            is_active=True,
+            neighbor_of__kind='completion',
+            neighbor_of__content__in=completed,
+        ).exclude(id__in=completed)
+        if section is not None:
+            candidates = candidates.filter(section=section)
+        return (
+            candidates.annotate(recommendation_score=models.Sum('neighbor_of__score'))
+            .select_related('section')
+            .defer('text_content', 'text_html')
+            .order_by('-recommendation_score', 'id')[:limit]
+        )
+
+class NeighborBuild(models.Model):
+    """When each kind of ContentNeighbor list was last rebuilt (drives incremental rebuilds)"""
+    kind = models.CharField(max_length=10, choices=ContentNeighbor.KIND_CHOICES, unique=True)
+    built_at = models.DateTimeField()
+    items = models.PositiveIntegerField(default=0)
+    rows = models.PositiveIntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.kind} built {self.built_at:%Y-%m-%d %H:%M}"
+    
+    @classmethod
+    def record(cls, kind, built_at, items, rows):
+        cls.objects.update_or_create(kind=kind, defaults={'built_at': built_at, 'items': items, 'rows': rows})
+
+class CompletionDistribution(models.Model):
+    """How many completions the learners of a section have, rebuilt by build_cohort_percentiles.
+    
+    Learners are the users who have completed anything in any section.
+    fewer_than packs, for every completion count c from 0 to max_completions + 1,
+    the number of learners with fewer than c completions in the section as a
+    little-endian uint32, so where one learner stands is a single lookup.
+    """
+    section = models.OneToOneField(Section, on_delete=models.CASCADE, related_name='completion_distribution')
+    learners = models.PositiveIntegerField()
+    max_completions = models.PositiveIntegerField()
+    median = models.FloatField()
+    p75 = models.FloatField()
+    p90 = models.FloatField()
+    fewer_than = models.BinaryField()
+    built_at = models.DateTimeField()
+    
+    def __str__(self):
+        return f"{self.section.title}: {self.learners} learners, median {self.median:g}"
+    
+    def ahead_of(self, completed):
+        """Percentage of learners with fewer completions than completed"""
+        if not self.learners:
+            return 0
+        index = min(completed, self.max_completions + 1)
+        (fewer,) = struct.unpack_from('<I', self.fewer_than, 4 * index)
+        return 100 * fewer / self.learners
 
 class WhiteboardImage(models.Model):
     title = models.CharField(max_length=200, default="Whiteboard Session")
@@ -179,16 +458,304 @@ class SpellingMistake(models.Model):
     user = models.ForeignKey(SimpleUser, on_delete=models.CASCADE, related_name='spelling_mistakes')
     incorrect_word = models.CharField(max_length=100, help_text="The word you spelled incorrectly")
     correct_word = models.CharField(max_length=100, help_text="The correct spelling")
+    # Casefolded copies used for dedup lookups and the unique constraint
+    incorrect_normalized = models.CharField(max_length=100, default='', editable=False)
+    correct_normalized = models.CharField(max_length=100, default='', editable=False)
     context = models.TextField(blank=True, help_text="Sentence or context where you made the mistake")
     notes = models.TextField(blank=True, help_text="Your notes about why you made this mistake")
     frequency = models.PositiveIntegerField(default=1, help_text="How many times you've made this mistake")
     is_reviewed = models.BooleanField(default=False, help_text="Mark as reviewed after studying")
+    
+    # SM-2 spaced repetition schedule
+    ease_factor = models.FloatField(default=2.5, help_text="SM-2 ease factor (minimum 1.3)")
+    interval_days = models.PositiveIntegerField(default=0, help_text="Days until the next review")
+    repetitions = models.PositiveIntegerField(default=0, help_text="Consecutive successful reviews")
+    due_at = models.DateTimeField(default=timezone.now, help_text="When this mistake is next due for review")
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-updated_at']
-        unique_together = ['user', 'incorrect_word', 'correct_word']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'incorrect_normalized', 'correct_normalized'],
+                name='spelling_user_normalized_uniq',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'due_at'], name='spelling_user_due_idx'),
+        ]
     
     def __str__(self):
         return f"{self.incorrect_word} → {self.correct_word} ({self.user.name})"
+    
+    def save(self, *args, **kwargs):
+        self.incorrect_normalized = fold_word(self.incorrect_word)
+        self.correct_normalized = fold_word(self.correct_word)
+        super().save(*args, **kwargs)
+    
+    @classmethod
+    def find_existing(cls, user, incorrect_word, correct_word):
+        """Look up a mistake through the normalized unique index"""
+        return cls.objects.filter(
+            user=user,
+            incorrect_normalized=fold_word(incorrect_word),
+            correct_normalized=fold_word(correct_word),
+        ).first()
+    
+    @classmethod
+    def due_for_review(cls, user, limit=10, now=None):
+        """Get the next due mistakes for a user, oldest due first"""
+        now = now or timezone.now()
+        return cls.objects.filter(user=user, due_at__lte=now).order_by('due_at')[:limit]
+    
+    @classmethod
+    def bulk_record(cls, user, entries, now=None):
+        """Upsert (incorrect, correct, context, count) entries in one transaction.
+
+        Existing mistakes (matched on the normalized columns) get their frequency
+        incremented with F() expressions and go back to the front of the
+        review queue; new ones are inserted with bulk_create. Returns a
+        (created, updated) tuple.
+        """
+        now = now or timezone.now()
+        
+        merged = {}
+        for incorrect_word, correct_word, context, count in entries:
+            key = (fold_word(incorrect_word), fold_word(correct_word))
+            if key in merged:
+                merged[key]['count'] += count
+                merged[key]['context'] = merged[key]['context'] or context
+            else:
+                merged[key] = {
+                    'incorrect_word': incorrect_word,
+                    'correct_word': correct_word,
+                    'context': context,
+                    'count': count,
+                }
+        if not merged:
+            return 0, 0
+        
+        with transaction.atomic():
+            existing = {}
+            matches = cls.objects.filter(
+                user=user,
+                incorrect_normalized__in={key[0] for key in merged},
+            ).values_list('id', 'incorrect_normalized', 'correct_normalized')
+            for mistake_id, incorrect_normalized, correct_normalized in matches:
+                existing[(incorrect_normalized, correct_normalized)] = mistake_id
+            
+            # Group existing rows by increment so each distinct count is one UPDATE
+            increments = {}
+            new_mistakes = []
+            for key, entry in merged.items():
+                if key in existing:
+                    increments.setdefault(entry['count'], []).append(existing[key])
+                else:
+                    new_mistakes.append(cls(
+                        user=user,
+                        incorrect_word=entry['incorrect_word'],
+                        correct_word=entry['correct_word'],
+                        incorrect_normalized=key[0],
+                        correct_normalized=key[1],
+                        context=entry['context'],
+                        frequency=entry['count'],
+                        due_at=now,
+                    ))
+            
+            for count, mistake_ids in increments.items():
+                cls.objects.filter(id__in=mistake_ids).update(
+                    frequency=F('frequency') + count,
+                    is_reviewed=False,
+                    repetitions=0,
+                    interval_days=0,
+                    due_at=now,
+                    updated_at=now,
+                )
+            cls.objects.bulk_create(new_mistakes)
+            DailyActivity.record(user, timezone.localdate(now), spelling_entries=len(merged))
+        
+        return len(new_mistakes), len(merged) - len(new_mistakes)
+    
+    def schedule_review(self, quality, now=None):
+        """Apply an SM-2 review graded 0 (forgot) to 5 (perfect recall)"""
+        now = now or timezone.now()
+        quality = max(0, min(5, int(quality)))
+        self.repetitions, self.interval_days, self.ease_factor = sm2_review(
+            self.repetitions, self.interval_days, self.ease_factor, quality
+        )
+        self.due_at = now + timedelta(days=self.interval_days)
+        self.is_reviewed = quality >= 3
+    
+    def reset_schedule(self, now=None):
+        """Put the mistake back at the front of the review queue"""
+        self.repetitions = 0
+        self.interval_days = 0
+        self.due_at = now or timezone.now()
+
+class SearchLog(models.Model):
+    """One search from the home page or the search page, written in batches (see search_log.py)"""
+    SCOPE_CHOICES = [
+        ('home', 'Home page'),
+        ('search', 'Search page'),
+    ]
+    
+    query = models.CharField(max_length=200, blank=True, help_text="Normalized query")
+    scope = models.CharField(max_length=10, choices=SCOPE_CHOICES)
+    section = models.CharField(max_length=20, blank=True)
+    content_type = models.CharField(max_length=10, blank=True)
+    tag = models.CharField(max_length=50, blank=True)
+    result_count = models.PositiveIntegerField()
+    close_matches = models.BooleanField(default=False, help_text="Results are typo-tolerant title matches")
+    duration_ms = models.FloatField(help_text="Time spent finding and loading the results")
+    searched_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['searched_at'], name='search_log_time_idx'),
+        ]
+    
+    def __str__(self):
+        return f'"{self.query}" ({self.result_count} results)'
+
+class DailySearchSummary(models.Model):
+    """SearchLog rows aggregated per day and query by the rollup_search_logs command"""
+    date = models.DateField()
+    query = models.CharField(max_length=200, blank=True)
+    searches = models.PositiveIntegerField()
+    zero_results = models.PositiveIntegerField(help_text="Searches that found nothing, not even close matches")
+    close_matches = models.PositiveIntegerField(help_text="Searches answered with typo-tolerant title matches")
+    average_results = models.FloatField()
+    average_duration_ms = models.FloatField()
+    max_duration_ms = models.FloatField()
+    
+    class Meta:
+        ordering = ['-date', '-searches', 'query']
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'query'], name='daily_search_summary_uniq'),
+        ]
+    
+    def __str__(self):
+        return f'{self.date}: "{self.query}" x{self.searches}'
+    
+    @classmethod
+    def rollup(cls, date):
+        """Replace the summaries of date with that day's SearchLog rows; returns the summaries written"""
+        start = timezone.make_aware(datetime.combine(date, datetime.min.time()))
+        end = timezone.make_aware(datetime.combine(date + timedelta(days=1), datetime.min.time()))
+        rows = (
+            SearchLog.objects.filter(searched_at__gte=start, searched_at__lt=end)
+            .values('query')
+            .annotate(
+                searches=models.Count('id'),
+                zero_results=models.Count('id', filter=models.Q(result_count=0)),
+                close_matches=models.Count('id', filter=models.Q(close_matches=True)),
+                average_results=models.Avg('result_count'),
+                average_duration_ms=models.Avg('duration_ms'),
+                max_duration_ms=models.Max('duration_ms'),
+            )
+            .order_by()
+        )
+        summaries = [cls(date=date, **row) for row in rows]
+        with transaction.atomic():
+            cls.objects.filter(date=date).delete()
+            cls.objects.bulk_create(summaries, batch_size=500)
+        return len(summaries)
+
+class DailyActivity(models.Model):
+    """Per-user, per-day study activity, kept up to date by the write paths.
+    
+    Completions and favorites count the items whose completed_at /
+    favorited_at falls on the day (undoing one takes it off that day);
+    spelling entries and whiteboard saves count events. Streaks and the
+    progress heatmap are read from here in one range query.
+    """
+    user = models.ForeignKey(SimpleUser, on_delete=models.CASCADE, related_name='daily_activity', db_index=False)
+    date = models.DateField()
+    completions = models.PositiveIntegerField(default=0)
+    favorites = models.PositiveIntegerField(default=0)
+    spelling_entries = models.PositiveIntegerField(default=0)
+    whiteboard_saves = models.PositiveIntegerField(default=0)
+    
+    COUNTERS = ['completions', 'favorites', 'spelling_entries', 'whiteboard_saves']
+    # Heatmap shade: level N once a day's total reaches LEVELS[N - 1]
+    LEVELS = (1, 3, 6, 10)
+    
+    class Meta:
+        ordering = ['user', 'date']
+        # Also the index for the (user, date range) calendar query
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'date'], name='daily_activity_user_date_uniq'),
+        ]
+        verbose_name_plural = 'daily activity'
+    
+    def __str__(self):
+        return f"{self.user.name} - {self.date}: {self.total}"
+    
+    @property
+    def total(self):
+        return self.completions + self.favorites + self.spelling_entries + self.whiteboard_saves
+    
+    @classmethod
+    def record(cls, user, day=None, **counts):
+        """Add counts (e.g. completions=1, or -1 to undo) to user's activity on day (default: today)"""
+        day = day or timezone.localdate()
+        changes = {field: Greatest(F(field) + count, Value(0)) for field, count in counts.items()}
+        if cls.objects.filter(user=user, date=day).update(**changes):
+            return
+        if all(count <= 0 for count in counts.values()):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(user=user, date=day, **{field: max(count, 0) for field, count in counts.items()})
+        except IntegrityError:
+            # Another request created the day first
+            cls.objects.filter(user=user, date=day).update(**changes)
+    
+    @classmethod
+    def calendar(cls, user, days=365, today=None):
+        """Heatmap weeks, streaks and totals of user's activity over the given number of days up to today.
+        
+        weeks is a list of Monday-first weeks of seven cells, each None
+        (outside the range) or a dict of date, total and level (0-4).
+        Streaks only look as far back as the range.
+        """
+        today = today or timezone.localdate()
+        start = today - timedelta(days=days - 1)
+        rows = {row.date: row for row in cls.objects.filter(user=user, date__range=(start, today))}
+        active = {date for date, row in rows.items() if row.total}
+        
+        weeks = []
+        day = start - timedelta(days=start.weekday())
+        while day <= today:
+            week = []
+            for _ in range(7):
+                if start <= day <= today:
+                    total = rows[day].total if day in rows else 0
+                    week.append({'date': day, 'total': total, 'level': sum(total >= level for level in cls.LEVELS)})
+                else:
+                    week.append(None)
+                day += timedelta(days=1)
+            weeks.append(week)
+        
+        # A streak is still current until a whole day passes without activity
+        current_streak = 0
+        day = today if today in active else today - timedelta(days=1)
+        while day in active:
+            current_streak += 1
+            day -= timedelta(days=1)
+        longest_streak = run = 0
+        previous = None
+        for day in sorted(active):
+            run = run + 1 if previous == day - timedelta(days=1) else 1
+            longest_streak = max(longest_streak, run)
+            previous = day
+        
+        return {
+            'weeks': weeks,
+            'current_streak': current_streak,
+            'longest_streak': longest_streak,
+            'active_days': len(active),
+            'totals': {field: sum(getattr(row, field) for row in rows.values()) for field in cls.COUNTERS},
+        }
@@ -0,0 +1,94 @@
+"""Detect repeated identical SQL statements (N+1 query patterns).
+
+Each query is reduced to a fingerprint with literals and IN-lists
+collapsed; when one fingerprint runs more than the threshold number of
+times in a request, the template line and guide code line that triggered
+it are reported.
+"""
+import logging
+import os
+import re
+import sys
+from collections import Counter
+
+logger = logging.getLogger('guide.query_patterns')
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+IGNORED_FILES = {
+    os.path.join(APP_DIR, 'query_patterns.py'),
+    os.path.join(APP_DIR, 'middleware.py'),
+    os.path.join(APP_DIR, 'metrics.py'),
+}
+
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+PLACEHOLDER_LIST = re.compile(r'\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)')
+WHITESPACE = re.compile(r'\s+')
+
+
+class RepeatedQueryError(Exception):
+    """Raised in 'fail' mode when a request repeats the same query too often"""
+
+
+def fingerprint(sql):
+    """Normalize SQL so statements differing only in parameters compare equal"""
+    sql = STRING_LITERAL.sub('?', sql)
+    sql = NUMBER_LITERAL.sub('?', sql)
+    sql = PLACEHOLDER_LIST.sub('(...)', sql)
+    return WHITESPACE.sub(' ', sql).strip()
+
+
+def query_origin():
+    """Find the template line and guide source line running the current query"""
+    template_origin = None
+    code_origin = None
+    frame = sys._getframe(1)
+    while frame is not None and (template_origin is None or code_origin is None):
+        code = frame.f_code
+        if template_origin is None and code.co_name == 'render_annotated':
+            node = frame.f_locals.get('self')
+            token = getattr(node, 'token', None)
+            origin = getattr(node, 'origin', None)
+            if token is not None and origin is not None:
+                template_origin = f'{origin.template_name}:{token.lineno}'
+        filename = os.path.abspath(code.co_filename)
+        if (code_origin is None and filename.startswith(APP_DIR + os.sep)
+                and filename not in IGNORED_FILES):
+            code_origin = f'{os.path.relpath(filename, os.path.dirname(APP_DIR))}:{frame.f_lineno}'
+        frame = frame.f_back
+    return template_origin, code_origin
+
+
+class QueryPatternDetector:
+    """connection.execute_wrapper hook that counts query fingerprints"""
+
+    def __init__(self, threshold=5):
+        self.threshold = threshold
+        self.counts = Counter()
+        self.origins = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        key = fingerprint(sql)
+        self.counts[key] += 1
+        # Only pay for the stack walk once a pattern crosses the threshold
+        if self.counts[key] == self.threshold + 1:
+            self.origins[key] = query_origin()
+        return execute(sql, params, many, context)
+
+    def repeated(self):
+        """(fingerprint, count, (template_origin, code_origin)) for offending queries"""
+        return [
+            (key, count, self.origins.get(key, (None, None)))
+            for key, count in self.counts.most_common()
+            if count > self.threshold
+        ]
+
+    def report(self, label):
+        lines = [f'Repeated queries in {label}:']
+        for key, count, (template_origin, code_origin) in self.repeated():
+            lines.append(f'  {count}x {key}')
+            if template_origin:
+                lines.append(f'    template: {template_origin}')
+            if code_origin:
+                lines.append(f'    code: {code_origin}')
+        return '\n'.join(lines)
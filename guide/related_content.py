@@ -0,0 +1,197 @@
+"""Batch computation of "similar text" content neighbours.
+
+Every active content item is tokenized (title, description and body) into a
+TF-IDF vector; the vectors form a sparse items x terms matrix with unit-length
+rows, so the dot product of two rows is their cosine similarity. Similarities
+are computed for a block of items against all items at a time, which bounds
+memory at block_size x items floats, and only the top N neighbours of each
+item are kept, in ContentNeighbor (kind 'text').
+
+A rebuild is incremental when few items changed since the last one: only
+the changed items are compared with everything, and other items' lists are
+patched with the changed items that now outrank their current neighbours.
+"""
+import math
+import re
+from collections import Counter
+
+import numpy as np
+from django.utils import timezone
+from scipy import sparse
+
+from .models import Content, ContentNeighbor, NeighborBuild
+from .recommendations import replace_neighbors
+
+TOKEN = re.compile(r"[a-z][a-z0-9']*[a-z0-9]")
+HTML_TAG = re.compile(r'<[^>]+>')
+STOP_WORDS = frozenset('''
+    a about above after again against all also am an and any are as at be because been before being below between
+    both but by can could did do does doing down during each few for from further had has have having he her here
+    hers herself him himself his how i if in into is it its itself just me more most my myself no nor not now of
+    off on once only or other our ours ourselves out over own same she should so some such than that the their
+    theirs them themselves then there these they this those through to too under until up very was we were what
+    when where which while who whom why will with would you your yours yourself yourselves
+'''.split())
+TITLE_WEIGHT = 2
+
+
+def tokenize(text):
+    return [token for token in TOKEN.findall(HTML_TAG.sub(' ', (text or '').lower())) if token not in STOP_WORDS]
+
+
+def document_terms(content):
+    """Term counts for one content item, with the title counted TITLE_WEIGHT times"""
+    terms = Counter(tokenize(content.description))
+    terms.update(tokenize(content.text_content))
+    for _ in range(TITLE_WEIGHT):
+        terms.update(tokenize(content.title))
+    return terms
+
+
+def tfidf_matrix(documents, max_df=0.5):
+    """Unit-length TF-IDF rows (CSR, float32) for a list of term Counters.
+
+    Terms in more than max_df of the documents carry little meaning and are
+    dropped. Terms found in a single document are left out of the matrix
+    (they cannot make two items similar) but still count towards each row's
+    length, so the cosine similarities are the same as with the full vocabulary.
+    """
+    count = len(documents)
+    document_frequency = Counter()
+    for terms in documents:
+        document_frequency.update(terms.keys())
+    max_documents = max(2, max_df * count)
+    idf = {
+        term: math.log((1 + count) / (1 + frequency)) + 1
+        for term, frequency in document_frequency.items() if frequency <= max_documents
+    }
+    vocabulary = {term: column for column, term in enumerate(
+        sorted(term for term in idf if document_frequency[term] > 1)
+    )}
+
+    indptr, indices, data, norms = [0], [], [], []
+    for terms in documents:
+        length = 0.0
+        for term, occurrences in terms.items():
+            weight = idf.get(term)
+            if weight is None:
+                continue
+            weight *= 1 + math.log(occurrences)
+            length += weight * weight
+            column = vocabulary.get(term)
+            if column is not None:
+                indices.append(column)
+                data.append(weight)
+        indptr.append(len(indices))
+        norms.append(math.sqrt(length) or 1.0)
+
+    matrix = sparse.csr_matrix(
+        (np.array(data, dtype=np.float32), np.array(indices, dtype=np.int32), np.array(indptr, dtype=np.int64)),
+        shape=(count, len(vocabulary)),
+    )
+    return sparse.diags(1 / np.array(norms, dtype=np.float32)) @ matrix
+
+
+def top_n_similar(matrix, rows, top_n=10, min_score=0.05, block_size=256):
+    """Yield (row, neighbour rows, scores), best first, for the given row positions"""
+    transposed = matrix.T.tocsc()
+    for start in range(0, len(rows), block_size):
+        block = rows[start:start + block_size]
+        scores = (matrix[block] @ transposed).toarray()
+        scores[np.arange(len(block)), block] = 0  # an item is not its own neighbour
+        keep = min(top_n, scores.shape[1])
+        best = np.argpartition(-scores, keep - 1, axis=1)[:, :keep]
+        best_scores = np.take_along_axis(scores, best, axis=1)
+        order = np.argsort(-best_scores, axis=1, kind='stable')
+        best = np.take_along_axis(best, order, axis=1)
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+        for offset, row in enumerate(block):
+            mask = best_scores[offset] >= min_score
+            yield row, best[offset][mask], best_scores[offset][mask]
+
+
+def build_text_neighbors(top_n=10, min_score=0.05, block_size=256, full=False, max_changed=0.2):
+    """Rebuild "similar text" neighbours; returns (mode, items updated, rows written).
+
+    Falls back to a full rebuild when there is no previous build or more than
+    max_changed of the items changed since it.
+    """
+    started_at = timezone.now()
+    contents = list(
+        Content.objects.filter(is_active=True)
+        .only('id', 'title', 'description', 'text_content', 'updated_at').order_by('id')
+    )
+    content_ids = np.array([content.id for content in contents], dtype=np.int64)
+    matrix = tfidf_matrix([document_terms(content) for content in contents])
+    position = {int(content_id): row for row, content_id in enumerate(content_ids)}
+
+    last_build = NeighborBuild.objects.filter(kind='text').first()
+    changed = []
+    if last_build is not None and not full:
+        changed = [row for row, content in enumerate(contents) if content.updated_at >= last_build.built_at]
+    if last_build is None or full or len(changed) > max_changed * max(len(contents), 1):
+        rows = []
+        items = 0
+        if len(contents) > 1:
+            for row, neighbors, scores in top_n_similar(matrix, np.arange(len(contents)), top_n, min_score, block_size):
+                items += 1
+                rows.extend(neighbor_rows(content_ids, row, neighbors.tolist(), scores.tolist()))
+        replace_neighbors('text', rows)
+        NeighborBuild.record('text', started_at, items, len(rows))
+        return 'full', items, len(rows)
+
+    # Previous lists, as {row: [(neighbour row, score), ...]}; items that are
+    # gone or inactive have no row and are dropped from every list.
+    previous = {}
+    stale_ids = set()
+    for content_id, neighbor_id, score in (
+        ContentNeighbor.objects.filter(kind='text').order_by('content_id', 'rank')
+        .values_list('content_id', 'neighbor_id', 'score').iterator(chunk_size=10000)
+    ):
+        if content_id not in position:
+            stale_ids.add(content_id)
+        else:
+            previous.setdefault(position[content_id], []).append((position.get(neighbor_id), score))
+
+    changed_set = set(changed)
+    # Items whose list lost an entry are recomputed exactly, like changed items
+    recompute = set(changed)
+    for row, neighbors in previous.items():
+        if any(neighbor is None or neighbor in changed_set for neighbor, _ in neighbors):
+            recompute.add(row)
+
+    updated = {}
+    if recompute and len(contents) > 1:
+        recompute_rows = np.array(sorted(recompute), dtype=np.int64)
+        for row, neighbors, scores in top_n_similar(matrix, recompute_rows, top_n, min_score, block_size):
+            updated[row] = list(zip(neighbors.tolist(), scores.tolist()))
+        # Similarity is symmetric, so the changed items' scores against every
+        # item say where each changed item would rank in the others' lists
+        changed_rows = np.array(changed, dtype=np.int64)
+        for start in range(0, len(changed_rows), block_size):
+            block = changed_rows[start:start + block_size]
+            scores = (matrix[block] @ matrix.T).toarray()
+            for offset, changed_row in enumerate(block.tolist()):
+                candidates = np.flatnonzero(scores[offset] >= min_score).tolist()
+                for row in candidates:
+                    if row in recompute:
+                        continue
+                    current = updated.get(row, previous.get(row, []))
+                    if len(current) < top_n or scores[offset][row] > current[-1][1]:
+                        merged = sorted(current + [(changed_row, float(scores[offset][row]))], key=lambda pair: -pair[1])
+                        updated[row] = merged[:top_n]
+
+    rows = []
+    for row, neighbors in updated.items():
+        rows.extend(neighbor_rows(content_ids, row, [n for n, _ in neighbors], [s for _, s in neighbors]))
+    replace_neighbors('text', rows, content_ids=[int(content_ids[row]) for row in updated] + sorted(stale_ids))
+    NeighborBuild.record('text', started_at, len(updated), len(rows))
+    return 'incremental', len(updated), len(rows)
+
+
+def neighbor_rows(content_ids, row, neighbors, scores):
+    content_id = int(content_ids[row])
+    return [
+        (content_id, int(content_ids[neighbor]), rank, float(score))
+        for rank, (neighbor, score) in enumerate(zip(neighbors, scores), start=1)
+    ]
@@ -0,0 +1,183 @@
+"""Per-process cache of search results.
+
+A search scans every title, description and body with LIKE, which takes a
+few hundred milliseconds on a large catalogue, and popular queries
+("describe image", "essay") are asked over and over. The result cache
+keeps only the ordered ids of the matching content for each normalized
+query and set of filters; a hit costs a primary-key lookup of the rows
+that are displayed.
+
+Entries are dropped:
+
+* least recently used first, once more than SEARCH_CACHE_MAX_ENTRIES
+  entries or SEARCH_CACHE_MAX_IDS ids in total are held;
+* SEARCH_CACHE_TIMEOUT seconds after they were stored;
+* all at once when the content generation changes, i.e. when content or
+  a tag assignment is added, edited or removed, or a tag is renamed. Each
+  worker looks at the generation (three aggregate queries) at most every
+  SEARCH_CACHE_GENERATION_SECONDS, so edits made through another worker
+  show up within that delay.
+
+Lookups, hits and evictions are exported on /metrics/ for tuning the sizes.
+"""
+import string
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models import Count, Max, Q
+
+from .autocomplete import get_autocomplete_index
+from .metrics import search_cache_entries, search_cache_evictions, search_cache_ids, search_cache_requests
+from .models import Content, ContentTag, Tag
+
+# SQLite's LIKE only ignores ASCII case, so only ASCII letters are folded
+# to share a cache entry: the normalized query finds the same rows.
+ASCII_LOWERCASE = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def normalize_query(query):
+    """Collapse whitespace and ASCII case so equivalent queries share an entry"""
+    return ' '.join((query or '').split()).translate(ASCII_LOWERCASE)
+
+
+def text_filter(query):
+    return Q(title__icontains=query) | Q(description__icontains=query) | Q(text_content__icontains=query)
+
+
+class SearchResultCache:
+    """LRU map of search keys to (ordered content ids, close_matches)"""
+
+    def __init__(self, max_entries, max_ids, timeout):
+        self.max_entries = max_entries
+        self.max_ids = max_ids
+        self.timeout = timeout
+        self.generation = None
+        self._entries = OrderedDict()
+        self._ids = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, generation, scope):
+        with self._lock:
+            self._check_generation(generation)
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                self._remove(key, 'expired')
+                entry = None
+            if entry is None:
+                search_cache_requests.inc(scope, 'miss')
+                return None
+            self._entries.move_to_end(key)
+            search_cache_requests.inc(scope, 'hit')
+            return list(entry[1]), entry[2]
+
+    def set(self, key, generation, ids, close_matches=False):
+        if len(ids) > self.max_ids or not self.max_entries:
+            return
+        with self._lock:
+            self._check_generation(generation)
+            if key in self._entries:
+                self._remove(key, None)
+            self._entries[key] = (time.monotonic() + self.timeout, array('q', ids), close_matches)
+            self._ids += len(ids)
+            while len(self._entries) > self.max_entries or self._ids > self.max_ids:
+                self._remove(next(iter(self._entries)), 'lru')
+            self._update_gauges()
+
+    def clear(self, reason=None):
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key, reason)
+            self._update_gauges()
+
+    def _check_generation(self, generation):
+        if generation != self.generation:
+            for key in list(self._entries):
+                self._remove(key, 'generation')
+            self.generation = generation
+            self._update_gauges()
+
+    def _remove(self, key, reason):
+        _, ids, _ = self._entries.pop(key)
+        self._ids -= len(ids)
+        if reason:
+            search_cache_evictions.inc(reason)
+
+    def _update_gauges(self):
+        search_cache_entries.set(value=len(self._entries))
+        search_cache_ids.set(value=self._ids)
+
+
+result_cache = SearchResultCache(
+    settings.SEARCH_CACHE_MAX_ENTRIES, settings.SEARCH_CACHE_MAX_IDS, settings.SEARCH_CACHE_TIMEOUT,
+)
+
+_generation = {'value': None, 'checked_at': None}
+_generation_lock = threading.Lock()
+
+
+def content_generation():
+    """Changes whenever content or its tags are added, edited, removed or renamed"""
+    contents = Content.objects.aggregate(
+        count=Count('id'), active=Count('id', filter=Q(is_active=True)), updated=Max('updated_at'),
+    )
+    tags = ContentTag.objects.aggregate(count=Count('id'), last=Max('id'))
+    # Tag filters match by name, so a renamed tag changes results too
+    renamed = Tag.objects.aggregate(updated=Max('updated_at'))
+    return (
+        contents['count'], contents['active'], contents['updated'], tags['count'], tags['last'], renamed['updated'],
+    )
+
+
+def current_generation():
+    """content_generation(), queried at most every SEARCH_CACHE_GENERATION_SECONDS"""
+    now = time.monotonic()
+    with _generation_lock:
+        checked_at = _generation['checked_at']
+        if checked_at is None or now - checked_at >= settings.SEARCH_CACHE_GENERATION_SECONDS:
+            _generation['value'] = content_generation()
+            _generation['checked_at'] = now
+        return _generation['value']
+
+
+def find_content_ids(query, filters, limit=None, close_matches=0):
+    """(ids of content matching query and filters, newest first, whether they are close matches).
+
+    With close_matches=N, a query that no content contains falls back to up
+    to N titles matching its words with typos, best match first.
+    """
+    matching = Content.objects.filter(**filters)
+    if query:
+        matching = matching.filter(text_filter(query))
+    ids = list(matching.order_by('-created_at').values_list('id', flat=True)[:limit])
+    if ids or not query or not close_matches:
+        return ids, False
+    ranked_ids = [
+        entry['id'] for entry in get_autocomplete_index().search(query, limit=close_matches)
+        if entry['type'] == 'content'
+    ]
+    allowed = set(Content.objects.filter(id__in=ranked_ids, **filters).values_list('id', flat=True))
+    ids = [content_id for content_id in ranked_ids if content_id in allowed]
+    return ids, bool(ids)
+
+
+def search_content_ids(scope, query, filters, limit=None, close_matches=0):
+    """find_content_ids() through the result cache; scope names the caller in the metrics"""
+    key = (query, tuple(sorted(filters.items())), limit, close_matches)
+    generation = current_generation()
+    result = result_cache.get(key, generation, scope)
+    if result is None:
+        result = find_content_ids(query, filters, limit, close_matches)
+        result_cache.set(key, generation, *result)
+    return result
+
+
+def load_contents(ids):
+    """Active content rows (with their section) for ids, in the same order"""
+    found = Content.objects.filter(is_active=True).select_related('section').in_bulk(ids)
+    return [found[content_id] for content_id in ids if content_id in found]
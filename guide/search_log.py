@@ -0,0 +1,107 @@
+"""Buffered search analytics.
+
+Every search from the home page and the search page is recorded as a
+SearchLog row, but not while the search is being answered: rows are
+appended to an in-memory buffer and written with one bulk_create after a
+request has finished, once SEARCH_LOG_BATCH_SIZE rows are waiting or the
+oldest has waited SEARCH_LOG_FLUSH_SECONDS.
+
+The buffer is per worker. What is left in it is written when the process
+exits (gunicorn's worker_exit hook, or atexit under other servers); a
+worker killed outright loses at most one batch. If the database refuses a
+batch it is dropped rather than retried, so analytics can never slow
+searches down or break them; both outcomes are counted on /metrics/.
+"""
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import DatabaseError
+
+from .metrics import search_log_rows
+from .models import SearchLog
+
+logger = logging.getLogger('guide.search_log')
+
+
+def truncate(value, field_name):
+    return (value or '')[:SearchLog._meta.get_field(field_name).max_length]
+
+
+class SearchLogBuffer:
+    def __init__(self, batch_size, flush_seconds, max_buffered):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.max_buffered = max_buffered
+        self._rows = []
+        self._oldest = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._rows)
+
+    def add(self, scope, query, filters, result_count, close_matches, duration_ms):
+        """Buffer one search; filters are the Content filter kwargs it was restricted by"""
+        row = SearchLog(
+            query=truncate(query, 'query'),
+            scope=scope,
+            section=truncate(filters.get('section__name'), 'section'),
+            content_type=truncate(filters.get('content_type'), 'content_type'),
+            tag=truncate(filters.get('content_tags__tag__name'), 'tag'),
+            result_count=result_count,
+            close_matches=close_matches,
+            duration_ms=duration_ms,
+        )
+        with self._lock:
+            if not self._rows:
+                self._oldest = time.monotonic()
+            self._rows.append(row)
+            # The database has been refusing batches; keep memory bounded
+            if len(self._rows) > self.max_buffered:
+                del self._rows[0]
+                search_log_rows.inc('dropped')
+
+    def is_due(self):
+        return bool(self._rows) and (
+            len(self._rows) >= self.batch_size or time.monotonic() - self._oldest >= self.flush_seconds
+        )
+
+    def flush(self):
+        """Write every buffered row; returns how many were written"""
+        with self._lock:
+            rows, self._rows = self._rows, []
+        if not rows:
+            return 0
+        try:
+            SearchLog.objects.bulk_create(rows, batch_size=self.batch_size)
+        except DatabaseError:
+            logger.exception('Dropped %s search log rows', len(rows))
+            search_log_rows.inc('dropped', amount=len(rows))
+            return 0
+        search_log_rows.inc('written', amount=len(rows))
+        return len(rows)
+
+    def flush_if_due(self):
+        if self.is_due():
+            self.flush()
+
+    def clear(self):
+        with self._lock:
+            self._rows = []
+
+
+search_log = SearchLogBuffer(
+    settings.SEARCH_LOG_BATCH_SIZE, settings.SEARCH_LOG_FLUSH_SECONDS, settings.SEARCH_LOG_MAX_BUFFERED,
+)
+
+
+def flush_after_request(**kwargs):
+    # Runs once the response has been sent, so no search waits for the write
+    search_log.flush_if_due()
+
+
+request_finished.connect(flush_after_request, dispatch_uid='guide.search_log')
+atexit.register(search_log.flush)
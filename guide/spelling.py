@@ -0,0 +1,243 @@
+import csv
+import io
+import re
+
+WORD_STRIP_CHARS = ' \t\r\n.,;:!?"\'()[]{}<>'
+PAIR_SEPARATORS = re.compile(r'\s*(?:->|→|=>|,|\t|:)\s*')
+SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+')
+VOWELS = set('aeiouy')
+
+MISTAKE_CATEGORIES = [
+    ('doubled_letter', 'Doubled / single letters'),
+    ('transposition', 'Swapped letters'),
+    ('vowel_swap', 'Wrong vowel'),
+    ('missing_letter', 'Missing letter'),
+    ('extra_letter', 'Extra letter'),
+    ('substitution', 'Wrong letter'),
+    ('other', 'Other'),
+]
+DISTANCE_BUCKETS = ['1', '2', '3+']
+
+
+def normalize_word(word):
+    """Strip surrounding whitespace/punctuation from a word"""
+    return (word or '').strip(WORD_STRIP_CHARS)
+
+
+def fold_word(word):
+    """Casefold a normalized word for case-insensitive dedup"""
+    return normalize_word(word).casefold()
+
+
+def edit_distance(a, b, max_distance=2):
+    """Optimal string alignment distance (Levenshtein plus transpositions).
+
+    Returns max_distance + 1 as soon as the distance is known to exceed it.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous_previous = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous_previous, previous = previous, current
+    return previous[-1]
+
+
+def _is_doubling(longer, shorter):
+    """True if longer is shorter with one letter doubled"""
+    for i in range(len(longer)):
+        if longer[:i] + longer[i + 1:] == shorter:
+            if (i > 0 and longer[i - 1] == longer[i]) or (i + 1 < len(longer) and longer[i + 1] == longer[i]):
+                return True
+    return False
+
+
+def classify_mistake(incorrect_word, correct_word):
+    """Put a (normalized) mistake into one of MISTAKE_CATEGORIES"""
+    if len(incorrect_word) == len(correct_word):
+        diffs = [i for i, (a, b) in enumerate(zip(incorrect_word, correct_word)) if a != b]
+        if (len(diffs) == 2 and diffs[1] == diffs[0] + 1
+                and incorrect_word[diffs[0]] == correct_word[diffs[1]]
+                and incorrect_word[diffs[1]] == correct_word[diffs[0]]):
+            return 'transposition'
+        if diffs and all(incorrect_word[i] in VOWELS and correct_word[i] in VOWELS for i in diffs):
+            return 'vowel_swap'
+        if len(diffs) == 1:
+            return 'substitution'
+        return 'other'
+
+    if len(incorrect_word) + 1 == len(correct_word):
+        if _is_doubling(correct_word, incorrect_word):
+            return 'doubled_letter'
+        if edit_distance(incorrect_word, correct_word, 1) == 1:
+            return 'missing_letter'
+    elif len(incorrect_word) == len(correct_word) + 1:
+        if _is_doubling(incorrect_word, correct_word):
+            return 'doubled_letter'
+        if edit_distance(incorrect_word, correct_word, 1) == 1:
+            return 'extra_letter'
+    return 'other'
+
+
+def distance_bucket(incorrect_word, correct_word):
+    distance = edit_distance(incorrect_word, correct_word, 3)
+    return '3+' if distance >= 3 else str(max(distance, 1))
+
+
+def summarize_mistakes(rows, top_n=10):
+    """Aggregate an iterable of (incorrect, correct, frequency) rows.
+
+    Rows are consumed in a single pass so a large history can be streamed
+    from the database in chunks. Category and distance totals are reported
+    both as distinct mistakes and weighted by frequency.
+    """
+    categories = {key: {'mistakes': 0, 'weighted': 0} for key, _ in MISTAKE_CATEGORIES}
+    distances = {bucket: {'mistakes': 0, 'weighted': 0} for bucket in DISTANCE_BUCKETS}
+    top_mistakes = []
+    total_mistakes = 0
+    total_frequency = 0
+
+    for incorrect_word, correct_word, frequency in rows:
+        category = categories[classify_mistake(incorrect_word, correct_word)]
+        category['mistakes'] += 1
+        category['weighted'] += frequency
+        bucket = distances[distance_bucket(incorrect_word, correct_word)]
+        bucket['mistakes'] += 1
+        bucket['weighted'] += frequency
+        total_mistakes += 1
+        total_frequency += frequency
+        top_mistakes.append((frequency, incorrect_word, correct_word))
+        # Keep the running top list bounded instead of sorting every row at the end
+        if len(top_mistakes) > top_n * 4:
+            top_mistakes = sorted(top_mistakes, reverse=True)[:top_n]
+
+    labels = dict(MISTAKE_CATEGORIES)
+    return {
+        'total_mistakes': total_mistakes,
+        'total_frequency': total_frequency,
+        'categories': sorted(
+            [
+                {
+                    'key': key,
+                    'label': labels[key],
+                    'mistakes': counts['mistakes'],
+                    'weighted': counts['weighted'],
+                    'share': (counts['weighted'] / total_frequency * 100) if total_frequency else 0,
+                }
+                for key, counts in categories.items()
+            ],
+            key=lambda c: c['weighted'],
+            reverse=True,
+        ),
+        'distances': [dict(bucket=bucket, **distances[bucket]) for bucket in DISTANCE_BUCKETS],
+        'top_mistakes': [
+            {'incorrect_word': incorrect_word, 'correct_word': correct_word, 'frequency': frequency}
+            for frequency, incorrect_word, correct_word in sorted(top_mistakes, reverse=True)[:top_n]
+        ],
+    }
+
+
+def merge_case_duplicates(model, dry_run=False):
+    """Merge spelling mistakes that only differ by case or punctuation.
+
+    Takes the SpellingMistake model class. The oldest row in each group
+    survives with the summed frequency; the rest are deleted. Also fills in
+    the normalized columns.
+    Returns a (merged_groups, deleted_rows) tuple.
+    """
+    groups = {}
+    for mistake in model.objects.order_by('id'):
+        key = (mistake.user_id, fold_word(mistake.incorrect_word), fold_word(mistake.correct_word))
+        groups.setdefault(key, []).append(mistake)
+
+    survivors = []
+    duplicate_ids = []
+    merged_groups = 0
+    for (_, incorrect_normalized, correct_normalized), mistakes in groups.items():
+        survivor = mistakes[0]
+        survivor.incorrect_normalized = incorrect_normalized
+        survivor.correct_normalized = correct_normalized
+        if len(mistakes) > 1:
+            merged_groups += 1
+            duplicates = mistakes[1:]
+            survivor.frequency = sum(m.frequency for m in mistakes)
+            survivor.is_reviewed = all(m.is_reviewed for m in mistakes)
+            survivor.due_at = min(m.due_at for m in mistakes)
+            # Prefer the most recently written context and notes
+            for duplicate in duplicates:
+                survivor.context = duplicate.context or survivor.context
+                survivor.notes = duplicate.notes or survivor.notes
+            duplicate_ids.extend(m.id for m in duplicates)
+        survivors.append(survivor)
+
+    if not dry_run:
+        model.objects.filter(id__in=duplicate_ids).delete()
+        model.objects.bulk_update(
+            survivors,
+            ['incorrect_normalized', 'correct_normalized', 'frequency', 'is_reviewed', 'due_at', 'context', 'notes'],
+            batch_size=500,
+        )
+    return merged_groups, len(duplicate_ids)
+
+
+def parse_correction_pairs(text):
+    """Parse 'incorrect -> correct' lines into (incorrect, correct) tuples.
+
+    Accepts '->', '→', '=>', ',', ':' or a tab as the separator. Blank lines
+    and lines without a separator are skipped.
+    """
+    pairs = []
+    for line in (text or '').splitlines():
+        parts = PAIR_SEPARATORS.split(line.strip(), maxsplit=1)
+        if len(parts) != 2:
+            continue
+        incorrect_word, correct_word = normalize_word(parts[0]), normalize_word(parts[1])
+        if incorrect_word and correct_word:
+            pairs.append((incorrect_word, correct_word))
+    return pairs
+
+
+def parse_correction_csv(data):
+    """Parse CSV rows of incorrect,correct[,context] into tuples"""
+    if isinstance(data, bytes):
+        data = data.decode('utf-8-sig', errors='replace')
+    rows = []
+    for row in csv.reader(io.StringIO(data)):
+        if len(row) < 2:
+            continue
+        incorrect_word, correct_word = normalize_word(row[0]), normalize_word(row[1])
+        if not incorrect_word or not correct_word:
+            continue
+        # Skip a header row if one is present
+        if incorrect_word.lower() == 'incorrect' and correct_word.lower() == 'correct':
+            continue
+        context = row[2].strip() if len(row) > 2 else ''
+        rows.append((incorrect_word, correct_word, context))
+    return rows
+
+
+def find_context(essay, word):
+    """Return the first sentence of the essay containing the word"""
+    if not essay:
+        return ''
+    pattern = re.compile(r'\b' + re.escape(word) + r'\b', re.IGNORECASE)
+    for sentence in SENTENCE_SPLIT.split(essay):
+        if pattern.search(sentence):
+            return sentence.strip()
+    return ''
+
+
+def count_occurrences(essay, word):
+    """Count how many times the word appears in the essay (at least once)"""
+    if not essay:
+        return 1
+    pattern = re.compile(r'\b' + re.escape(word) + r'\b', re.IGNORECASE)
+    return max(1, len(pattern.findall(essay)))
@@ -0,0 +1,355 @@
+// Read a cookie value (e.g. csrftoken for AJAX requests)
+function getCookie(name) {
+    let cookieValue = null;
+    if (document.cookie && document.cookie !== '') {
+        const cookies = document.cookie.split(';');
+        for (let i = 0; i < cookies.length; i++) {
+            const cookie = cookies[i].trim();
+            if (cookie.substring(0, name.length + 1) === (name + '=')) {
+                cookieValue = decodeURIComponent(cookie.substring(name.length + 1));
+                break;
+            }
+        }
+    }
+    return cookieValue;
+}
+
+// Pages are served compressed, so they carry no CSRF token (BREACH);
+// forms marked with data-csrf-url fetch one when they are about to be used.
+function fillCsrfToken(form) {
+    const input = form.querySelector('input[name="csrfmiddlewaretoken"]');
+    if (!input || input.value) {
+        return;
+    }
+    fetch(form.dataset.csrfUrl, {credentials: 'same-origin'})
+        .then(response => response.json())
+        .then(data => { input.value = data.csrf_token; });
+}
+
+document.addEventListener('show.bs.modal', function(event) {
+    event.target.querySelectorAll('form[data-csrf-url]').forEach(fillCsrfToken);
+});
+
+// Content bodies are not part of the section page; the first time a card is
+// expanded its pre-rendered HTML is fetched (and cached by the browser).
+document.addEventListener('click', function(event) {
+    const button = event.target.closest('[data-body-toggle]');
+    if (!button) {
+        return;
+    }
+    const card = document.getElementById(button.dataset.bodyToggle);
+    const body = card.querySelector('.content-text');
+    const icon = button.querySelector('i');
+    const expand = card.classList.contains('d-none');
+    if (expand && !card.dataset.loaded) {
+        body.textContent = 'Loading...';
+        fetch(card.dataset.bodyUrl)
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error(response.statusText);
+                }
+                return response.text();
+            })
+            .then(html => {
+                body.innerHTML = html;
+                card.dataset.loaded = 'true';
+            })
+            .catch(() => { body.textContent = 'Could not load this content. Please try again.'; });
+    }
+    card.classList.toggle('d-none', !expand);
+    icon.classList.toggle('fa-chevron-down', !expand);
+    icon.classList.toggle('fa-chevron-up', expand);
+});
+
+// Navbar search suggestions: titles and tags matching what has been typed,
+// fetched (debounced) from the in-memory autocomplete index.
+document.querySelectorAll('input[data-suggest-url]').forEach(function(input) {
+    const menu = input.parentElement.querySelector('.search-suggestions');
+    let timer = null;
+    let latest = '';
+
+    function hide() {
+        menu.classList.remove('show');
+    }
+
+    function show(suggestions) {
+        menu.replaceChildren();
+        suggestions.forEach(function(suggestion) {
+            const link = document.createElement('a');
+            link.className = 'dropdown-item text-truncate';
+            link.href = suggestion.url;
+            const icon = document.createElement('i');
+            icon.className = suggestion.type === 'tag' ? 'fas fa-tag text-muted me-2' : 'fas fa-file-alt text-muted me-2';
+            link.append(icon, suggestion.label);
+            menu.append(link);
+        });
+        menu.classList.toggle('show', suggestions.length > 0);
+    }
+
+    input.addEventListener('input', function() {
+        clearTimeout(timer);
+        const query = input.value.trim();
+        latest = query;
+        if (query.length < 2) {
+            hide();
+            return;
+        }
+        timer = setTimeout(function() {
+            fetch(input.dataset.suggestUrl + '?q=' + encodeURIComponent(query))
+                .then(response => response.json())
+                .then(data => {
+                    // Ignore answers to queries the user has typed past
+                    if (data.query === latest) {
+                        show(data.suggestions);
+                    }
+                })
+                .catch(hide);
+        }, 150);
+    });
+    input.addEventListener('keydown', function(event) {
+        if (event.key === 'Escape') {
+            hide();
+        } else if (event.key === 'ArrowDown' && menu.classList.contains('show')) {
+            event.preventDefault();
+            menu.querySelector('.dropdown-item').focus();
+        }
+    });
+    menu.addEventListener('keydown', function(event) {
+        const item = document.activeElement;
+        if (event.key === 'ArrowDown' && item.nextElementSibling) {
+            event.preventDefault();
+            item.nextElementSibling.focus();
+        } else if (event.key === 'ArrowUp') {
+            event.preventDefault();
+            (item.previousElementSibling || input).focus();
+        } else if (event.key === 'Escape') {
+            hide();
+            input.focus();
+        }
+    });
+    input.form.addEventListener('focusout', function(event) {
+        if (!input.form.contains(event.relatedTarget)) {
+            hide();
+        }
+    });
+});
+
+// Timer Variables
+let timerInterval = null;
+let timeLeft = 0;
+let totalTime = 0;
+let isRunning = false;
+let isCollapsed = true;
+
+// Audio context for sound alerts
+let audioContext = null;
+
+// Initialize audio context
+function initAudio() {
+    if (!audioContext) {
+        audioContext = new (window.AudioContext || window.webkitAudioContext)();
+    }
+}
+
+// Play beep sound
+function playBeep(frequency = 800, duration = 200) {
+    initAudio();
+    const oscillator = audioContext.createOscillator();
+    const gainNode = audioContext.createGain();
+
+    oscillator.connect(gainNode);
+    gainNode.connect(audioContext.destination);
+
+    oscillator.frequency.value = frequency;
+    oscillator.type = 'sine';
+
+    gainNode.gain.setValueAtTime(0.3, audioContext.currentTime);
+    gainNode.gain.exponentialRampToValueAtTime(0.01, audioContext.currentTime + duration / 1000);
+
+    oscillator.start(audioContext.currentTime);
+    oscillator.stop(audioContext.currentTime + duration / 1000);
+}
+
+// Format time display
+function formatTime(seconds) {
+    const mins = Math.floor(Math.abs(seconds) / 60);
+    const secs = Math.abs(seconds) % 60;
+    const sign = seconds < 0 ? '-' : '';
+    return `${sign}${mins.toString().padStart(2, '0')}:${secs.toString().padStart(2, '0')}`;
+}
+
+// Update timer display
+function updateDisplay() {
+    const display = document.getElementById('timerDisplay');
+    display.textContent = formatTime(timeLeft);
+
+    // Update widget appearance based on timer state
+    const widget = document.getElementById('timerWidget');
+    widget.classList.toggle('timer-running', isRunning);
+    widget.classList.toggle('timer-overtime', timeLeft < 0);
+
+    // Update page title
+    if (isRunning) {
+        document.title = `${formatTime(timeLeft)} - PTE Guide`;
+    } else if (document.title.includes(' - PTE Guide') && document.title.includes(':')) {
+        document.title = 'PTE Guide';
+    }
+}
+
+// Set timer to specific seconds
+function setTimer(seconds) {
+    if (isRunning) {
+        pauseTimer();
+    }
+    timeLeft = seconds;
+    totalTime = seconds;
+    updateDisplay();
+}
+
+// Start timer
+function startTimer() {
+    if (timeLeft <= 0) {
+        timeLeft = 300; // Default 5 minutes
+        totalTime = 300;
+    }
+
+    // Auto-expand timer when starting
+    if (isCollapsed) {
+        toggleTimer();
+    }
+
+    isRunning = true;
+    document.getElementById('startBtn').style.display = 'none';
+    document.getElementById('pauseBtn').style.display = 'inline-block';
+
+    timerInterval = setInterval(() => {
+        timeLeft--;
+        updateDisplay();
+
+        // Time's up notification
+        if (timeLeft === 0) {
+            playBeep(1000, 500);
+            showNotification('Time\'s up!', 'Your practice time has ended.');
+        }
+
+        // Warning beeps
+        if (timeLeft === 10 || timeLeft === 5 || timeLeft === 3 || timeLeft === 2 || timeLeft === 1) {
+            playBeep(600, 200);
+        }
+    }, 1000);
+
+    updateDisplay();
+}
+
+// Pause timer
+function pauseTimer() {
+    isRunning = false;
+    clearInterval(timerInterval);
+    document.getElementById('startBtn').style.display = 'inline-block';
+    document.getElementById('pauseBtn').style.display = 'none';
+    updateDisplay();
+}
+
+// Reset timer
+function resetTimer() {
+    isRunning = false;
+    clearInterval(timerInterval);
+    timeLeft = totalTime;
+    document.getElementById('startBtn').style.display = 'inline-block';
+    document.getElementById('pauseBtn').style.display = 'none';
+    updateDisplay();
+}
+
+// Toggle collapsed state
+function toggleTimer() {
+    // Don't allow collapsing while timer is running
+    if (isRunning && !isCollapsed) {
+        return;
+    }
+
+    isCollapsed = !isCollapsed;
+    const widget = document.getElementById('timerWidget');
+    const content = document.getElementById('timerContent');
+    const collapsed = document.getElementById('collapsedContent');
+    const btn = document.getElementById('collapseBtn');
+
+    if (isCollapsed) {
+        widget.classList.add('collapsed');
+        content.style.display = 'none';
+        collapsed.style.display = 'block';
+        btn.innerHTML = '<i class="fas fa-plus"></i>';
+    } else {
+        widget.classList.remove('collapsed');
+        content.style.display = 'block';
+        collapsed.style.display = 'none';
+        btn.innerHTML = '<i class="fas fa-minus"></i>';
+    }
+}
+
+// Show custom timer input
+function showCustomTimer() {
+    const minutes = prompt('Enter minutes for custom timer:', '5');
+    if (minutes && !isNaN(minutes) && minutes > 0) {
+        setTimer(parseInt(minutes) * 60);
+    }
+}
+
+// Show notification
+function showNotification(title, message) {
+    if (Notification.permission === 'granted') {
+        new Notification(title, {
+            body: message,
+            icon: '/static/img/timer-icon.png'
+        });
+    } else if (Notification.permission !== 'denied') {
+        Notification.requestPermission().then(permission => {
+            if (permission === 'granted') {
+                new Notification(title, {
+                    body: message,
+                    icon: '/static/img/timer-icon.png'
+                });
+            }
+        });
+    }
+
+    // Fallback alert
+    setTimeout(() => {
+        alert(`${title}\n${message}`);
+    }, 100);
+}
+
+// Keyboard shortcuts
+document.addEventListener('keydown', function(e) {
+    // Ctrl/Cmd + Space: Start/Pause timer
+    if ((e.ctrlKey || e.metaKey) && e.code === 'Space') {
+        e.preventDefault();
+        if (isRunning) {
+            pauseTimer();
+        } else {
+            startTimer();
+        }
+    }
+
+    // Ctrl/Cmd + R: Reset timer (prevent page reload)
+    if ((e.ctrlKey || e.metaKey) && e.key === 'r' && isRunning) {
+        e.preventDefault();
+        resetTimer();
+    }
+});
+
+// Request notification permission on page load
+document.addEventListener('DOMContentLoaded', function() {
+    if ('Notification' in window && Notification.permission === 'default') {
+        Notification.requestPermission();
+    }
+
+    // Initialize display
+    updateDisplay();
+});
+
+// Prevent timer from stopping when page is hidden
+document.addEventListener('visibilitychange', function() {
+    if (document.visibilityState === 'visible' && isRunning) {
+        updateDisplay();
+    }
+});
@@ -0,0 +1,158 @@
+"""Dictionary-backed spelling suggestions.
+
+Uses a SymSpell-style symmetric delete index: every dictionary word is
+indexed under all strings reachable by deleting up to MAX_EDIT_DISTANCE
+letters, so a lookup only has to generate the deletes of the query and
+verify the few candidates it finds.
+
+The index is stored on disk as a sorted array of 64-bit keys
+(crc32(delete) << 32 | word rank) and memory-mapped read-only, so every
+gunicorn worker shares the same physical pages instead of holding its own
+copy of a large Python dict.
+"""
+import bisect
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import zlib
+from array import array
+from pathlib import Path
+
+from django.conf import settings
+
+from .spelling import edit_distance, fold_word
+
+WORD_LIST_PATH = Path(__file__).resolve().parent / 'data' / 'english_words.txt'
+MAX_EDIT_DISTANCE = 2
+MAX_WORD_LENGTH = 40
+
+INDEX_MAGIC = b'PTESPL01'
+INDEX_HEADER = struct.Struct('<8sII')  # magic, word count, word list checksum
+
+_suggester = None
+_suggester_lock = threading.Lock()
+
+
+def load_word_list(path=WORD_LIST_PATH):
+    """Load the bundled word list, most frequent word first"""
+    with open(path, encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+
+def word_list_checksum(words):
+    return zlib.crc32('\n'.join(words).encode('utf-8'))
+
+
+def generate_deletes(word, max_distance=MAX_EDIT_DISTANCE):
+    """All strings reachable from word by deleting up to max_distance letters"""
+    deletes = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        next_frontier = set()
+        for item in frontier:
+            for i in range(len(item)):
+                next_frontier.add(item[:i] + item[i + 1:])
+        next_frontier -= deletes
+        deletes |= next_frontier
+        frontier = next_frontier
+    return deletes
+
+
+def _delete_hash(delete):
+    return zlib.crc32(delete.encode('utf-8'))
+
+
+def build_index(path, words=None):
+    """Write the delete index for the word list to path and return its size"""
+    words = words if words is not None else load_word_list()
+    keys = array('Q')
+    for rank, word in enumerate(words):
+        for delete in generate_deletes(word):
+            keys.append((_delete_hash(delete) << 32) | rank)
+    keys = array('Q', sorted(keys))
+    if keys.itemsize != 8:
+        raise RuntimeError('Unsigned 64-bit array type is required for the spelling index')
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write to a temp file first so concurrent workers never map a partial index
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(INDEX_HEADER.pack(INDEX_MAGIC, len(words), word_list_checksum(words)))
+        keys.tofile(f)
+    os.replace(tmp_path, path)
+    return path.stat().st_size
+
+
+class SpellingSuggester:
+    def __init__(self, index_path, words=None):
+        self.words = words if words is not None else load_word_list()
+        self.index_path = Path(index_path)
+        if not self._index_is_current():
+            build_index(self.index_path, self.words)
+
+        with open(self.index_path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._keys = memoryview(self._mmap)[INDEX_HEADER.size:].cast('Q')
+
+    def _index_is_current(self):
+        try:
+            with open(self.index_path, 'rb') as f:
+                magic, word_count, checksum = INDEX_HEADER.unpack(f.read(INDEX_HEADER.size))
+        except (OSError, struct.error):
+            return False
+        return (magic == INDEX_MAGIC and word_count == len(self.words)
+                and checksum == word_list_checksum(self.words))
+
+    @property
+    def index_size(self):
+        return len(self._mmap)
+
+    def _candidate_ranks(self, word):
+        keys = self._keys
+        key_count = len(keys)
+        ranks = set()
+        for delete in generate_deletes(word):
+            prefix = _delete_hash(delete)
+            i = bisect.bisect_left(keys, prefix << 32)
+            while i < key_count and keys[i] >> 32 == prefix:
+                ranks.add(keys[i] & 0xFFFFFFFF)
+                i += 1
+        return ranks
+
+    def is_known(self, word):
+        word = fold_word(word)
+        return any(self.words[rank] == word for rank in self._candidate_ranks(word))
+
+    def suggest(self, word, limit=5):
+        """Suggest dictionary words close to word, best match first.
+
+        Matches are ranked by edit distance, then by word frequency. The
+        word itself is never suggested.
+        """
+        word = fold_word(word)
+        if not word or len(word) > MAX_WORD_LENGTH:
+            return []
+
+        candidates = []
+        for rank in self._candidate_ranks(word):
+            candidate = self.words[rank]
+            if candidate == word:
+                continue
+            distance = edit_distance(word, candidate, MAX_EDIT_DISTANCE)
+            if distance <= MAX_EDIT_DISTANCE:
+                candidates.append((distance, rank, candidate))
+        candidates.sort()
+        return [candidate for _, _, candidate in candidates[:limit]]
+
+
+def get_suggester():
+    """Get the process-wide suggester, loading the index on first use"""
+    global _suggester
+    if _suggester is None:
+        with _suggester_lock:
+            if _suggester is None:
+                _suggester = SpellingSuggester(settings.SPELLING_INDEX_PATH)
+    return _suggester
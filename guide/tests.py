@@ -1,3 +1,1189 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+from datetime import datetime, timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.template import engines
+from django.template.loaders.cached import Loader as CachedLoader
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import (
+    CompletionDistribution, Content, ContentNeighbor, ContentTag, DailyActivity, DailySearchSummary, SearchLog, Section, SimpleUser, SpellingMistake, Tag,
+    UserProgress, WhiteboardImage, sm2_review,
+)
+from .autocomplete import AutocompleteIndex
+from .activity import rebuild_activity
+from .cohorts import build_completion_distributions
+from .compression import negotiate_encoding, supported_encodings
+from .health import clear_cached_result
+from .metrics import search_cache_evictions, search_cache_requests
+from .middleware import PerformanceMiddleware
+from .query_patterns import QueryPatternDetector, RepeatedQueryError, fingerprint
+from .recommendations import build_completion_neighbors
+from .related_content import build_text_neighbors, tokenize
+from .search import SearchResultCache, normalize_query, result_cache
+from .search_log import SearchLogBuffer, search_log
+from .spelling import classify_mistake, merge_case_duplicates, parse_correction_csv, parse_correction_pairs
+from .suggester import SpellingSuggester
+from .views import get_spelling_analytics
+from .warmup import template_names, warm_templates
+
+
+def create_user(name='student', pin='1234'):
+    user = SimpleUser(name=name)
+    user.set_pin(pin)
+    user.save()
+    return user
+
+
+class SpellingMistakeNormalizationTests(TestCase):
+    def setUp(self):
+        self.user = create_user()
+
+    def login(self):
+        self.client.post(reverse('user_login'), {'name': 'student', 'pin': '1234', 'action': 'login'})
+
+    def test_save_fills_normalized_columns(self):
+        mistake = SpellingMistake.objects.create(user=self.user, incorrect_word='Recieve', correct_word='Receive')
+        self.assertEqual(mistake.incorrect_normalized, 'recieve')
+        self.assertEqual(mistake.correct_normalized, 'receive')
+
+    def test_add_view_dedups_case_variants(self):
+        SpellingMistake.objects.create(user=self.user, incorrect_word='recieve', correct_word='receive')
+        self.login()
+        self.client.post(reverse('add_spelling_mistake'), {'incorrect_word': 'RECIEVE', 'correct_word': 'Receive'})
+
+        self.assertEqual(SpellingMistake.objects.count(), 1)
+        self.assertEqual(SpellingMistake.objects.get().frequency, 2)
+
+    def test_merge_case_duplicates_sums_frequencies(self):
+        SpellingMistake.objects.create(user=self.user, incorrect_word='teh', correct_word='the', frequency=2)
+        # Bypass save() to simulate rows written before normalization existed
+        SpellingMistake.objects.bulk_create([
+            SpellingMistake(user=self.user, incorrect_word='Teh', correct_word='The', frequency=3,
+                            incorrect_normalized='legacy', correct_normalized='legacy'),
+        ])
+
+        merged_groups, deleted_rows = merge_case_duplicates(SpellingMistake)
+
+        self.assertEqual((merged_groups, deleted_rows), (1, 1))
+        mistake = SpellingMistake.objects.get()
+        self.assertEqual(mistake.incorrect_word, 'teh')
+        self.assertEqual(mistake.frequency, 5)
+
+    @unittest.skipUnless(connection.vendor == 'sqlite', 'Query plan format is SQLite specific')
+    def test_lookup_uses_normalized_index(self):
+        queryset = SpellingMistake.objects.filter(
+            user=self.user,
+            incorrect_normalized='recieve',
+            correct_normalized='receive',
+        )
+        plan = queryset.explain()
+        self.assertIn('USING INDEX', plan)
+        self.assertIn('incorrect_normalized=?', plan)
+        self.assertIn('correct_normalized=?', plan)
+
+
+class SpellingSuggesterTests(unittest.TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.index_path = os.path.join(tmp_dir, 'index.bin')
+        self.suggester = SpellingSuggester(self.index_path, words=['the', 'receive', 'relieve', 'rhythm', 'separate'])
+
+    def test_suggests_closest_words_first(self):
+        self.assertEqual(self.suggester.suggest('recieve'), ['receive', 'relieve'])
+        self.assertEqual(self.suggester.suggest('Rythm'), ['rhythm'])
+        self.assertEqual(self.suggester.suggest('seperate'), ['separate'])
+
+    def test_never_suggests_the_word_itself(self):
+        self.assertEqual(self.suggester.suggest('the'), [])
+        self.assertTrue(self.suggester.is_known('the'))
+
+    def test_rebuilds_stale_index(self):
+        suggester = SpellingSuggester(self.index_path, words=['receive', 'because'])
+        self.assertEqual(suggester.suggest('becuase'), ['because'])
+
+
+class SpellingAnalyticsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = create_user()
+        self.client.post(reverse('user_login'), {'name': 'student', 'pin': '1234', 'action': 'login'})
+
+    def test_classify_mistake(self):
+        self.assertEqual(classify_mistake('occured', 'occurred'), 'doubled_letter')
+        self.assertEqual(classify_mistake('recieve', 'receive'), 'transposition')
+        self.assertEqual(classify_mistake('seperate', 'separate'), 'vowel_swap')
+        self.assertEqual(classify_mistake('goverment', 'government'), 'missing_letter')
+
+    def test_analytics_refresh_after_adding_mistake(self):
+        response = self.client.get(reverse('spelling_analytics'))
+        self.assertEqual(response.context['analytics']['total_mistakes'], 0)
+
+        self.client.post(reverse('add_spelling_mistake'), {'incorrect_word': 'occured', 'correct_word': 'occurred'})
+
+        response = self.client.get(reverse('spelling_analytics'))
+        analytics = response.context['analytics']
+        self.assertEqual(analytics['total_mistakes'], 1)
+        self.assertEqual(analytics['categories'][0]['key'], 'doubled_letter')
+
+    def test_cached_analytics_follow_writes_made_elsewhere(self):
+        mistake = SpellingMistake.objects.create(user=self.user, incorrect_word='occured', correct_word='occurred')
+        self.client.get(reverse('spelling_analytics'))
+        with self.assertNumQueries(1):
+            get_spelling_analytics(self.user)
+
+        # Written without touching this process's cache, like another worker would
+        mistake.frequency = 4
+        mistake.save()
+        self.assertEqual(get_spelling_analytics(self.user)['total_frequency'], 4)
+        mistake.delete()
+        self.assertEqual(get_spelling_analytics(self.user)['total_mistakes'], 0)
+
+
+class BulkSpellingMistakeTests(TestCase):
+    def setUp(self):
+        self.user = create_user()
+        self.client.post(reverse('user_login'), {'name': 'student', 'pin': '1234', 'action': 'login'})
+
+    def test_parse_correction_pairs(self):
+        text = (
+            'recieve -> receive\n'
+            'teh → the\n'
+            'occured => occurred\n'
+            'seperate, separate\n'
+            'goverment: government\n'
+            'becuase\tbecause\n'
+            '\n'
+            'no separator here\n'
+            ' -> missing\n'
+            '"Recieve." -> receive\n'
+        )
+        self.assertEqual(parse_correction_pairs(text), [
+            ('recieve', 'receive'), ('teh', 'the'), ('occured', 'occurred'), ('seperate', 'separate'),
+            ('goverment', 'government'), ('becuase', 'because'), ('Recieve', 'receive'),
+        ])
+        self.assertEqual(parse_correction_pairs(None), [])
+
+    def test_parse_correction_csv(self):
+        data = '\ufeffincorrect,correct,context\nrecieve,receive, I recieve mail.\nteh,the\nlonely\n,empty\nteh,the\n'
+        self.assertEqual(parse_correction_csv(data.encode('utf-8')), [
+            ('recieve', 'receive', 'I recieve mail.'), ('teh', 'the', ''), ('teh', 'the', ''),
+        ])
+
+    def test_bulk_record_merges_duplicates_and_existing_rows(self):
+        existing = SpellingMistake.objects.create(user=self.user, incorrect_word='teh', correct_word='the',
+                                                  frequency=2, repetitions=3, interval_days=15, is_reviewed=True)
+        created, updated = SpellingMistake.bulk_record(self.user, [
+            ('Teh', 'The', '', 1),
+            ('recieve', 'receive', '', 2),
+            ('RECIEVE', 'receive', 'I recieve mail.', 1),
+        ])
+
+        self.assertEqual((created, updated), (1, 1))
+        self.assertEqual(SpellingMistake.objects.count(), 2)
+        existing.refresh_from_db()
+        self.assertEqual((existing.frequency, existing.repetitions, existing.is_reviewed), (3, 0, False))
+        added = SpellingMistake.find_existing(self.user, 'recieve', 'receive')
+        self.assertEqual((added.frequency, added.context), (3, 'I recieve mail.'))
+        self.assertEqual(SpellingMistake.bulk_record(self.user, []), (0, 0))
+
+    def test_bulk_add_view_reports_counts(self):
+        SpellingMistake.objects.create(user=self.user, incorrect_word='teh', correct_word='the')
+        csv_file = SimpleUploadedFile('pairs.csv', b'incorrect,correct\nseperate,separate\n')
+        response = self.client.post(reverse('bulk_add_spelling_mistakes'), {
+            'essay': 'Teh cat. I recieve teh mail.',
+            'pairs': 'teh -> the\nrecieve -> receive',
+            'csv_file': csv_file,
+        }, follow=True)
+
+        self.assertContains(response, 'Logged 3 spelling mistakes (2 new, 1 updated).')
+        self.assertEqual(SpellingMistake.find_existing(self.user, 'teh', 'the').frequency, 3)
+        self.assertEqual(SpellingMistake.find_existing(self.user, 'recieve', 'receive').context, 'I recieve teh mail.')
+
+        response = self.client.post(reverse('bulk_add_spelling_mistakes'), {'essay': 'x', 'pairs': 'nothing useful'})
+        self.assertContains(response, 'Please enter at least one correction pair')
+        self.assertEqual(SpellingMistake.objects.count(), 3)
+
+
+class SpellingReviewTests(TestCase):
+    def setUp(self):
+        self.user = create_user()
+        self.now = timezone.now()
+        self.mistake = SpellingMistake.objects.create(user=self.user, incorrect_word='recieve', correct_word='receive',
+                                                      due_at=self.now)
+        self.client.post(reverse('user_login'), {'name': 'student', 'pin': '1234', 'action': 'login'})
+
+    def grade(self, mistake_id, quality):
+        return self.client.post(
+            reverse('review_spelling_mistake'), {'mistake_id': mistake_id, 'quality': quality},
+            content_type='application/json',
+        ).json()
+
+    def test_schedule_review_progression(self):
+        mistake = self.mistake
+        steps = []
+        for quality in (5, 4, 4, 1):
+            mistake.schedule_review(quality, now=self.now)
+            steps.append((mistake.repetitions, mistake.interval_days, round(mistake.ease_factor, 2),
+                          mistake.due_at - self.now, mistake.is_reviewed))
+        self.assertEqual(steps, [
+            (1, 1, 2.6, timedelta(days=1), True),
+            (2, 6, 2.6, timedelta(days=6), True),
+            (3, 16, 2.6, timedelta(days=16), True),
+            (0, 1, 2.06, timedelta(days=1), False),
+        ])
+
+        mistake.reset_schedule(now=self.now)
+        self.assertEqual((mistake.repetitions, mistake.interval_days, mistake.due_at), (0, 0, self.now))
+
+    def test_due_queue_skips_other_users_and_future_mistakes(self):
+        overdue = SpellingMistake.objects.create(user=self.user, incorrect_word='teh', correct_word='the',
+                                                 due_at=self.now - timedelta(days=2))
+        SpellingMistake.objects.create(user=self.user, incorrect_word='seperate', correct_word='separate',
+                                       due_at=self.now + timedelta(days=1))
+        SpellingMistake.objects.create(user=create_user('other'), incorrect_word='becuase', correct_word='because',
+                                       due_at=self.now - timedelta(days=5))
+
+        self.assertEqual(list(SpellingMistake.due_for_review(self.user, now=self.now)), [overdue, self.mistake])
+        self.assertEqual(list(SpellingMistake.due_for_review(self.user, limit=1, now=self.now)), [overdue])
+
+        response = self.client.get(reverse('spelling_review_due'), {'limit': 'many'})
+        self.assertEqual([item['incorrect_word'] for item in response.json()['mistakes']], ['teh', 'recieve'])
+
+    def test_review_endpoint_grades_and_reschedules(self):
+        result = self.grade(self.mistake.id, 5)
+        self.assertTrue(result['success'])
+        self.assertEqual((result['interval_days'], result['ease_factor'], result['is_reviewed']), (1, 2.6, True))
+        self.mistake.refresh_from_db()
+        self.assertGreater(self.mistake.due_at, self.now)
+        self.assertEqual(list(SpellingMistake.due_for_review(self.user)), [])
+
+        # Out-of-range grades are clamped to 0-5
+        self.assertEqual(self.grade(self.mistake.id, 9)['ease_factor'], 2.7)
+
+    def test_review_endpoint_errors(self):
+        for quality in (None, 'often', ''):
+            result = self.grade(self.mistake.id, quality)
+            self.assertEqual(result, {'success': False, 'error': 'Quality must be a number from 0 to 5'})
+
+        other = SpellingMistake.objects.create(user=create_user('other'), incorrect_word='teh', correct_word='the')
+        self.assertEqual(self.grade(other.id, 5), {'success': False, 'error': 'Spelling mistake not found'})
+        other.refresh_from_db()
+        self.assertEqual(other.repetitions, 0)
+
+        self.client.post(reverse('user_logout'))
+        self.assertEqual(self.grade(self.mistake.id, 5), {'success': False, 'error': 'Please login first'})
+        self.assertEqual(self.client.get(reverse('spelling_review_due')).json()['success'], False)
+
+
+class PerformanceMiddlewareTests(TestCase):
+    def test_guide_views_get_server_timing_and_metrics(self):
+        response = self.client.get(reverse('home'))
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertIn('total;dur=', response['Server-Timing'])
+
+        metrics = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn('pte_requests_total{view="home",status="200"}', metrics)
+        self.assertIn('pte_request_db_queries_bucket{view="home"', metrics)
+
+    def test_streamed_pages_are_recorded_once_fully_sent(self):
+        section = Section.objects.create(name='reading', title='Reading')
+        for i in range(3):
+            Content.objects.create(section=section, title=f'Passage {i}', content_type='note')
+        with mock.patch.object(PerformanceMiddleware, 'record') as record:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse('section_detail', args=['reading']))
+                record.assert_not_called()
+                b''.join(response.streaming_content)
+        record.assert_called_once()
+        view_name, _, request_metrics, _ = record.call_args.args
+        self.assertEqual(view_name, 'section_detail')
+        self.assertEqual(request_metrics.db_queries, len(queries.captured_queries))
+        self.assertGreater(request_metrics.template_time, 0)
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        self.user = create_user()
+        section = Section.objects.create(name='speaking', title='Speaking')
+        self.content = Content.objects.create(section=section, title='Read Aloud', content_type='note')
+
+    def test_toggle_progress(self):
+        self.client.post(reverse('user_login'), {'name': 'student', 'pin': '1234', 'action': 'login'})
+        body = {'content_id': self.content.id, 'action': 'complete'}
+        response = self.client.post(reverse('toggle_progress'), body, content_type='application/json')
+        self.assertEqual(response.json(), {'success': True, 'is_completed': True, 'is_favorited': False})
+        self.assertTrue(UserProgress.objects.get(user=self.user, content=self.content).is_completed)
+
+    async def test_async_stack_counts_queries(self):
+        await self.async_client.post(reverse('user_login'), {'name': 'student', 'pin': '1234', 'action': 'login'})
+        body = {'content_id': self.content.id, 'action': 'favorite'}
+        response = await self.async_client.post(reverse('toggle_progress'), body, content_type='application/json')
+        self.assertEqual(response.json()['is_favorited'], True)
+        self.assertNotIn('desc="0 queries"', response['Server-Timing'])
+
+    async def test_requires_login(self):
+        body = {'content_id': self.content.id, 'action': 'complete'}
+        response = await self.async_client.post(reverse('toggle_progress'), body, content_type='application/json')
+        self.assertEqual(response.json(), {'success': False, 'error': 'Please login to track progress'})
+
+
+@override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db')
+class SessionTests(TestCase):
+    def setUp(self):
+        self.user = create_user()
+        Section.objects.create(name='speaking', title='Speaking')
+        self.client.post(reverse('user_login'), {'name': 'student', 'pin': '1234', 'action': 'login'})
+
+    def test_read_only_views_do_not_touch_session_table(self):
+        for url in [reverse('home'), reverse('section_detail', args=['speaking']), reverse('progress')]:
+            with self.subTest(url=url), CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.client.get(url).status_code, 200)
+            self.assertEqual([q['sql'] for q in queries.captured_queries if 'django_session' in q['sql']], [])
+
+    def test_logging_in_again_does_not_save_session(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(reverse('user_login'), {'name': 'student', 'pin': '1234', 'action': 'login'})
+        self.assertEqual([q['sql'] for q in queries.captured_queries if 'django_session' in q['sql']], [])
+        self.assertEqual(self.client.session['user_id'], self.user.id)
+
+    def test_clearsessions_removes_expired_sessions(self):
+        Session.objects.create(session_key='expired', session_data='', expire_date=timezone.now() - timedelta(days=1))
+        call_command('clearsessions')
+        self.assertFalse(Session.objects.filter(session_key='expired').exists())
+        self.assertTrue(Session.objects.exists())
+
+
+class StaticAssetTests(TestCase):
+    def test_pages_use_local_assets_only(self):
+        html = self.client.get(reverse('user_login')).content.decode()
+        self.assertNotIn('cdn.jsdelivr.net', html)
+        self.assertNotIn('cdnjs.cloudflare.com', html)
+        self.assertIn('/static/guide/vendor/bootstrap-5.1.3/bootstrap.min.css', html)
+        self.assertIn('/static/guide/js/base.js', html)
+        self.assertNotIn('<style>', html)
+
+
+class TemplateWarmupTests(TestCase):
+    def test_warmup_compiles_every_guide_template(self):
+        self.assertEqual(warm_templates(), template_names())
+        loader = engines['django'].engine.template_loaders[0]
+        self.assertIsInstance(loader, CachedLoader)
+        self.assertIn('guide/section_detail.html', loader.get_template_cache)
+        self.assertIn('guide/base.html', loader.get_template_cache)
+
+
+class ContentBodyTests(TestCase):
+    def setUp(self):
+        section = Section.objects.create(name='writing', title='Writing')
+        self.content = Content.objects.create(
+            section=section, title='Essay template', content_type='text',
+            text_content='**Intro**\n\n- point one\n\n<script>alert(1)</script><a href="javascript:x">bad</a>',
+        )
+
+    def test_body_is_rendered_and_sanitized_on_save(self):
+        html = self.content.text_html
+        self.assertIn('<strong>Intro</strong>', html)
+        self.assertIn('<li>point one</li>', html)
+        self.assertNotIn('script', html)
+        self.assertNotIn('javascript:', html)
+
+        version = self.content.body_version
+        self.content.text_content = 'Updated'
+        self.content.save(update_fields=['text_content'])
+        self.content.refresh_from_db()
+        self.assertEqual(self.content.text_html, '<p>Updated</p>')
+        self.assertNotEqual(self.content.body_version, version)
+
+    def test_section_page_does_not_load_bodies(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('section_detail', args=['writing']))
+            html = b''.join(response.streaming_content).decode()
+        self.assertNotIn('Intro', html)
+        self.assertIn(self.content.get_body_url(), html)
+        self.assertFalse(any('text_html' in query['sql'] for query in queries.captured_queries))
+
+    def test_body_endpoint_caching(self):
+        response = self.client.get(self.content.get_body_url())
+        self.assertContains(response, '<strong>Intro</strong>')
+        self.assertIn('immutable', response['Cache-Control'])
+
+        unversioned = self.client.get(reverse('content_body', args=[self.content.id]))
+        self.assertEqual(unversioned['Cache-Control'], 'no-cache')
+        revalidated = self.client.get(
+            reverse('content_body', args=[self.content.id]), HTTP_IF_NONE_MATCH=unversioned['ETag']
+        )
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_inactive_content_has_no_body(self):
+        Content.objects.filter(id=self.content.id).update(is_active=False)
+        self.assertEqual(self.client.get(self.content.get_body_url()).status_code, 404)
+
+
+class RecommendationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.section = Section.objects.create(name='reading', title='Reading')
+        cls.items = [
+            Content.objects.create(section=cls.section, title=f'Passage {i}', content_type='note') for i in range(4)
+        ]
+        cls.users = [create_user(f'student{i}') for i in range(4)]
+        # Everyone who finished passage 0 also finished passage 1; passage 2 only once
+        completions = {0: [0, 1, 2], 1: [0, 1], 2: [0, 1, 3], 3: [2, 3]}
+        for user_index, item_indexes in completions.items():
+            for item_index in item_indexes:
+                UserProgress.objects.create(user=cls.users[user_index], content=cls.items[item_index], is_completed=True)
+
+    def test_build_keeps_top_neighbors_with_support(self):
+        items, rows = build_completion_neighbors(top_k=1, min_support=2)
+        self.assertEqual(rows, ContentNeighbor.objects.count())
+        best = ContentNeighbor.objects.get(content=self.items[0], rank=1)
+        self.assertEqual(best.neighbor, self.items[1])
+        self.assertAlmostEqual(best.score, 1.0, places=5)
+        self.assertFalse(ContentNeighbor.objects.filter(content=self.items[0], neighbor=self.items[2]).exists())
+
+    def test_rebuild_replaces_previous_lists(self):
+        build_completion_neighbors(min_support=1)
+        first = ContentNeighbor.objects.count()
+        build_completion_neighbors(min_support=1)
+        self.assertEqual(ContentNeighbor.objects.count(), first)
+
+    def test_next_up_excludes_completed_items(self):
+        build_completion_neighbors(min_support=1)
+        student = create_user('newcomer')
+        UserProgress.objects.create(user=student, content=self.items[0], is_completed=True)
+        with self.assertNumQueries(1):
+            next_up = list(ContentNeighbor.next_up(student))
+        self.assertEqual(next_up[0], self.items[1])
+        self.assertNotIn(self.items[0], next_up)
+
+    def test_progress_page_shows_next_up(self):
+        build_completion_neighbors(min_support=1)
+        self.client.post(reverse('user_login'), {'name': 'student1', 'pin': '1234', 'action': 'login'})
+        self.assertContains(self.client.get(reverse('progress')), 'Next Up')
+
+
+class PopularityCounterTests(TestCase):
+    def setUp(self):
+        self.section = Section.objects.create(name='reading', title='Reading')
+        self.items = [
+            Content.objects.create(section=self.section, title=f'Passage {i}', content_type='note', order=i)
+            for i in range(3)
+        ]
+        self.users = [create_user(f'student{i}') for i in range(3)]
+
+    def counts(self, item):
+        item.refresh_from_db()
+        return item.completion_count, item.favorite_count, item.recent_completion_count
+
+    def test_toggles_move_the_counters(self):
+        self.client.post(reverse('user_login'), {'name': 'student0', 'pin': '1234', 'action': 'login'})
+        for action in ['complete', 'favorite', 'complete']:
+            self.client.post(reverse('toggle_progress'), {'content_id': self.items[0].id, 'action': action},
+                             content_type='application/json')
+        self.assertEqual(self.counts(self.items[0]), (0, 1, 0))
+        UserProgress.toggle(self.users[1], self.items[0], 'complete')
+        self.assertEqual(self.counts(self.items[0]), (1, 1, 1))
+
+    def test_uncompleting_a_row_without_completed_at(self):
+        # Admin edits can leave a completion without its timestamp
+        UserProgress.objects.create(user=self.users[0], content=self.items[1], is_completed=True)
+        Content.reconcile_counters()
+        self.assertEqual(self.counts(self.items[1]), (1, 0, 0))
+
+        progress = UserProgress.toggle(self.users[0], self.items[1], 'complete')
+        self.assertFalse(progress.is_completed)
+        self.assertEqual(self.counts(self.items[1]), (0, 0, 0))
+
+    def test_concurrent_toggles_keep_counts_exact(self):
+        # Run other toggles between this toggle reading the row and flipping it
+        def race(execute, sql, params, many, context):
+            if races and sql.startswith('UPDATE "guide_userprogress"'):
+                for user in races.pop():
+                    UserProgress.toggle(user, self.items[0], 'complete')
+            return execute(sql, params, many, context)
+
+        # The same student double-clicking, and another student at the same time
+        races = [[self.users[1]], [self.users[0]]]
+        with connection.execute_wrapper(race):
+            UserProgress.toggle(self.users[0], self.items[0], 'complete')
+            UserProgress.toggle(self.users[2], self.items[0], 'complete')
+        completed = UserProgress.objects.filter(content=self.items[0], is_completed=True).count()
+        self.assertEqual(completed, 2)
+        self.assertEqual(self.counts(self.items[0]), (2, 0, 2))
+
+    def test_reconcile_fixes_drift_and_ages_out_trending(self):
+        UserProgress.toggle(self.users[0], self.items[0], 'complete')
+        UserProgress.objects.filter(user=self.users[0]).update(completed_at=timezone.now() - timedelta(days=8))
+        UserProgress.objects.create(user=self.users[1], content=self.items[1], is_favorited=True)
+        call_command('reconcile_popularity_counters', stdout=StringIO())
+        self.assertEqual(self.counts(self.items[0]), (1, 0, 0))
+        self.assertEqual(self.counts(self.items[1]), (0, 1, 0))
+        self.assertEqual(Content.reconcile_counters(), 0)
+
+    def test_popular_and_trending_sorts(self):
+        for user in self.users:
+            UserProgress.toggle(user, self.items[2], 'complete')
+        for user in self.users[:2]:
+            UserProgress.toggle(user, self.items[1], 'complete')
+        UserProgress.objects.filter(content=self.items[2]).update(completed_at=timezone.now() - timedelta(days=8))
+        Content.reconcile_counters()
+
+        url = reverse('section_detail', args=[self.section.name])
+        popular = self.client.get(url, {'sort': 'popular'}).context['contents']
+        self.assertEqual(popular, [self.items[2], self.items[1], self.items[0]])
+        trending = self.client.get(url, {'sort': 'trending'}).context['contents']
+        self.assertEqual(trending, [self.items[1], self.items[2], self.items[0]])
+
+
+class DailyActivityTests(TestCase):
+    def setUp(self):
+        self.user = create_user()
+        section = Section.objects.create(name='reading', title='Reading')
+        self.content = Content.objects.create(section=section, title='Passage', content_type='note')
+        self.client.post(reverse('user_login'), {'name': 'student', 'pin': '1234', 'action': 'login'})
+
+    def today(self):
+        return DailyActivity.objects.get(user=self.user, date=timezone.localdate())
+
+    def test_write_paths_record_todays_activity(self):
+        for action in ['complete', 'favorite']:
+            self.client.post(reverse('toggle_progress'), {'content_id': self.content.id, 'action': action},
+                             content_type='application/json')
+        self.client.post(reverse('add_spelling_mistake'), {'incorrect_word': 'occured', 'correct_word': 'occurred'})
+        self.client.post(reverse('add_spelling_mistake'), {'incorrect_word': 'occured', 'correct_word': 'occurred'})
+        self.client.post(reverse('bulk_add_spelling_mistakes'), {'pairs': 'recieve -> receive\nseperate -> separate'})
+        self.client.post(reverse('save_whiteboard'), {'title': 'Notes', 'image_data': 'data:image/png;base64,AA=='},
+                         content_type='application/json')
+
+        today = self.today()
+        self.assertEqual(
+            (today.completions, today.favorites, today.spelling_entries, today.whiteboard_saves), (1, 1, 4, 1)
+        )
+        # Undoing a completion takes it off the day it was made
+        self.client.post(reverse('toggle_progress'), {'content_id': self.content.id, 'action': 'complete'},
+                         content_type='application/json')
+        self.assertEqual(self.today().completions, 0)
+
+    def test_calendar_streaks_and_heatmap_come_from_one_query(self):
+        today = timezone.localdate()
+        DailyActivity.objects.bulk_create([
+            DailyActivity(user=self.user, date=today - timedelta(days=offset), completions=offset)
+            for offset in [1, 2, 3, 6, 7, 8, 9]
+        ] + [DailyActivity(user=self.user, date=today - timedelta(days=4))])
+        with self.assertNumQueries(1):
+            activity = DailyActivity.calendar(self.user, days=28, today=today)
+        # Nothing yet today: yesterday's streak still counts; the empty row breaks the other
+        self.assertEqual((activity['current_streak'], activity['longest_streak']), (3, 4))
+        self.assertEqual(activity['active_days'], 7)
+        self.assertEqual(activity['totals']['completions'], 36)
+
+        cells = [cell for week in activity['weeks'] for cell in week if cell]
+        self.assertEqual(len(cells), 28)
+        self.assertTrue(all(len(week) == 7 for week in activity['weeks']))
+        self.assertEqual([cell['level'] for cell in cells[-4:]], [2, 1, 1, 0])
+
+        response = self.client.get(reverse('progress_activity'), {'days': 28})
+        self.assertEqual(response.json()['current_streak'], 3)
+        self.assertEqual(len(response.json()['days']), 28)
+        self.assertContains(self.client.get(reverse('progress')), '3 day streak')
+
+    def test_rebuild_matches_the_incremental_rollup(self):
+        other = Content.objects.create(section=self.content.section, title='Other', content_type='note')
+        for content, action in [(self.content, 'complete'), (other, 'complete'), (other, 'favorite')]:
+            UserProgress.toggle(self.user, content, action)
+        SpellingMistake.bulk_record(self.user, [('recieve', 'receive', '', 1)])
+        WhiteboardImage.objects.create(title='Notes', image_data='data:', created_by=self.user)
+        DailyActivity.record(self.user, whiteboard_saves=1)
+        expected = list(DailyActivity.objects.values_list('date', *DailyActivity.COUNTERS))
+
+        DailyActivity.objects.update(completions=0)
+        self.assertEqual(rebuild_activity(DailyActivity, UserProgress, SpellingMistake, WhiteboardImage), 1)
+        self.assertEqual(list(DailyActivity.objects.values_list('date', *DailyActivity.COUNTERS)), expected)
+
+
+class CohortPercentileTests(TestCase):
+    def setUp(self):
+        self.reading = Section.objects.create(name='reading', title='Reading')
+        self.writing = Section.objects.create(name='writing', title='Writing')
+        items = [Content.objects.create(section=self.reading, title=f'Passage {i}', content_type='note') for i in range(4)]
+        essay = Content.objects.create(section=self.writing, title='Essay', content_type='note')
+        # Reading completions per learner: 0 (writing only), 1, 2, 2, 4
+        self.users = [create_user(f'student{i}') for i in range(5)]
+        UserProgress.objects.create(user=self.users[0], content=essay, is_completed=True)
+        for user, completed in zip(self.users[1:], [1, 2, 2, 4]):
+            for item in items[:completed]:
+                UserProgress.objects.create(user=user, content=item, is_completed=True)
+        create_user('visitor')
+
+    def test_distribution_counts_learners_behind(self):
+        self.assertEqual(build_completion_distributions(), (2, 5))
+        reading = CompletionDistribution.objects.get(section=self.reading)
+        self.assertEqual((reading.learners, reading.max_completions, reading.median), (5, 4, 2))
+        self.assertEqual([reading.ahead_of(completed) for completed in range(7)], [0, 20, 40, 80, 80, 100, 100])
+        self.assertEqual(CompletionDistribution.objects.get(section=self.writing).ahead_of(1), 80)
+
+    def test_progress_page_shows_standing(self):
+        build_completion_distributions()
+        self.client.post(reverse('user_login'), {'name': 'student4', 'pin': '1234', 'action': 'login'})
+        response = self.client.get(reverse('progress'))
+        self.assertEqual(response.context['progress_data']['reading']['ahead_of'], 80)
+        self.assertIsNone(response.context['progress_data']['writing']['ahead_of'])
+        self.assertContains(response, 'Ahead of 80% of learners')
+
+    def test_progress_page_ignores_deactivated_content(self):
+        retired = Content.objects.create(section=self.reading, title='Old passage', content_type='note', is_active=False)
+        UserProgress.objects.create(user=self.users[1], content=retired, is_completed=True)
+        build_completion_distributions()
+        self.client.post(reverse('user_login'), {'name': 'student1', 'pin': '1234', 'action': 'login'})
+        reading = self.client.get(reverse('progress')).context['progress_data']['reading']
+        self.assertEqual((reading['completed'], reading['ahead_of']), (1, 20))
+
+
+class ContentReviewTests(TestCase):
+    def setUp(self):
+        self.user = create_user()
+        section = Section.objects.create(name='listening', title='Listening')
+        self.items = [
+            Content.objects.create(section=section, title=f'Lecture {i}', content_type='note') for i in range(5)
+        ]
+        self.client.post(reverse('user_login'), {'name': 'student', 'pin': '1234', 'action': 'login'})
+
+    def test_sm2_intervals(self):
+        self.assertEqual(sm2_review(0, 0, 2.5, 5), (1, 1, 2.6))
+        self.assertEqual(sm2_review(1, 1, 2.6, 4)[:2], (2, 6))
+        self.assertEqual(sm2_review(2, 6, 2.5, 3)[:2], (3, 15))
+        self.assertEqual(sm2_review(3, 15, 1.3, 0), (0, 1, 1.3))
+
+    def test_completing_starts_the_schedule_and_uncompleting_drops_it(self):
+        progress = UserProgress.toggle(self.user, self.items[0], 'complete')
+        self.assertEqual(progress.next_review_at, progress.completed_at + timedelta(days=1))
+        progress.schedule_review(1)
+        progress.save()
+        progress = UserProgress.toggle(self.user, self.items[0], 'complete')
+        self.assertIsNone(UserProgress.objects.get(pk=progress.pk).next_review_at)
+
+        # Completing again starts a fresh schedule, ease included
+        UserProgress.toggle(self.user, self.items[0], 'complete')
+        progress = UserProgress.objects.get(pk=progress.pk)
+        self.assertEqual((progress.repetitions, progress.interval_days, progress.ease_factor), (0, 0, 2.5))
+
+    def test_due_queue_holds_todays_reviews_longest_overdue_first(self):
+        now = timezone.now()
+        end_of_today = timezone.make_aware(
+            datetime.combine(timezone.localdate(now) + timedelta(days=1), datetime.min.time())
+        )
+        due = {
+            0: now - timedelta(days=3),
+            1: now - timedelta(days=1),
+            2: end_of_today - timedelta(seconds=1),
+            3: end_of_today + timedelta(hours=1),
+            4: now - timedelta(days=5),
+        }
+        for index, next_review_at in due.items():
+            UserProgress.objects.create(user=self.user, content=self.items[index], is_completed=True,
+                                        completed_at=now, next_review_at=next_review_at)
+        Content.objects.filter(pk=self.items[4].pk).update(is_active=False)
+        UserProgress.objects.create(user=create_user('other'), content=self.items[0], is_completed=True,
+                                    next_review_at=now - timedelta(days=9))
+
+        with self.assertNumQueries(1):
+            queue = list(UserProgress.due_for_review(self.user, limit=10))
+        self.assertEqual([progress.content for progress in queue], self.items[:3])
+
+        response = self.client.get(reverse('review_session'), {'limit': 2})
+        self.assertEqual([item['title'] for item in response.json()['items']], ['Lecture 0', 'Lecture 1'])
+
+    def test_grading_a_review_schedules_the_next(self):
+        progress = UserProgress.toggle(self.user, self.items[0], 'complete')
+        grade = lambda quality: self.client.post(
+            reverse('review_content'), {'progress_id': progress.id, 'quality': quality}, content_type='application/json'
+        ).json()
+        self.assertEqual(grade(5)['interval_days'], 1)
+        self.assertEqual(grade(4)['interval_days'], 6)
+        self.assertEqual(grade(1)['interval_days'], 1)
+        progress.refresh_from_db()
+        self.assertEqual(progress.repetitions, 0)
+        self.assertGreater(progress.next_review_at, timezone.now())
+        self.assertFalse(grade('often')['success'])
+
+
+class RelatedContentTests(TestCase):
+    def setUp(self):
+        self.section = Section.objects.create(name='writing', title='Writing')
+        texts = [
+            ('Essay structure', 'Plan the essay: introduction, body paragraphs and a conclusion.'),
+            ('Essay template', 'A template for the essay introduction, body paragraphs and conclusion.'),
+            ('Dictation drills', 'Listen to the audio and type the dictation sentence exactly.'),
+            ('Dictation spelling', 'Common spelling traps in the dictation audio sentence.'),
+        ]
+        self.items = [
+            Content.objects.create(section=self.section, title=title, content_type='note', text_content=body)
+            for title, body in texts
+        ]
+        for topic in ['Graph description', 'Retell lecture', 'Answer short question', 'Summarize group discussion']:
+            Content.objects.create(section=self.section, title=topic, content_type='note', text_content=topic)
+
+    def neighbors(self, content):
+        return list(ContentNeighbor.objects.filter(kind='text', content=content).values_list('neighbor', flat=True))
+
+    def test_tokenize_drops_markup_and_stop_words(self):
+        self.assertEqual(tokenize('<b>The</b> essay\'s **structure**'), ["essay's", 'structure'])
+
+    def test_full_build_links_similar_items(self):
+        mode, _, _ = build_text_neighbors(min_score=0.01)
+        self.assertEqual(mode, 'full')
+        self.assertEqual(self.neighbors(self.items[0])[0], self.items[1].id)
+        self.assertEqual(self.neighbors(self.items[2])[0], self.items[3].id)
+
+    def test_incremental_build_only_touches_changed_items(self):
+        build_text_neighbors(min_score=0.01)
+        changed = self.items[3]
+        changed.title = 'Essay conclusion'
+        changed.text_content = 'How to write the essay conclusion after the body paragraphs.'
+        changed.save()
+
+        mode, items, _ = build_text_neighbors(min_score=0.01, max_changed=0.5)
+        self.assertEqual(mode, 'incremental')
+        self.assertLess(items, 8)
+        self.assertIn(changed.id, self.neighbors(self.items[0]))
+        self.assertNotEqual(self.neighbors(self.items[2])[:1], [changed.id])
+
+    def test_section_page_lists_related_items(self):
+        build_text_neighbors(min_score=0.01)
+        response = self.client.get(reverse('section_detail', args=['writing']))
+        html = b''.join(response.streaming_content).decode()
+        self.assertIn(f'#content-{self.items[1].id}', html)
+
+
+class AutocompleteTests(TestCase):
+    def setUp(self):
+        self.section = Section.objects.create(name='writing', title='Writing')
+        self.swt = Content.objects.create(section=self.section, title='Summarize Written Text template', content_type='note')
+        self.sst = Content.objects.create(section=self.section, title='Summarize Spoken Text tips', content_type='note')
+        self.essay = Content.objects.create(section=self.section, title='Essay structure', content_type='note')
+        Tag.objects.create(name='templates')
+
+    def labels(self, query):
+        index = AutocompleteIndex([
+            {'type': 'content', 'label': 'Summarize Written Text template'},
+            {'type': 'content', 'label': 'Summarize Spoken Text tips'},
+            {'type': 'content', 'label': 'Write From Dictation'},
+            {'type': 'tag', 'label': 'templates'},
+        ])
+        return [entry['label'] for entry in index.search(query)]
+
+    def test_prefix_matches_tags_first(self):
+        self.assertEqual(self.labels('templ'), ['templates', 'Summarize Written Text template'])
+        self.assertEqual(self.labels('sum sp'), ['Summarize Spoken Text tips'])
+
+    def test_typos_are_tolerated(self):
+        self.assertEqual(self.labels('summarise writen text'), ['Summarize Written Text template'])
+        self.assertEqual(self.labels('dictaton'), ['Write From Dictation'])
+        self.assertEqual(self.labels('xyzzy'), [])
+
+    def test_exact_words_rank_above_prefixes(self):
+        self.assertEqual(self.labels('write')[0], 'Write From Dictation')
+
+    def test_suggest_endpoint_links_titles_and_tags(self):
+        response = self.client.get(reverse('search_suggestions'), {'q': 'summarise wri'})
+        suggestions = response.json()['suggestions']
+        self.assertEqual([s['label'] for s in suggestions], [self.swt.title])
+        self.assertTrue(suggestions[0]['url'].endswith(f'/section/writing/#content-{self.swt.id}'))
+
+        suggestions = self.client.get(reverse('search_suggestions'), {'q': 'templ'}).json()['suggestions']
+        self.assertEqual(suggestions[0]['url'], reverse('search_content') + '?tag=templates')
+
+    def test_index_picks_up_new_content(self):
+        self.client.get(reverse('search_suggestions'), {'q': 'essay'})
+        Content.objects.create(section=self.section, title='Essay conclusion', content_type='note')
+        labels = [s['label'] for s in self.client.get(reverse('search_suggestions'), {'q': 'essay'}).json()['suggestions']]
+        self.assertEqual(labels, ['Essay structure', 'Essay conclusion'])
+
+    def test_index_picks_up_renamed_tags(self):
+        self.client.get(reverse('search_suggestions'), {'q': 'templ'})
+        tag = Tag.objects.get(name='templates')
+        tag.name = 'templated answers'
+        tag.save()
+        suggestions = self.client.get(reverse('search_suggestions'), {'q': 'templ'}).json()['suggestions']
+        self.assertEqual(suggestions[0]['label'], 'templated answers')
+        self.assertNotIn('templates', [s['label'] for s in suggestions])
+
+    def test_search_falls_back_to_close_titles(self):
+        response = self.client.get(reverse('search_content'), {'q': 'summarise writen'})
+        html = b''.join(response.streaming_content).decode()
+        self.assertIn('No exact matches', html)
+        self.assertIn(self.swt.title, html)
+        self.assertNotIn(self.sst.title, html)
+
+
+class SearchCacheTests(TestCase):
+    def setUp(self):
+        result_cache.clear()
+        self.section = Section.objects.create(name='speaking', title='Speaking')
+        self.item = Content.objects.create(section=self.section, title='Describe Image tips', content_type='note')
+
+    def test_normalize_query(self):
+        self.assertEqual(normalize_query('  Describe   IMAGE '), 'describe image')
+        self.assertEqual(normalize_query('Été'), 'Été')
+
+    def test_least_recently_used_entries_are_evicted(self):
+        lru = SearchResultCache(max_entries=2, max_ids=5, timeout=60)
+        lru.set('a', 1, [1])
+        lru.set('b', 1, [2])
+        lru.get('a', 1, 'test')
+        lru.set('c', 1, [3])
+        self.assertIsNone(lru.get('b', 1, 'test'))
+        self.assertEqual(lru.get('a', 1, 'test'), ([1], False))
+        # Over max_ids: the least recently used entry ('c') goes
+        lru.set('d', 1, [4, 5, 6, 7])
+        self.assertEqual(len(lru), 2)
+        self.assertIsNone(lru.get('c', 1, 'test'))
+        lru.set('e', 1, list(range(6)))
+        self.assertIsNone(lru.get('e', 1, 'test'))
+
+    def test_entries_expire_and_are_dropped_by_a_new_generation(self):
+        evicted = search_cache_evictions.value('generation')
+        lru = SearchResultCache(max_entries=10, max_ids=100, timeout=60)
+        lru.set('a', 1, [1])
+        self.assertIsNone(lru.get('a', 2, 'test'))
+        self.assertEqual(search_cache_evictions.value('generation'), evicted + 1)
+
+        lru = SearchResultCache(max_entries=10, max_ids=100, timeout=0)
+        lru.set('a', 1, [1])
+        self.assertIsNone(lru.get('a', 1, 'test'))
+
+    def test_repeated_search_is_served_from_the_cache(self):
+        hits = search_cache_requests.value('home', 'hit')
+        self.client.get(reverse('home'), {'search': 'describe image'})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('home'), {'search': '  Describe IMAGE'})
+        self.assertContains(response, self.item.title)
+        self.assertEqual(search_cache_requests.value('home', 'hit'), hits + 1)
+        self.assertFalse(any('LIKE' in query['sql'] for query in queries.captured_queries))
+
+    def test_content_changes_invalidate_cached_results(self):
+        self.client.get(reverse('search_content'), {'q': 'describe image'})
+        added = Content.objects.create(section=self.section, title='Describe Image templates', content_type='note')
+        response = self.client.get(reverse('search_content'), {'q': 'describe image'})
+        self.assertIn(added.title, b''.join(response.streaming_content).decode())
+
+    def test_tag_renames_invalidate_cached_results(self):
+        tag = Tag.objects.create(name='templates')
+        ContentTag.objects.create(content=self.item, tag=tag)
+        def search(name):
+            response = self.client.get(reverse('search_content'), {'tag': name})
+            return (b''.join(response.streaming_content) if response.streaming else response.content).decode()
+
+        self.assertIn(self.item.title, search('templates'))
+
+        tag.name = 'model answers'
+        tag.save()
+        self.assertNotIn(self.item.title, search('templates'))
+        self.assertIn(self.item.title, search('model answers'))
+
+
+@override_settings(SEARCH_LOG_ENABLED=True)
+class SearchLogTests(TestCase):
+    def setUp(self):
+        search_log.clear()
+        result_cache.clear()
+        section = Section.objects.create(name='speaking', title='Speaking')
+        Content.objects.create(section=section, title='Describe Image tips', content_type='note')
+
+    def tearDown(self):
+        search_log.clear()
+
+    def test_searches_are_buffered_not_written_during_the_request(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('search_content'), {'q': '  Describe IMAGE', 'type': 'note'})
+        self.assertFalse(any('guide_searchlog' in query['sql'] for query in queries.captured_queries))
+        self.assertEqual(len(search_log), 1)
+
+        self.assertEqual(search_log.flush(), 1)
+        logged = SearchLog.objects.get()
+        self.assertEqual((logged.query, logged.scope, logged.content_type, logged.section), ('describe image', 'search', 'note', ''))
+        self.assertEqual(logged.result_count, 1)
+        self.assertFalse(logged.close_matches)
+
+    def test_buffer_is_written_in_batches(self):
+        buffer = SearchLogBuffer(batch_size=2, flush_seconds=60, max_buffered=3)
+        buffer.add('home', 'essay', {}, 0, False, 1.0)
+        buffer.flush_if_due()
+        self.assertEqual(SearchLog.objects.count(), 0)
+        buffer.add('home', 'essay', {}, 0, False, 1.0)
+        buffer.flush_if_due()
+        self.assertEqual(SearchLog.objects.count(), 2)
+        self.assertEqual(len(buffer), 0)
+
+        for query in ['a', 'b', 'c', 'd']:
+            buffer.add('home', query, {}, 0, False, 1.0)
+        self.assertEqual(len(buffer), 3)
+
+    def test_rollup_summarizes_each_query_of_the_day(self):
+        yesterday = timezone.now() - timedelta(days=1)
+        SearchLog.objects.bulk_create([
+            SearchLog(query='essay', scope='search', result_count=4, duration_ms=10, searched_at=yesterday),
+            SearchLog(query='essay', scope='home', result_count=0, duration_ms=30, searched_at=yesterday),
+            SearchLog(query='writen text', scope='search', result_count=2, close_matches=True, duration_ms=5,
+                      searched_at=yesterday),
+            SearchLog(query='essay', scope='search', result_count=4, duration_ms=10),
+        ])
+        call_command('rollup_search_logs', stdout=StringIO())
+
+        essay = DailySearchSummary.objects.get(query='essay')
+        self.assertEqual(essay.date, timezone.localdate(yesterday))
+        self.assertEqual((essay.searches, essay.zero_results, essay.close_matches), (2, 1, 0))
+        self.assertEqual((essay.average_results, essay.average_duration_ms, essay.max_duration_ms), (2, 20, 30))
+        self.assertEqual(DailySearchSummary.objects.get(query='writen text').close_matches, 1)
+
+        # Re-running replaces the day's summaries instead of adding to them
+        call_command('rollup_search_logs', stdout=StringIO())
+        self.assertEqual(DailySearchSummary.objects.count(), 2)
+
+
+class CompressionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        section = Section.objects.create(name='writing', title='Writing')
+        for i in range(60):
+            Content.objects.create(section=section, title=f'Essay {i}', content_type='note', order=i,
+                                   text_content='Practice essay text ' * 20)
+
+    def test_negotiate_encoding(self):
+        best = supported_encodings()[0]
+        self.assertEqual(negotiate_encoding('gzip, deflate, br'), best)
+        self.assertEqual(negotiate_encoding('br;q=0.5, gzip;q=0.8'), 'gzip')
+        self.assertEqual(negotiate_encoding('*'), best)
+        self.assertEqual(negotiate_encoding('gzip;q=0, identity'), None)
+        self.assertEqual(negotiate_encoding(''), None)
+
+    def test_large_streamed_page_is_compressed(self):
+        response = self.client.get(reverse('section_detail', args=['writing']), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        html = gzip.decompress(b''.join(response.streaming_content)).decode()
+        self.assertIn('Essay 0', html)
+        self.assertIn('Essay 59', html)
+        self.assertTrue(html.rstrip().endswith('</html>'))
+
+    def test_streamed_search_matches_full_render(self):
+        response = self.client.get(reverse('search_content') + '?q=essay')
+        html = b''.join(response.streaming_content).decode()
+        self.assertEqual(html.count('Essay '), 60)
+        self.assertNotIn('guide:stream-items', html)
+
+    def test_pages_with_csrf_token_are_not_compressed(self):
+        response = self.client.get(reverse('user_login'), HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertIn('csrfmiddlewaretoken', response.content.decode())
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_small_responses_are_not_compressed(self):
+        response = self.client.get(reverse('liveness_check'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_csrf_token_endpoint(self):
+        response = self.client.get(reverse('csrf_token'))
+        self.assertTrue(response.json()['csrf_token'])
+        self.assertIn('csrftoken', response.cookies)
+
+
+class QueryPatternTests(TestCase):
+    def test_fingerprint_ignores_parameters(self):
+        self.assertEqual(
+            fingerprint('SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = \'x\' LIMIT 21'),
+            fingerprint('SELECT * FROM t WHERE id IN (%s) AND name = \'y\' LIMIT 5'),
+        )
+
+    def test_detector_flags_repeated_queries(self):
+        create_user()
+        detector = QueryPatternDetector(threshold=2)
+        with connection.execute_wrapper(detector):
+            for _ in range(3):
+                list(SimpleUser.objects.filter(name='student'))
+        [(_, count, (_, code_origin))] = detector.repeated()
+        self.assertEqual(count, 3)
+        self.assertIn('guide/tests.py', code_origin)
+
+
+@override_settings(QUERY_PATTERN_DETECTION='fail', QUERY_PATTERN_THRESHOLD=3)
+class HotViewQueryTests(TestCase):
+    """Every hot view must render without repeated-query (N+1) patterns"""
+
+    @classmethod
+    def setUpTestData(cls):
+        sections = [
+            Section.objects.create(name=name, title=name.title())
+            for name in ['speaking', 'writing', 'reading', 'listening', 'collaborative']
+        ]
+        tags = [Tag.objects.create(name=f'Tag {i}') for i in range(3)]
+        cls.user = create_user()
+        for section in sections:
+            for i in range(6):
+                content = Content.objects.create(
+                    section=section, title=f'{section.title} essay {i}', content_type='note',
+                    text_content='Practice essay text', order=i,
+                )
+                for tag in tags:
+                    ContentTag.objects.create(content=content, tag=tag)
+                if i < 2:
+                    UserProgress.objects.create(user=cls.user, content=content, is_completed=True, is_favorited=True)
+        for i in range(5):
+            WhiteboardImage.objects.create(title=f'Board {i}', image_data='data:image/png;base64,', created_by=cls.user)
+            SpellingMistake.objects.create(user=cls.user, incorrect_word=f'wrod{i}', correct_word=f'word{i}')
+
+    def setUp(self):
+        self.client.post(reverse('user_login'), {'name': 'student', 'pin': '1234', 'action': 'login'})
+
+    def test_hot_views_have_no_repeated_queries(self):
+        urls = [
+            reverse('home'),
+            reverse('home') + '?search=essay',
+            reverse('section_detail', args=['reading']),
+            reverse('search_content') + '?q=essay',
+            reverse('progress'),
+            reverse('favorites'),
+            reverse('whiteboard_gallery'),
+            reverse('spelling_mistakes'),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.render(url).status_code, 200)
+
+    def render(self, url):
+        response = self.client.get(url)
+        # Streamed pages render their item lists while being consumed
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response
+
+    def test_streamed_item_lists_are_checked(self):
+        def content_type_label(content):
+            # An N+1 hidden in the streamed item templates
+            return Content.objects.filter(pk=content.pk).values_list('content_type', flat=True).get()
+
+        urls = [reverse('section_detail', args=['reading']), reverse('search_content') + '?q=essay']
+        with mock.patch.object(Content, 'get_content_type_display', content_type_label):
+            for url in urls:
+                with self.subTest(url=url):
+                    response = self.client.get(url)
+                    self.assertTrue(response.streaming)
+                    with self.assertRaises(RepeatedQueryError):
+                        b''.join(response.streaming_content)
+
+    def test_progress_counts(self):
+        response = self.client.get(reverse('progress'))
+        reading = response.context['progress_data']['reading']
+        self.assertEqual((reading['completed'], reading['total']), (2, 6))
+
+    def test_fail_mode_raises(self):
+        with override_settings(QUERY_PATTERN_THRESHOLD=0):
+            with self.assertRaises(RepeatedQueryError):
+                self.client.get(reverse('progress'))
+
+
+class SyntheticDataTests(TestCase):
+    OPTIONS = dict(sections=2, contents=12, tags=4, users=3, progress_per_user=5, mistakes_per_user=4,
+                   whiteboards=2, seed=7)
+
+    def generate(self, **options):
+        call_command('generate_synthetic_data', stdout=StringIO(), **{**self.OPTIONS, **options})
+
+    def snapshot(self):
+        activity = list(DailyActivity.objects.order_by('user', 'date').values_list('user', 'date', *DailyActivity.COUNTERS))
+        counters = list(Content.objects.order_by('id').values_list(
+            'id', 'completion_count', 'favorite_count', 'recent_completion_count'
+        ))
+        return activity, counters
+
+    def assert_rollups_match_a_rebuild(self):
+        before = self.snapshot()
+        rebuild_activity(DailyActivity, UserProgress, SpellingMistake, WhiteboardImage)
+        self.assertEqual(Content.reconcile_counters(), 0)
+        self.assertEqual(self.snapshot(), before)
+
+    def test_generates_consistent_data(self):
+        self.generate()
+
+        self.assertEqual(Section.objects.count(), 2)
+        self.assertEqual(Tag.objects.count(), 4)
+        self.assertEqual(Content.objects.count(), 12)
+        self.assertEqual(SimpleUser.objects.count(), 3)
+        self.assertEqual(UserProgress.objects.count(), 15)
+        self.assertEqual(SpellingMistake.objects.count(), 12)
+        self.assertEqual(WhiteboardImage.objects.count(), 2)
+        self.assertTrue(DailyActivity.objects.exists())
+        self.assertTrue(SimpleUser.authenticate('synthetic-user-00000', '1234'))
+        self.assert_rollups_match_a_rebuild()
+
+    def test_running_again_adds_more_and_clear_removes_it(self):
+        self.generate()
+        first_users = set(SimpleUser.objects.values_list('name', flat=True))
+        self.generate()
+
+        self.assertEqual(Tag.objects.count(), 4)
+        self.assertEqual(Content.objects.count(), 24)
+        self.assertEqual(SimpleUser.objects.count(), 6)
+        self.assertEqual(UserProgress.objects.count(), 30)
+        self.assertTrue(first_users < set(SimpleUser.objects.values_list('name', flat=True)))
+        self.assert_rollups_match_a_rebuild()
+
+        self.generate(clear=True)
+        self.assertEqual((Content.objects.count(), SimpleUser.objects.count()), (12, 3))
+        self.assert_rollups_match_a_rebuild()
+
+    def test_benchmark_views_restores_the_toggled_row(self):
+        self.generate()
+        user = SimpleUser.objects.get(name='synthetic-user-00000')
+        before = list(UserProgress.objects.filter(user=user).order_by('content').values_list(
+            'content', 'is_favorited', 'favorited_at'
+        ))
+        output = os.path.join(tempfile.mkdtemp(), 'results.json')
+
+        call_command('benchmark_views', iterations=1, warmup=0, output=output, stdout=StringIO())
+
+        with open(output) as results:
+            report = json.load(results)
+        self.assertEqual(report['dataset']['contents'], 12)
+        self.assertEqual({view['status'] for view in report['views'].values()}, {200})
+        after = list(UserProgress.objects.filter(user=user).order_by('content').values_list(
+            'content', 'is_favorited', 'favorited_at'
+        ))
+        self.assertEqual(after, before)
+        self.assertEqual(Content.reconcile_counters(), 0)
+
+
+class HealthCheckTests(TestCase):
+    def setUp(self):
+        clear_cached_result()
+
+    def test_liveness(self):
+        self.assertEqual(self.client.get(reverse('liveness_check')).json(), {'status': 'ok'})
+
+    def test_readiness_reports_each_check(self):
+        response = self.client.get(reverse('readiness_check'))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(set(data['checks']), {'database', 'migrations', 'cache', 'session_cache', 'disk'})
+        self.assertTrue(all('latency_ms' in check for check in data['checks'].values()))
+        self.assertTrue(self.client.get(reverse('readiness_check')).json()['cached'])
+
+    def test_readiness_fails_on_low_disk(self):
+        with override_settings(HEALTH_MIN_FREE_DISK_MB=10 ** 12):
+            response = self.client.get(reverse('readiness_check'))
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(response.json()['checks']['disk']['ok'])
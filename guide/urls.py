@@ -13,8 +13,12 @@ urlpatterns = [
     path('delete/<int:content_id>/', views.delete_content, name='delete_content'),
     path('toggle-progress/', views.toggle_progress, name='toggle_progress'),
     path('search/', views.search_content, name='search_content'),
+    path('search/suggest/', views.search_suggestions, name='search_suggestions'),
     path('favorites/', views.favorites_view, name='favorites'),
     path('progress/', views.progress_view, name='progress'),
+    path('progress/activity/', views.progress_activity, name='progress_activity'),
+    path('progress/review/session/', views.review_session, name='review_session'),
+    path('progress/review/', views.review_content, name='review_content'),
     path('debug-edit/', views.debug_edit, name='debug_edit'),
     path('login/', views.user_login, name='user_login'),
     path('user-logout/', views.user_logout, name='user_logout'),
@@ -24,8 +28,18 @@ urlpatterns = [
     path('whiteboard/delete/<int:whiteboard_id>/', views.delete_whiteboard, name='delete_whiteboard'),
     path('spelling-mistakes/', views.spelling_mistakes, name='spelling_mistakes'),
     path('spelling-mistakes/add/', views.add_spelling_mistake, name='add_spelling_mistake'),
+    path('spelling-mistakes/bulk-add/', views.bulk_add_spelling_mistakes, name='bulk_add_spelling_mistakes'),
     path('spelling-mistakes/edit/<int:mistake_id>/', views.edit_spelling_mistake, name='edit_spelling_mistake'),
     path('spelling-mistakes/delete/<int:mistake_id>/', views.delete_spelling_mistake, name='delete_spelling_mistake'),
     path('spelling-mistakes/toggle-review/', views.toggle_spelling_review, name='toggle_spelling_review'),
+    path('spelling-mistakes/analytics/', views.spelling_analytics, name='spelling_analytics'),
+    path('spelling-mistakes/suggest/', views.spelling_suggestions, name='spelling_suggestions'),
+    path('spelling-mistakes/review/due/', views.spelling_review_due, name='spelling_review_due'),
+    path('spelling-mistakes/review/', views.review_spelling_mistake, name='review_spelling_mistake'),
+    path('content/<int:content_id>/body/', views.content_body, name='content_body'),
+    path('csrf-token/', views.csrf_token, name='csrf_token'),
     path('health/', views.health_check, name='health_check'),
+    path('health/live/', views.liveness_check, name='liveness_check'),
+    path('health/ready/', views.readiness_check, name='readiness_check'),
+    path('metrics/', views.metrics_view, name='metrics'),
 ]
\ No newline at end of file
@@ -1,15 +1,44 @@
-from django.shortcuts import render, get_object_or_404, redirect
+from asgiref.sync import sync_to_async
+from django.shortcuts import render, get_object_or_404, aget_object_or_404, redirect
+from django.urls import reverse
+from django.utils.http import urlencode
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.middleware.csrf import get_token
+from django.template.loader import get_template, render_to_string
+from django.utils.cache import get_conditional_response
+from django.utils.safestring import mark_safe
+from django.views.decorators.cache import never_cache
 from django.views.decorators.csrf import csrf_exempt
 from django.conf import settings
-from django.db.models import Q, Count
+from django.core.cache import cache
+from django.db.models import BooleanField, Count, ExpressionWrapper, Max, Prefetch, Q
 from django.utils import timezone
-from .models import Section, Content, Tag, ContentTag, UserProgress, SimpleUser, WhiteboardImage, SpellingMistake
+from .models import (
+    Section, Content, CompletionDistribution, ContentNeighbor, DailyActivity, Tag, ContentTag, UserProgress, SimpleUser,
+    WhiteboardImage, SpellingMistake,
+)
+from .spelling import parse_correction_pairs, parse_correction_csv, find_context, count_occurrences, summarize_mistakes
+from .suggester import get_suggester
+from .autocomplete import get_autocomplete_index
+from .search import load_contents, normalize_query, search_content_ids
+from .search_log import search_log
+from .metrics import registry as metrics_registry
+from .health import run_readiness_checks
+import csv
 import json
+import time
 import uuid
 
 EDIT_PASSCODE = "pte2024"  # Change this to your desired passcode
+SPELLING_ANALYTICS_CACHE_TIMEOUT = 60 * 60
+STREAM_PLACEHOLDER = '<!-- guide:stream-items -->'
+CONTENT_BODY_MAX_AGE = 60 * 60 * 24 * 365
+RELATED_ITEMS_SHOWN = 3
+SEARCH_FALLBACK_RESULTS = 50
+# Days shown in the activity heatmap on the progress page (26 weeks)
+ACTIVITY_CALENDAR_DAYS = 182
+MAX_ACTIVITY_DAYS = 366
 
 def get_current_user(request):
     """Get the current logged-in SimpleUser or None"""
@@ -22,21 +51,90 @@ def get_current_user(request):
             request.session.pop('current_user', None)
     return None
 
+async def aget_current_user(request):
+    """Async version of get_current_user for async views"""
+    user_id = await request.session.aget('user_id')
+    if user_id:
+        try:
+            return await SimpleUser.objects.aget(id=user_id)
+        except SimpleUser.DoesNotExist:
+            await request.session.apop('user_id', None)
+            await request.session.apop('current_user', None)
+    return None
+
+def render_streaming(request, template_name, context, items_template_name, items_name):
+    """Render a list page as a StreamingHttpResponse.
+
+    The page shell is rendered up front (so messages, session and CSRF state
+    are settled inside the middleware stack) with STREAM_PLACEHOLDER where
+    the list goes; the list itself is rendered from items_template_name in
+    chunks of settings.STREAMING_CHUNK_SIZE while the response is sent.
+    context[items_name] must already be evaluated.
+    """
+    shell = render_to_string(template_name, {**context, 'stream_placeholder': mark_safe(STREAM_PLACEHOLDER)}, request)
+    if STREAM_PLACEHOLDER not in shell:
+        return HttpResponse(shell)
+
+    head, tail = shell.split(STREAM_PLACEHOLDER, 1)
+    items = context[items_name]
+    items_template = get_template(items_template_name)
+    chunk_size = max(settings.STREAMING_CHUNK_SIZE, 1)
+
+    def stream():
+        yield head
+        for start in range(0, len(items), chunk_size):
+            yield items_template.render({**context, items_name: items[start:start + chunk_size]}, request)
+        yield tail
+
+    return StreamingHttpResponse(stream())
+
+def update_session(request, **values):
+    """Set session keys, leaving the session unmodified (and unsaved) if nothing changed"""
+    for key, value in values.items():
+        if request.session.get(key) != value:
+            request.session[key] = value
+
+def spelling_analytics_cache_key(user):
+    """Cache key versioned by the user's mistake count and latest change.
+
+    Every write through the views bumps updated_at or the count, so a change
+    made through any worker moves every worker to a new key. The default
+    cache is per process, so a delete would only reach the worker that
+    handled the write.
+    """
+    version = SpellingMistake.objects.filter(user=user).aggregate(count=Count('id'), changed=Max('updated_at'))
+    changed = version['changed'].timestamp() if version['changed'] else 0
+    return f"spelling_analytics:{user.id}:{version['count']}:{changed}"
+
+def get_spelling_analytics(user):
+    """Get spelling analytics for a user, computing them on a cache miss"""
+    key = spelling_analytics_cache_key(user)
+    analytics = cache.get(key)
+    if analytics is None:
+        rows = SpellingMistake.objects.filter(user=user).values_list(
+            'incorrect_normalized', 'correct_normalized', 'frequency'
+        ).iterator(chunk_size=2000)
+        analytics = summarize_mistakes(rows)
+        cache.set(key, analytics, SPELLING_ANALYTICS_CACHE_TIMEOUT)
+    return analytics
+
 def home(request):
-    sections = Section.objects.all()
+    sections = Section.objects.annotate(content_count=Count('contents'))
     search_query = request.GET.get('search', '')
     
     # Recent content
-    recent_content = Content.objects.filter(is_active=True).order_by('-created_at')[:5]
+    recent_content = Content.objects.filter(is_active=True).select_related('section').order_by('-created_at')[:5]
     
     # Search functionality
-    if search_query:
-        search_results = Content.objects.filter(
-            Q(title__icontains=search_query) |
-            Q(description__icontains=search_query) |
-            Q(text_content__icontains=search_query),
-            is_active=True
-        ).order_by('-created_at')[:10]
+    query = normalize_query(search_query)
+    if query:
+        start = time.perf_counter()
+        filters = {'is_active': True}
+        ids, close_matches = search_content_ids('home', query, filters, limit=10)
+        search_results = load_contents(ids)
+        if settings.SEARCH_LOG_ENABLED:
+            search_log.add('home', query, filters, len(search_results), close_matches,
+                           (time.perf_counter() - start) * 1000)
     else:
         search_results = None
     
@@ -60,8 +158,19 @@ def section_detail(request, section_name):
     show_completed = request.GET.get('completed', '')
     show_favorites = request.GET.get('favorites', '')
     
-    # Base queryset
-    contents = section.contents.filter(is_active=True)
+    # Base queryset. Bodies are fetched per item from content_body when a
+    # card is expanded, so only a has_body flag is selected here.
+    contents = (
+        section.contents.filter(is_active=True)
+        .defer('text_content', 'text_html')
+        .annotate(has_body=ExpressionWrapper(~Q(text_content=''), output_field=BooleanField()))
+        .prefetch_related('content_tags__tag', Prefetch(
+            'neighbors',
+            queryset=ContentNeighbor.objects.filter(kind='text', rank__lte=RELATED_ITEMS_SHOWN, neighbor__is_active=True)
+            .select_related('neighbor__section').defer('neighbor__text_content', 'neighbor__text_html'),
+            to_attr='related_items',
+        ))
+    )
     
     # Apply filters
     if content_type:
@@ -98,8 +207,13 @@ def section_detail(request, section_name):
         contents = contents.order_by('-created_at')
     elif sort_by == 'updated':
         contents = contents.order_by('-updated_at')
+    elif sort_by == 'popular':
+        contents = contents.order_by('-completion_count', '-favorite_count', 'order')
+    elif sort_by == 'trending':  # completions in the last Content.TRENDING_DAYS days
+        contents = contents.order_by('-recent_completion_count', '-completion_count', 'order')
     else:  # default to order
         contents = contents.order_by('order', 'created_at')
+    contents = list(contents)
     
     # Get available tags for this section
     available_tags = Tag.objects.filter(
@@ -121,6 +235,7 @@ def section_detail(request, section_name):
         'is_edit_mode': is_edit_mode,
         'available_tags': available_tags,
         'user_progress': user_progress,
+        'next_up': ContentNeighbor.next_up(current_user, section=section) if current_user else [],
         'current_user': current_user,
         'filters': {
             'content_type': content_type,
@@ -130,13 +245,15 @@ def section_detail(request, section_name):
             'show_favorites': show_favorites,
         }
     }
-    return render(request, 'guide/section_detail.html', context)
+    return render_streaming(
+        request, 'guide/section_detail.html', context, 'guide/includes/section_content_items.html', 'contents'
+    )
 
 def authenticate_edit(request):
     if request.method == 'POST':
         passcode = request.POST.get('passcode')
         if passcode == EDIT_PASSCODE:
-            request.session['can_edit'] = True
+            update_session(request, can_edit=True)
             messages.success(request, 'Authentication successful! You can now edit content.')
         else:
             messages.error(request, 'Invalid passcode.')
@@ -311,10 +428,10 @@ def delete_content(request, content_id):
     return redirect('section_detail', section_name=section_name)
 
 @csrf_exempt
-def toggle_progress(request):
+async def toggle_progress(request):
     """Toggle content completion status"""
     if request.method == 'POST':
-        current_user = get_current_user(request)
+        current_user = await aget_current_user(request)
         if not current_user:
             return JsonResponse({'success': False, 'error': 'Please login to track progress'})
         
@@ -322,22 +439,8 @@ def toggle_progress(request):
         content_id = data.get('content_id')
         action = data.get('action')  # 'complete', 'favorite'
         
-        content = get_object_or_404(Content, id=content_id)
-        
-        progress, created = UserProgress.objects.get_or_create(
-            user=current_user,
-            content=content,
-            defaults={'is_completed': False, 'is_favorited': False}
-        )
-        
-        if action == 'complete':
-            progress.is_completed = not progress.is_completed
-            progress.completed_at = timezone.now() if progress.is_completed else None
-        elif action == 'favorite':
-            progress.is_favorited = not progress.is_favorited
-            progress.favorited_at = timezone.now() if progress.is_favorited else None
-        
-        progress.save()
+        content = await aget_object_or_404(Content, id=content_id)
+        progress = await sync_to_async(UserProgress.toggle)(current_user, content, action)
         
         return JsonResponse({
             'success': True,
@@ -352,26 +455,29 @@ def search_content(request):
     query = request.GET.get('q', '')
     section_filter = request.GET.get('section', '')
     content_type_filter = request.GET.get('type', '')
+    tag_filter = request.GET.get('tag', '')
     
-    if not query:
+    if not query and not tag_filter:
         return render(request, 'guide/search.html', {'query': query})
     
-    # Search in title, description, and text content
-    results = Content.objects.filter(
-        Q(title__icontains=query) |
-        Q(description__icontains=query) |
-        Q(text_content__icontains=query),
-        is_active=True
-    )
-    
-    # Apply filters
+    filters = {'is_active': True}
     if section_filter:
-        results = results.filter(section__name=section_filter)
-    
+        filters['section__name'] = section_filter
     if content_type_filter:
-        results = results.filter(content_type=content_type_filter)
+        filters['content_type'] = content_type_filter
+    if tag_filter:
+        filters['content_tags__tag__name'] = tag_filter
     
-    results = results.order_by('-created_at')
+    # Search in title, description, and text content; when nothing contains
+    # the query as typed, fall back to titles that match its words with
+    # typos ("summarise writen text")
+    start = time.perf_counter()
+    normalized = normalize_query(query)
+    ids, close_matches = search_content_ids('search', normalized, filters, close_matches=SEARCH_FALLBACK_RESULTS)
+    results = load_contents(ids)
+    if settings.SEARCH_LOG_ENABLED:
+        search_log.add('search', normalized, filters, len(results), close_matches,
+                       (time.perf_counter() - start) * 1000)
     
     # Get sections for filter dropdown
     sections = Section.objects.all()
@@ -379,11 +485,41 @@ def search_content(request):
     context = {
         'query': query,
         'results': results,
+        'close_matches': close_matches,
         'sections': sections,
         'section_filter': section_filter,
         'content_type_filter': content_type_filter,
+        'tag_filter': tag_filter,
     }
-    return render(request, 'guide/search.html', context)
+    return render_streaming(
+        request, 'guide/search.html', context, 'guide/includes/search_result_items.html', 'results'
+    )
+
+def search_suggestions(request):
+    """Titles and tags matching what has been typed so far, for the navbar search box"""
+    query = request.GET.get('q', '').strip()
+    
+    try:
+        limit = int(request.GET.get('limit', 8))
+    except ValueError:
+        limit = 8
+    limit = max(1, min(limit, 20))
+    
+    suggestions = []
+    for entry in get_autocomplete_index().search(query, limit=limit) if query else []:
+        if entry['type'] == 'tag':
+            url = f"{reverse('search_content')}?{urlencode({'tag': entry['tag']})}"
+        else:
+            url = f"{reverse('section_detail', args=[entry['section']])}#content-{entry['id']}"
+        suggestions.append({'type': entry['type'], 'label': entry['label'], 'url': url})
+    
+    response = JsonResponse({
+        'success': True,
+        'query': query,
+        'suggestions': suggestions,
+    })
+    response['Cache-Control'] = f'public, max-age={settings.AUTOCOMPLETE_REFRESH_SECONDS:.0f}'
+    return response
 
 def favorites_view(request):
     """Show user's favorite content"""
@@ -411,22 +547,33 @@ def progress_view(request):
         return redirect('user_login')
     
     # Get progress by section
-    sections = Section.objects.all()
+    sections = Section.objects.annotate(
+        active_count=Count('contents', filter=Q(contents__is_active=True))
+    )
+    completed_counts = dict(
+        UserProgress.objects.filter(
+            user=current_user,
+            is_completed=True,
+            content__is_active=True,
+        ).values_list('content__section').annotate(completed=Count('id')).order_by()
+    )
+    # Where the user stands among all learners, from build_cohort_percentiles
+    distributions = {
+        distribution.section_id: distribution for distribution in CompletionDistribution.objects.all()
+    }
     progress_data = {}
     
     for section in sections:
-        total_content = section.contents.filter(is_active=True).count()
-        completed_content = UserProgress.objects.filter(
-            user=current_user,
-            content__section=section,
-            is_completed=True
-        ).count()
+        total_content = section.active_count
+        completed_content = completed_counts.get(section.id, 0)
+        distribution = distributions.get(section.id)
         
         progress_data[section.name] = {
             'section': section,
             'total': total_content,
             'completed': completed_content,
-            'percentage': (completed_content / total_content * 100) if total_content > 0 else 0
+            'percentage': (completed_content / total_content * 100) if total_content > 0 else 0,
+            'ahead_of': distribution.ahead_of(completed_content) if distribution and completed_content else None,
         }
     
     # Recent completed content
@@ -438,10 +585,98 @@ def progress_view(request):
     context = {
         'progress_data': progress_data,
         'recent_completed': recent_completed,
+        'next_up': ContentNeighbor.next_up(current_user, limit=6),
+        'activity': DailyActivity.calendar(current_user, days=ACTIVITY_CALENDAR_DAYS),
         'current_user': current_user,
     }
     return render(request, 'guide/progress.html', context)
 
+def progress_activity(request):
+    """Streaks and per-day activity counts of the logged-in user, as JSON"""
+    current_user = get_current_user(request)
+    if not current_user:
+        return JsonResponse({'error': 'Please login to view your activity'}, status=401)
+    try:
+        days = min(max(int(request.GET.get('days', ACTIVITY_CALENDAR_DAYS)), 1), MAX_ACTIVITY_DAYS)
+    except ValueError:
+        days = ACTIVITY_CALENDAR_DAYS
+    activity = DailyActivity.calendar(current_user, days=days)
+    return JsonResponse({
+        'current_streak': activity['current_streak'],
+        'longest_streak': activity['longest_streak'],
+        'active_days': activity['active_days'],
+        'totals': activity['totals'],
+        'days': [
+            {'date': cell['date'].isoformat(), 'total': cell['total'], 'level': cell['level']}
+            for week in activity['weeks'] for cell in week if cell
+        ],
+    })
+
+def review_session(request):
+    """Hand out the next batch of completed content due for review today"""
+    current_user = get_current_user(request)
+    if not current_user:
+        return JsonResponse({'success': False, 'error': 'Please login first'})
+    
+    try:
+        limit = int(request.GET.get('limit', 10))
+    except ValueError:
+        limit = 10
+    limit = max(1, min(limit, 50))
+    
+    due_items = UserProgress.due_for_review(current_user, limit=limit)
+    
+    return JsonResponse({
+        'success': True,
+        'items': [
+            {
+                'id': progress.id,
+                'content_id': progress.content_id,
+                'title': progress.content.title,
+                'section': progress.content.section.title,
+                'url': f"{reverse('section_detail', args=[progress.content.section.name])}#content-{progress.content_id}",
+                'repetitions': progress.repetitions,
+                'interval_days': progress.interval_days,
+                'due_at': progress.next_review_at.isoformat(),
+            }
+            for progress in due_items
+        ]
+    })
+
+@csrf_exempt
+def review_content(request):
+    """Grade a content review and schedule the next one"""
+    if request.method == 'POST':
+        current_user = get_current_user(request)
+        if not current_user:
+            return JsonResponse({'success': False, 'error': 'Please login first'})
+        
+        data = json.loads(request.body)
+        progress_id = data.get('progress_id')
+        quality = data.get('quality')
+        
+        try:
+            quality = int(quality)
+        except (TypeError, ValueError):
+            return JsonResponse({'success': False, 'error': 'Quality must be a number from 0 to 5'})
+        
+        try:
+            progress = UserProgress.objects.get(id=progress_id, user=current_user, is_completed=True)
+        except UserProgress.DoesNotExist:
+            return JsonResponse({'success': False, 'error': 'Completed content not found'})
+        
+        progress.schedule_review(quality)
+        progress.save(update_fields=['repetitions', 'interval_days', 'ease_factor', 'next_review_at', 'updated_at'])
+        
+        return JsonResponse({
+            'success': True,
+            'interval_days': progress.interval_days,
+            'ease_factor': round(progress.ease_factor, 2),
+            'due_at': progress.next_review_at.isoformat(),
+        })
+    
+    return JsonResponse({'success': False, 'error': 'Invalid request method'})
+
 def debug_edit(request):
     """Debug view to help diagnose edit issues"""
     if not request.session.get('can_edit', False):
@@ -476,9 +711,8 @@ def user_login(request):
         if action == 'login':
             user = SimpleUser.authenticate(name, pin)
             if user:
-                request.session['user_id'] = user.id
-                request.session['current_user'] = user.name
-                user.save()  # Update last_login
+                update_session(request, user_id=user.id, current_user=user.name)
+                user.save(update_fields=['last_login'])
                 messages.success(request, f'Welcome back, {user.name}!')
                 return redirect('home')
             else:
@@ -489,8 +723,7 @@ def user_login(request):
                 user = SimpleUser(name=name)
                 user.set_pin(pin)
                 user.save()
-                request.session['user_id'] = user.id
-                request.session['current_user'] = user.name
+                update_session(request, user_id=user.id, current_user=user.name)
                 messages.success(request, f'Account created successfully! Welcome, {user.name}!')
                 return redirect('home')
             except Exception as e:
@@ -512,14 +745,14 @@ def whiteboard(request):
 
 def whiteboard_gallery(request):
     """View all saved whiteboards"""
-    whiteboards = WhiteboardImage.objects.all()
+    whiteboards = WhiteboardImage.objects.select_related('created_by')
     context = {
         'whiteboards': whiteboards,
     }
     return render(request, 'guide/whiteboard_gallery.html', context)
 
 @csrf_exempt
-def save_whiteboard(request):
+async def save_whiteboard(request):
     """Save whiteboard image to gallery"""
     if request.method == 'POST':
         try:
@@ -531,14 +764,16 @@ def save_whiteboard(request):
                 return JsonResponse({'success': False, 'error': 'No image data provided'})
             
             # Get current user if logged in
-            current_user = get_current_user(request)
+            current_user = await aget_current_user(request)
             
             # Save whiteboard
-            whiteboard = WhiteboardImage.objects.create(
+            whiteboard = await WhiteboardImage.objects.acreate(
                 title=title,
                 image_data=image_data,
                 created_by=current_user
             )
+            if current_user:
+                await sync_to_async(DailyActivity.record)(current_user, whiteboard_saves=1)
             
             return JsonResponse({
                 'success': True, 
@@ -552,18 +787,41 @@ def save_whiteboard(request):
     return JsonResponse({'success': False, 'error': 'Invalid request method'})
 
 @csrf_exempt
-def delete_whiteboard(request, whiteboard_id):
+async def delete_whiteboard(request, whiteboard_id):
     """Delete a whiteboard"""
     if request.method == 'POST':
         try:
-            whiteboard = get_object_or_404(WhiteboardImage, id=whiteboard_id)
-            whiteboard.delete()
+            whiteboard = await aget_object_or_404(WhiteboardImage, id=whiteboard_id)
+            await whiteboard.adelete()
             return JsonResponse({'success': True, 'message': 'Whiteboard deleted successfully!'})
         except Exception as e:
             return JsonResponse({'success': False, 'error': str(e)})
     
     return JsonResponse({'success': False, 'error': 'Invalid request method'})
 
+def content_body(request, content_id):
+    """Pre-rendered HTML body of one content item, fetched when its card is expanded.
+
+    URLs carrying the current body_version are immutable and cached for a
+    year; anything else is revalidated with the ETag.
+    """
+    content = get_object_or_404(
+        Content.objects.only('id', 'text_html', 'updated_at'), id=content_id, is_active=True
+    )
+    etag = f'"{content.body_version}"'
+    response = HttpResponse(content.text_html)
+    response['ETag'] = etag
+    if request.GET.get('v') == content.body_version:
+        response['Cache-Control'] = f'public, max-age={CONTENT_BODY_MAX_AGE}, immutable'
+    else:
+        response['Cache-Control'] = 'no-cache'
+    return get_conditional_response(request, etag=etag, response=response)
+
+@never_cache
+def csrf_token(request):
+    """Hand out a CSRF token on demand so cacheable, compressed pages need not embed one"""
+    return JsonResponse({'csrf_token': get_token(request)})
+
 def health_check(request):
     """Simple health check endpoint"""
     return JsonResponse({
@@ -578,6 +836,24 @@ def health_check(request):
         ]
     })
 
+def liveness_check(request):
+    """Liveness probe: the worker process is up and serving requests"""
+    return JsonResponse({'status': 'ok'})
+
+def readiness_check(request):
+    """Readiness probe: database, migrations, cache and disk are usable"""
+    result = run_readiness_checks()
+    response = JsonResponse(result, status=200 if result['status'] == 'ok' else 503)
+    response['Cache-Control'] = 'no-store'
+    return response
+
+def metrics_view(request):
+    """Per-view request metrics in the Prometheus text format"""
+    return HttpResponse(
+        metrics_registry.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
 def spelling_mistakes(request):
     """View spelling mistakes for current user"""
     current_user = get_current_user(request)
@@ -632,11 +908,7 @@ def add_spelling_mistake(request):
         
         try:
             # Check if this mistake already exists for the user
-            existing_mistake = SpellingMistake.objects.filter(
-                user=current_user,
-                incorrect_word__iexact=incorrect_word,
-                correct_word__iexact=correct_word
-            ).first()
+            existing_mistake = SpellingMistake.find_existing(current_user, incorrect_word, correct_word)
             
             if existing_mistake:
                 # Increment frequency and update context if provided
@@ -646,7 +918,9 @@ def add_spelling_mistake(request):
                 if notes:
                     existing_mistake.notes = notes
                 existing_mistake.is_reviewed = False  # Reset reviewed status
+                existing_mistake.reset_schedule()  # Due for review again
                 existing_mistake.save()
+                DailyActivity.record(current_user, spelling_entries=1)
                 messages.success(request, f'Updated existing mistake: {incorrect_word} → {correct_word} (frequency: {existing_mistake.frequency})')
             else:
                 # Create new mistake
@@ -657,6 +931,7 @@ def add_spelling_mistake(request):
                     context=context,
                     notes=notes
                 )
+                DailyActivity.record(current_user, spelling_entries=1)
                 messages.success(request, f'Added spelling mistake: {incorrect_word} → {correct_word}')
             
             return redirect('spelling_mistakes')
@@ -666,9 +941,152 @@ def add_spelling_mistake(request):
     
     return render(request, 'guide/add_spelling_mistake.html')
 
+def spelling_analytics(request):
+    """Show which kinds of spelling mistakes the user makes most"""
+    current_user = get_current_user(request)
+    if not current_user:
+        messages.info(request, 'Please login to view your spelling analytics.')
+        return redirect('user_login')
+    
+    context = {
+        'analytics': get_spelling_analytics(current_user),
+        'current_user': current_user,
+    }
+    return render(request, 'guide/spelling_analytics.html', context)
+
+def bulk_add_spelling_mistakes(request):
+    """Add many spelling mistakes at once from an essay and correction pairs"""
+    current_user = get_current_user(request)
+    if not current_user:
+        messages.info(request, 'Please login to add spelling mistakes.')
+        return redirect('user_login')
+    
+    if request.method == 'POST':
+        essay = request.POST.get('essay', '').strip()
+        pairs_text = request.POST.get('pairs', '')
+        csv_file = request.FILES.get('csv_file')
+        
+        entries = []
+        for incorrect_word, correct_word in parse_correction_pairs(pairs_text):
+            entries.append((
+                incorrect_word,
+                correct_word,
+                find_context(essay, incorrect_word),
+                count_occurrences(essay, incorrect_word),
+            ))
+        
+        if csv_file:
+            try:
+                for incorrect_word, correct_word, context in parse_correction_csv(csv_file.read()):
+                    entries.append((
+                        incorrect_word,
+                        correct_word,
+                        context or find_context(essay, incorrect_word),
+                        count_occurrences(essay, incorrect_word),
+                    ))
+            except csv.Error as e:
+                messages.error(request, f'Could not read CSV file: {str(e)}')
+                return render(request, 'guide/bulk_add_spelling_mistakes.html', {
+                    'essay': essay,
+                    'pairs': pairs_text,
+                })
+        
+        if not entries:
+            messages.error(request, 'Please enter at least one correction pair or upload a CSV file.')
+            return render(request, 'guide/bulk_add_spelling_mistakes.html', {
+                'essay': essay,
+                'pairs': pairs_text,
+            })
+        
+        try:
+            created, updated = SpellingMistake.bulk_record(current_user, entries)
+            messages.success(request, f'Logged {created + updated} spelling mistakes ({created} new, {updated} updated).')
+            return redirect('spelling_mistakes')
+        except Exception as e:
+            messages.error(request, f'An error occurred: {str(e)}')
+    
+    return render(request, 'guide/bulk_add_spelling_mistakes.html')
+
 @csrf_exempt
-def toggle_spelling_review(request):
+async def toggle_spelling_review(request):
     """Toggle reviewed status of a spelling mistake"""
+    if request.method == 'POST':
+        current_user = await aget_current_user(request)
+        if not current_user:
+            return JsonResponse({'success': False, 'error': 'Please login first'})
+        
+        data = json.loads(request.body)
+        mistake_id = data.get('mistake_id')
+        
+        try:
+            mistake = await SpellingMistake.objects.aget(id=mistake_id, user=current_user)
+            mistake.is_reviewed = not mistake.is_reviewed
+            await mistake.asave()
+            
+            return JsonResponse({
+                'success': True,
+                'is_reviewed': mistake.is_reviewed
+            })
+        except SpellingMistake.DoesNotExist:
+            return JsonResponse({'success': False, 'error': 'Spelling mistake not found'})
+        except Exception as e:
+            return JsonResponse({'success': False, 'error': str(e)})
+    
+    return JsonResponse({'success': False, 'error': 'Invalid request method'})
+
+def spelling_suggestions(request):
+    """Suggest correct spellings for a misspelled word"""
+    word = request.GET.get('word', '').strip()
+    
+    try:
+        limit = int(request.GET.get('limit', 5))
+    except ValueError:
+        limit = 5
+    limit = max(1, min(limit, 20))
+    
+    suggestions = get_suggester().suggest(word, limit=limit) if word else []
+    
+    response = JsonResponse({
+        'success': True,
+        'word': word,
+        'suggestions': suggestions,
+    })
+    response['Cache-Control'] = 'public, max-age=86400'
+    return response
+
+def spelling_review_due(request):
+    """Get the next spelling mistakes due for review"""
+    current_user = get_current_user(request)
+    if not current_user:
+        return JsonResponse({'success': False, 'error': 'Please login first'})
+    
+    try:
+        limit = int(request.GET.get('limit', 10))
+    except ValueError:
+        limit = 10
+    limit = max(1, min(limit, 50))
+    
+    due_mistakes = SpellingMistake.due_for_review(current_user, limit=limit)
+    
+    return JsonResponse({
+        'success': True,
+        'mistakes': [
+            {
+                'id': mistake.id,
+                'incorrect_word': mistake.incorrect_word,
+                'correct_word': mistake.correct_word,
+                'context': mistake.context,
+                'frequency': mistake.frequency,
+                'repetitions': mistake.repetitions,
+                'due_at': mistake.due_at.isoformat(),
+            }
+            for mistake in due_mistakes
+        ]
+    })
+
+@csrf_exempt
+def review_spelling_mistake(request):
+    """Grade a spelling review and schedule the next one"""
     if request.method == 'POST':
         current_user = get_current_user(request)
         if not current_user:
@@ -676,15 +1094,24 @@ def toggle_spelling_review(request):
         
         data = json.loads(request.body)
         mistake_id = data.get('mistake_id')
+        quality = data.get('quality')
+        
+        try:
+            quality = int(quality)
+        except (TypeError, ValueError):
+            return JsonResponse({'success': False, 'error': 'Quality must be a number from 0 to 5'})
         
         try:
             mistake = SpellingMistake.objects.get(id=mistake_id, user=current_user)
-            mistake.is_reviewed = not mistake.is_reviewed
+            mistake.schedule_review(quality)
             mistake.save()
             
             return JsonResponse({
                 'success': True,
-                'is_reviewed': mistake.is_reviewed
+                'is_reviewed': mistake.is_reviewed,
+                'interval_days': mistake.interval_days,
+                'ease_factor': round(mistake.ease_factor, 2),
+                'due_at': mistake.due_at.isoformat(),
             })
         except SpellingMistake.DoesNotExist:
             return JsonResponse({'success': False, 'error': 'Spelling mistake not found'})
@@ -0,0 +1,44 @@
+"""Per-process warmup run when the WSGI/ASGI application is imported.
+
+With gunicorn's preload_app this happens once in the master, so forked
+workers start with the spelling index mapped, the autocomplete index
+built and every guide template already compiled in the cached loader
+instead of paying for it on their first requests.
+"""
+import logging
+from pathlib import Path
+
+from django.template import TemplateSyntaxError
+from django.template.loader import get_template
+
+from .autocomplete import warm_autocomplete
+from .suggester import get_suggester
+
+logger = logging.getLogger('guide.warmup')
+
+TEMPLATE_DIR = Path(__file__).resolve().parent / 'templates'
+
+
+def template_names():
+    return sorted(path.relative_to(TEMPLATE_DIR).as_posix() for path in (TEMPLATE_DIR / 'guide').rglob('*.html'))
+
+
+def warm_templates():
+    """Compile every guide template (and the templates it extends); returns the names loaded"""
+    loaded = []
+    for name in template_names():
+        try:
+            get_template(name)
+        except TemplateSyntaxError:
+            # Leave the error to surface on the page that uses the template
+            # rather than refusing to boot the whole site
+            logger.exception('Could not compile template %s during warmup', name)
+        else:
+            loaded.append(name)
+    return loaded
+
+
+def warm_up():
+    get_suggester()
+    warm_autocomplete()
+    warm_templates()
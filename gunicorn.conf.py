@@ -0,0 +1,78 @@
+"""Gunicorn configuration for pte_guide.
+
+Loaded automatically when gunicorn is started from the project root. Every
+value can be overridden through the environment (or on the command line,
+which takes precedence over this file).
+"""
+import multiprocessing
+import os
+import sys
+import time
+
+CONFIG_LOADED_AT = time.time()
+
+
+def env_bool(name, default):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', '8000')}")
+
+# SQLite serializes writes, so extra workers beyond a handful only add
+# memory; WEB_CONCURRENCY (set by Render and Heroku) wins when present.
+workers = int(os.environ.get(
+    'WEB_CONCURRENCY',
+    min(multiprocessing.cpu_count() * 2 + 1, int(os.environ.get('GUNICORN_MAX_WORKERS', 4))),
+))
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread' if threads > 1 else 'sync')
+
+# Import Django, the URLconf and the mmapped spelling index once in the
+# master so forked workers share those pages copy-on-write and boot fast.
+preload_app = env_bool('GUNICORN_PRELOAD', True)
+
+# Recycle workers to bound slow memory growth; the jitter keeps them from
+# all restarting at the same moment.
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', max_requests // 10))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG')
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def when_ready(server):
+    server.log.info(
+        'Master ready in %.2fs (preload_app=%s, workers=%s, worker_class=%s)',
+        time.time() - CONFIG_LOADED_AT, server.cfg.preload_app, server.cfg.workers, server.cfg.worker_class_str,
+    )
+
+
+def pre_fork(server, worker):
+    # Close anything opened while preloading so a forked worker never
+    # inherits the master's database socket or SQLite handle.
+    if server.cfg.preload_app:
+        from django.db import connections
+        connections.close_all()
+
+
+def post_fork(server, worker):
+    worker.forked_at = time.time()
+
+
+def post_worker_init(worker):
+    worker.log.info('Worker %s booted in %.3fs', worker.pid, time.time() - worker.forked_at)
+
+
+def worker_exit(server, worker):
+    # Write the searches this worker still has buffered (guide/search_log.py)
+    search_log = sys.modules.get('guide.search_log')
+    if search_log is not None:
+        search_log.search_log.flush()
@@ -14,3 +14,9 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "pte_guide.settings")
 
 application = get_asgi_application()
+
+# Map the spelling suggester index and compile the templates at import time
+# so that with a preloading server every worker shares the same pages
+from guide.warmup import warm_up  # noqa: E402
+
+warm_up()
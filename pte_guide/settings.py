@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 
 from pathlib import Path
 import os
+import sys
 
 # Simple config function for development
 def config(key, default=None, cast=None):
@@ -55,7 +56,10 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "guide.middleware.StaticFilesMiddleware",
+    "guide.middleware.CompressionMiddleware",
+    "guide.middleware.PerformanceMiddleware",
+    "guide.middleware.QueryPatternMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -66,11 +70,20 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = "pte_guide.urls"
 
+# Compiled templates are kept by the cached loader for the life of the
+# worker (runserver's autoreloader resets it when a template changes) and
+# are compiled up front at boot by guide.warmup. Set TEMPLATE_CACHE=False
+# to re-read templates from disk on every render.
+TEMPLATE_CACHE = config('TEMPLATE_CACHE', default=True, cast=bool)
+TEMPLATE_LOADERS = [
+    "django.template.loaders.filesystem.Loader",
+    "django.template.loaders.app_directories.Loader",
+]
+
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
         "DIRS": [],
-        "APP_DIRS": True,
         "OPTIONS": {
             "context_processors": [
                 "django.template.context_processors.debug",
@@ -78,6 +91,7 @@ TEMPLATES = [
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
             ],
+            "loaders": [("django.template.loaders.cached.Loader", TEMPLATE_LOADERS)] if TEMPLATE_CACHE else TEMPLATE_LOADERS,
         },
     },
 ]
@@ -95,6 +109,44 @@ DATABASES = {
     }
 }
 
+RUNNING_TESTS = len(sys.argv) > 1 and sys.argv[1] == 'test'
+
+
+# Caches and sessions
+# https://docs.djangoproject.com/en/5.1/topics/http/sessions/
+
+SESSION_ENGINES = {
+    # Every request reads django_session; logins and logouts write it
+    'db': 'django.contrib.sessions.backends.db',
+    # Reads come from the sessions cache, writes go to both cache and database
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    # No server-side state: the session travels in a signed (not encrypted)
+    # cookie, so it cannot be revoked before it expires
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_STORE = config('SESSION_STORE', default='cached_db')
+SESSION_ENGINE = SESSION_ENGINES[SESSION_STORE]
+SESSION_CACHE_ALIAS = 'sessions'
+# Only save sessions that were actually changed, never on read-only views
+SESSION_SAVE_EVERY_REQUEST = False
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Shared by all gunicorn workers, so a login or logout handled by one
+    # worker is seen by the others; a per-process LocMemCache would serve
+    # stale sessions.
+    "sessions": {
+        "BACKEND": (
+            "django.core.cache.backends.locmem.LocMemCache" if RUNNING_TESTS
+            else "django.core.cache.backends.filebased.FileBasedCache"
+        ),
+        "LOCATION": config('SESSION_CACHE_DIR', default=os.path.join(BASE_DIR, '.cache', 'sessions')),
+        "OPTIONS": {"MAX_ENTRIES": config('SESSION_CACHE_MAX_ENTRIES', default=10000, cast=int)},
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -133,8 +185,67 @@ USE_TZ = True
 STATIC_URL = "static/"
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
-# Whitenoise settings
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# Whitenoise settings: collectstatic writes content-hashed copies plus gzip
+# and Brotli variants, and hashed files are served with a far-future
+# "immutable" Cache-Control header. Tests run without collectstatic, so they
+# use the plain storage.
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": (
+            "django.contrib.staticfiles.storage.StaticFilesStorage" if RUNNING_TESTS
+            else "whitenoise.storage.CompressedManifestStaticFilesStorage"
+        ),
+    },
+}
+WHITENOISE_MAX_AGE = config('WHITENOISE_MAX_AGE', default=0 if DEBUG else 60 * 60, cast=int)
+
+# Dynamic response compression (static files are pre-compressed above).
+# Responses that render a CSRF token are skipped to stay BREACH-safe.
+RESPONSE_COMPRESSION = config('RESPONSE_COMPRESSION', default=True, cast=bool)
+RESPONSE_COMPRESSION_MIN_SIZE = config('RESPONSE_COMPRESSION_MIN_SIZE', default=1024, cast=int)
+RESPONSE_COMPRESSION_BROTLI_QUALITY = config('RESPONSE_COMPRESSION_BROTLI_QUALITY', default=5, cast=int)
+RESPONSE_COMPRESSION_SKIP_CSRF = config('RESPONSE_COMPRESSION_SKIP_CSRF', default=True, cast=bool)
+
+# Long list pages are streamed in chunks of this many items
+STREAMING_CHUNK_SIZE = config('STREAMING_CHUNK_SIZE', default=50, cast=int)
+
+# N+1 query detection: 'off', 'log' or 'fail'. Tests run in 'fail' mode so a
+# new repeated-query pattern in a view or template breaks the build.
+QUERY_PATTERN_DETECTION = config('QUERY_PATTERN_DETECTION', default='fail' if RUNNING_TESTS else ('log' if DEBUG else 'off'))
+QUERY_PATTERN_THRESHOLD = config('QUERY_PATTERN_THRESHOLD', default=5, cast=int)
+
+# Readiness probe (/health/ready/): per-check timeout, result cache lifetime
+# and the minimum free disk space next to the database
+HEALTH_CHECK_TIMEOUT = config('HEALTH_CHECK_TIMEOUT', default=2.0, cast=float)
+HEALTH_CHECK_CACHE_SECONDS = config('HEALTH_CHECK_CACHE_SECONDS', default=5.0, cast=float)
+HEALTH_MIN_FREE_DISK_MB = config('HEALTH_MIN_FREE_DISK_MB', default=100, cast=int)
+
+# Memory-mapped delete index for the spelling suggester (built on first use
+# or with `manage.py build_spelling_index`)
+SPELLING_INDEX_PATH = config('SPELLING_INDEX_PATH', default=os.path.join(BASE_DIR, 'spelling_index.bin'))
+
+# Each worker's in-memory autocomplete index checks for new or edited
+# titles and tags at most this often
+AUTOCOMPLETE_REFRESH_SECONDS = config('AUTOCOMPLETE_REFRESH_SECONDS', default=0 if RUNNING_TESTS else 30, cast=float)
+
+# Per-worker search result cache (ordered content ids per normalized query
+# and filters): LRU bounds, lifetime, and how often a worker checks whether
+# content changed. SEARCH_CACHE_MAX_ENTRIES=0 turns it off.
+SEARCH_CACHE_MAX_ENTRIES = config('SEARCH_CACHE_MAX_ENTRIES', default=500, cast=int)
+SEARCH_CACHE_MAX_IDS = config('SEARCH_CACHE_MAX_IDS', default=200000, cast=int)
+SEARCH_CACHE_TIMEOUT = config('SEARCH_CACHE_TIMEOUT', default=300, cast=float)
+SEARCH_CACHE_GENERATION_SECONDS = config('SEARCH_CACHE_GENERATION_SECONDS', default=0 if RUNNING_TESTS else 2, cast=float)
+
+# Search analytics: searches are buffered per worker and written to SearchLog
+# in batches after the response, once this many are waiting or the oldest
+# is this old (see guide/search_log.py)
+SEARCH_LOG_ENABLED = config('SEARCH_LOG_ENABLED', default=not RUNNING_TESTS, cast=bool)
+SEARCH_LOG_BATCH_SIZE = config('SEARCH_LOG_BATCH_SIZE', default=50, cast=int)
+SEARCH_LOG_FLUSH_SECONDS = config('SEARCH_LOG_FLUSH_SECONDS', default=30, cast=float)
+SEARCH_LOG_MAX_BUFFERED = config('SEARCH_LOG_MAX_BUFFERED', default=5000, cast=int)
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field